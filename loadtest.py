@@ -0,0 +1,235 @@
+"""
+Load generator for the Pharmesol inbound sales chatbot.
+
+Drives concurrent scripted calls through the real chatbot stack (session
+manager, directory cache, OpenAI client) and reports turn latency percentiles
+and throughput. By default it starts local mock OpenAI and pharmacy-directory
+servers, so no API key or network access is needed.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# The mock servers accept any key; a real key is only needed with --openai-base-url
+os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+
+from src.http_session import PooledSession
+from src.integration import PharmacyAPIIntegration
+from src.llm_clients import LLMPoolStats, create_openai_client
+from src.metrics import REGISTRY, percentile
+from src.mock_servers import MockOpenAIServer, MockPharmacyServer
+from src.sessions import CallSessionManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRIPT = [
+    "Hi, I'm calling about your services for high-volume pharmacies.",
+    "We fill around 800 prescriptions a day and it keeps growing.",
+    "Could you email me more information?",
+    "Thanks, that's all for now.",
+]
+
+
+def _caller_phone(call_index: int, returning_ratio: float, directory_size: int) -> str:
+    """Alternate between numbers in the synthetic directory and unknown numbers."""
+    if directory_size and (call_index % 100) < returning_ratio * 100:
+        i = call_index % directory_size
+        return f"555-{i // 10000:03d}-{i % 10000:04d}"
+    return f"555-999-{call_index % 10000:04d}"
+
+
+def run_load_test(
+    calls: int,
+    concurrency: int,
+    openai_base_url: str,
+    pharmacy_api_url: str,
+    script: Optional[List[str]] = None,
+    stream: bool = False,
+    returning_ratio: float = 0.5,
+    directory_size: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run ``calls`` scripted calls with up to ``concurrency`` in flight.
+
+    Returns:
+        Report dictionary with latency percentiles (seconds) and throughput
+    """
+    script = script or DEFAULT_SCRIPT
+    api_integration = PharmacyAPIIntegration(
+        pharmacy_api_url, session=PooledSession(pool_maxsize=concurrency)
+    )
+    # One client for every call, as CLIENT_REGISTRY shares it in production
+    llm_pool_stats = LLMPoolStats()
+    manager = CallSessionManager(
+        max_sessions=max(concurrency * 2, 1),
+        api_integration=api_integration,
+        llm_client=create_openai_client(
+            api_key=os.environ["OPENAI_API_KEY"], base_url=openai_base_url, stats=llm_pool_stats
+        ),
+    )
+
+    warm_started = time.perf_counter()
+    api_integration.directory.refresh()
+    directory_warmup = time.perf_counter() - warm_started
+
+    greeting_latencies: List[float] = []
+    turn_latencies: List[float] = []
+    first_chunk_latencies: List[float] = []
+    call_usage: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    def run_call(call_index: int):
+        call_id = f"load-{call_index}"
+        try:
+            started = time.perf_counter()
+            manager.start_call(
+                call_id, _caller_phone(call_index, returning_ratio, directory_size)
+            )
+            greeting_latencies.append(time.perf_counter() - started)
+
+            for user_input in script:
+                started = time.perf_counter()
+                if stream:
+                    first_chunk = None
+                    for _ in manager.continue_conversation_stream(call_id, user_input):
+                        if first_chunk is None:
+                            first_chunk = time.perf_counter() - started
+                    if first_chunk is not None:
+                        first_chunk_latencies.append(first_chunk)
+                else:
+                    manager.continue_conversation(call_id, user_input)
+                turn_latencies.append(time.perf_counter() - started)
+
+            call_usage.append(manager.end_call(call_id)["token_usage"])
+        except Exception as e:
+            logger.exception(f"Call {call_id} failed")
+            errors.append(f"{call_id}: {e}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run_call, range(calls)))
+    elapsed = time.perf_counter() - started
+
+    all_turns = greeting_latencies + turn_latencies
+
+    def summarize(values):
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+
+    return {
+        "calls": calls,
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "errors": errors,
+        "directory_warmup": directory_warmup,
+        "greeting_latency": summarize(greeting_latencies),
+        "turn_latency": summarize(turn_latencies),
+        "first_chunk_latency": summarize(first_chunk_latencies) if stream else None,
+        "throughput_turns_per_s": len(all_turns) / elapsed if elapsed else 0.0,
+        "throughput_calls_per_s": (calls - len(errors)) / elapsed if elapsed else 0.0,
+        "http_pool": api_integration.session.stats.as_dict(),
+        "llm_pool": llm_pool_stats.as_dict(),
+        "token_usage": {
+            key: round(sum(usage[key] for usage in call_usage), 6)
+            for key in ("prompt_tokens", "cached_prompt_tokens", "completion_tokens", "cost_usd")
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    def fmt(value):
+        return "n/a" if value is None else f"{value * 1000:8.1f} ms"
+
+    print("=" * 60)
+    print(f"Calls: {report['calls']}  Concurrency: {report['concurrency']}  "
+          f"Errors: {len(report['errors'])}")
+    print(f"Elapsed: {report['elapsed']:.2f} s  "
+          f"Directory warm-up: {report['directory_warmup'] * 1000:.1f} ms")
+    print("-" * 60)
+    rows = [("Greeting", report["greeting_latency"]), ("Turn", report["turn_latency"])]
+    if report["first_chunk_latency"]:
+        rows.append(("First chunk", report["first_chunk_latency"]))
+    for label, stats in rows:
+        print(f"{label:<12} n={stats['count']:<6} p50={fmt(stats['p50'])}  "
+              f"p95={fmt(stats['p95'])}  p99={fmt(stats['p99'])}")
+    print("-" * 60)
+    print(f"Throughput: {report['throughput_turns_per_s']:.1f} turns/s, "
+          f"{report['throughput_calls_per_s']:.2f} calls/s")
+    print(f"Directory HTTP pool: {report['http_pool']}")
+    llm_pool = report["llm_pool"]
+    print(f"LLM HTTP pool: {llm_pool['requests']} requests over {llm_pool['pool_misses']} "
+          f"connections, peak {llm_pool['peak_in_flight']} in flight "
+          f"({llm_pool['peak_utilization']:.0%} of {llm_pool['max_connections']})")
+    print(f"Token usage: {report['token_usage']}")
+    for error in report["errors"][:10]:
+        print(f"  error: {error}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--stream", action="store_true", help="Use streaming turns")
+    parser.add_argument("--llm-latency", default="lognormal:-1.6,0.4",
+                        help="Mock LLM latency distribution (e.g. fixed:0.2, uniform:0.1,0.5)")
+    parser.add_argument("--inter-token-latency", default="fixed:0.005")
+    parser.add_argument("--tool-call-rate", type=float, default=0.2)
+    parser.add_argument("--directory-size", type=int, default=100_000)
+    parser.add_argument("--directory-latency", default="fixed:0.05")
+    parser.add_argument("--returning-ratio", type=float, default=0.5)
+    parser.add_argument("--openai-base-url", help="Use this endpoint instead of the mock LLM")
+    parser.add_argument("--pharmacy-api-url", help="Use this directory instead of the mock")
+    parser.add_argument("--metrics-dump", help="Write per-stage metrics (Prometheus text) here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    servers = []
+    openai_base_url = args.openai_base_url
+    pharmacy_api_url = args.pharmacy_api_url
+    if not openai_base_url:
+        llm_server = MockOpenAIServer(
+            latency=args.llm_latency,
+            inter_token_latency=args.inter_token_latency,
+            tool_call_rate=args.tool_call_rate,
+        ).start()
+        servers.append(llm_server)
+        openai_base_url = llm_server.api_base_url
+    if not pharmacy_api_url:
+        directory_server = MockPharmacyServer(
+            count=args.directory_size, latency=args.directory_latency
+        ).start()
+        servers.append(directory_server)
+        pharmacy_api_url = directory_server.url
+
+    try:
+        report = run_load_test(
+            calls=args.calls,
+            concurrency=args.concurrency,
+            openai_base_url=openai_base_url,
+            pharmacy_api_url=pharmacy_api_url,
+            stream=args.stream,
+            returning_ratio=args.returning_ratio,
+            directory_size=0 if args.pharmacy_api_url else args.directory_size,
+        )
+    finally:
+        for server in servers:
+            server.stop()
+
+    print_report(report)
+    if args.metrics_dump:
+        REGISTRY.dump(args.metrics_dump)
+        print(f"Stage metrics written to {args.metrics_dump}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
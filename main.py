@@ -4,6 +4,7 @@ Main entry point for the Pharmesol inbound sales chatbot.
 import logging
 import sys
 from src.chatbot import PharmacyChatbot
+from src.config import validate_config
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +21,8 @@ def simulate_call():
     print("=" * 60)
     
     try:
+        # Report a missing key or malformed setting before the caller is prompted
+        validate_config()
         chatbot = PharmacyChatbot()
         
         # Get mock phone number from user
@@ -50,8 +53,11 @@ def simulate_call():
             if not user_input:
                 continue
                 
-            response = chatbot.continue_conversation(user_input)
-            print(f"🤖 Bot: {response}")
+            # Stream the reply so the caller hears the first words immediately
+            print("🤖 Bot: ", end="", flush=True)
+            for chunk in chatbot.continue_conversation_stream(user_input):
+                print(chunk, end="", flush=True)
+            print()
             
         # End call and show summary
         print("\n" + "=" * 60)
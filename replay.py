@@ -0,0 +1,96 @@
+"""
+Offline batch replay of scripted calls for the Pharmesol inbound sales chatbot.
+
+Reads call scripts from JSONL (one call per line: ``{"phone": ..., "turns":
+[...]}``), replays them through PharmacyChatbot in a process pool against a
+stub (or recorded, or real) LLM and writes per-call summaries, tool-call
+outcomes and timings to JSONL. A results file can be replayed again as input
+to pin the LLM's responses.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+# The stub LLM needs no key; a real key is only checked with --llm openai
+from src.mock_servers import generate_pharmacies
+from src.replay import load_scripts, run_replay
+
+
+def _load_directory(path: str):
+    """Pharmacy records from a JSON list or a JSONL file."""
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def print_report(report):
+    def fmt(value):
+        return "n/a" if value is None else f"{value * 1000:.1f} ms"
+
+    print("=" * 60)
+    print(f"Calls: {report['calls']}  Errors: {report['errors']}  Workers: {report['workers']}")
+    print(f"Elapsed: {report['elapsed']:.2f} s  ({report['calls_per_s']:.1f} calls/s)")
+    latency = report["turn_latency"]
+    print(f"Turn latency: n={latency['count']}  p50={fmt(latency['p50'])}  p95={fmt(latency['p95'])}")
+    print("Tool calls:")
+    for name, count in report["tool_calls"].items():
+        print(f"  {name}: {count}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scripts", help="JSONL file of call scripts ('-' for stdin)")
+    parser.add_argument("--output", default="-", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (0 replays in this process)")
+    parser.add_argument("--llm", choices=("stub", "openai"), default="stub",
+                        help="LLM for turns without recorded responses")
+    parser.add_argument("--model", help="Model to request (defaults to OPENAI_MODEL)")
+    parser.add_argument("--openai-base-url", help="Endpoint for --llm openai")
+    parser.add_argument("--tool-followup", action="store_true",
+                        help="Run the follow-up LLM pass after tool calls")
+    directory = parser.add_mutually_exclusive_group()
+    directory.add_argument("--directory", help="Pharmacy directory as a JSON list or JSONL")
+    directory.add_argument("--directory-size", type=int, default=1000,
+                           help="Size of the synthetic directory used without --directory")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    pharmacies = (
+        _load_directory(args.directory) if args.directory
+        else generate_pharmacies(args.directory_size)
+    )
+    scripts_file = sys.stdin if args.scripts == "-" else open(args.scripts)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        report = run_replay(
+            load_scripts(scripts_file),
+            output,
+            pharmacies=pharmacies,
+            workers=args.workers,
+            llm=args.llm,
+            model=args.model,
+            openai_base_url=args.openai_base_url,
+            tool_followup=args.tool_followup,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if scripts_file is not sys.stdin:
+            scripts_file.close()
+
+    # Keep stdout clean for results when they are written there
+    if output is not sys.stdout:
+        print_report(report)
+    else:
+        print(json.dumps(report), file=sys.stderr)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
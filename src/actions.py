@@ -0,0 +1,227 @@
+"""
+Background execution of function-call side effects (emails, callbacks).
+
+The conversational turn only enqueues the action and acknowledges it; a pool
+of worker threads performs it with retries. Each action carries an
+idempotency key, so a duplicate submission returns the original action
+instead of sending the same email twice.
+"""
+import hashlib
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .config import ACTION_WORKERS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class ActionQueueFullError(Exception):
+    """The executor's queue is full; the action was not accepted."""
+
+
+def idempotency_key(scope: str, function_name: str, arguments: Dict[str, Any]) -> str:
+    """Stable key for one action: same scope, function and arguments give the same key."""
+    payload = json.dumps([scope, function_name, arguments], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ActionRecord:
+    """Status of one submitted action."""
+
+    def __init__(self, key: str, kind: str, action: Callable[[], Any]):
+        self.key = key
+        self.kind = kind
+        self.action = action
+        self.status = QUEUED
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.key,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+class ActionExecutor:
+    """
+    Queue plus worker pool for side effects.
+
+    Failed actions are retried up to ``max_retries`` times with full-jitter
+    exponential backoff. Statuses of the last ``max_tracked`` actions are kept
+    for queries; older finished ones are forgotten.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        max_pending: int = 10_000,
+        max_tracked: int = 10_000,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_tracked = max_tracked
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._records: "OrderedDict[str, ActionRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"action-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, key: str, kind: str, action: Callable[[], Any]) -> Dict[str, Any]:
+        """
+        Queue an action unless one with the same idempotency key exists.
+
+        Never blocks: when the workers have fallen ``max_pending`` actions
+        behind, the action is rejected instead of holding up the turn.
+
+        Returns:
+            Status of the (new or existing) action
+
+        Raises:
+            ActionQueueFullError: If the queue is full
+        """
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                logger.info(f"Duplicate {kind} action {key} ignored")
+                return record.as_dict()
+            record = ActionRecord(key, kind, action)
+            self._records[key] = record
+            self._trim_locked()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._records.pop(key, None)
+            logger.error(
+                f"Action queue full ({self._queue.maxsize} pending), {kind} action {key} rejected"
+            )
+            raise ActionQueueFullError(f"Too many pending actions, {kind} not accepted") from None
+        return record.as_dict()
+
+    def _trim_locked(self):
+        excess = len(self._records) - self.max_tracked
+        for key in list(self._records):
+            if excess <= 0:
+                break
+            if self._records[key].done.is_set():
+                del self._records[key]
+                excess -= 1
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _work(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            self._run(record)
+
+    def _run(self, record: ActionRecord):
+        while True:
+            record.status = RUNNING
+            record.attempts += 1
+            try:
+                record.action()
+            except Exception as e:
+                record.error = str(e)
+                if record.attempts > self.max_retries:
+                    record.status = FAILED
+                    logger.error(
+                        f"{record.kind} action {record.key} failed after "
+                        f"{record.attempts} attempts: {e}"
+                    )
+                    break
+                logger.warning(f"{record.kind} action {record.key} failed, retrying: {e}")
+                time.sleep(self._backoff(record.attempts - 1))
+            else:
+                record.status = SUCCEEDED
+                record.error = None
+                break
+        record.done.set()
+
+    def status(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(key)
+        return record.as_dict() if record else None
+
+    def wait(self, keys: Iterable[str], timeout: Optional[float] = None) -> bool:
+        """Wait until every given action has finished. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            records = [self._records[key] for key in keys if key in self._records]
+        for record in records:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not record.done.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once the queued actions have run."""
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+_default_executor: Optional[ActionExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_default_executor() -> Optional[ActionExecutor]:
+    """
+    Process-wide executor shared by every FunctionHandler.
+
+    Returns:
+        An ActionExecutor with ACTION_WORKERS workers, or None when side
+        effects run inline (ACTION_WORKERS=0)
+    """
+    global _default_executor
+    if ACTION_WORKERS <= 0:
+        return None
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ActionExecutor(workers=ACTION_WORKERS)
+    return _default_executor
+
+
+_deferral_executor: Optional[ActionExecutor] = None
+
+
+def get_deferral_executor() -> ActionExecutor:
+    """
+    Executor for side effects that would otherwise run inline after the turn deadline.
+
+    Used only when ACTION_WORKERS=0: a turn that has run out of time still
+    performs the action, but in the background instead of delaying the reply.
+    """
+    global _deferral_executor
+    with _default_executor_lock:
+        if _deferral_executor is None:
+            _deferral_executor = ActionExecutor(workers=1)
+    return _deferral_executor
@@ -1,166 +1,412 @@
+import asyncio
+import contextvars
 import logging
-from typing import Dict, Any, Optional
-from .integration import PharmacyAPIIntegration
-from .llm import ChatbotLLM
-from .prompts import (
-    get_system_prompt,
-    get_returning_customer_prompt,
-    get_new_customer_prompt,
-    get_volume_discussion_prompt,
-)
-from .function_calls import FunctionHandler
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional, Tuple
+from .config import DIRECTORY_LOOKUP_TIMEOUT, TOOL_FOLLOWUP_PASS, TURN_DEADLINE
+from .deadline import DEADLINE_EXCEEDED, Deadline, time_left
+from .integration import AsyncPharmacyAPIIntegration, PharmacyAPIIntegration
+from .llm import AsyncChatbotLLM, ChatbotLLM
+from .prompts import DEFAULT_PROMPT_BUILDER
+from .function_calls import FunctionHandler, function_error, is_function_error, validate_arguments
+from .intents import FAST_PATH_TURNS, FastPath, extract_slots
+from .metrics import conversation_state, observe_stage, span
+from .scoring import annotate_volumes
+from .usage import UsageTotals, record_usage
 
 logger = logging.getLogger(__name__)
 
-
-class PharmacyChatbot:
-    def __init__(self):
-        self.api_integration = PharmacyAPIIntegration()
-        self.llm = ChatbotLLM()
-        self.function_handler = FunctionHandler()
+DEFAULT_RESPONSE = "I'm here to help with any questions about Pharmesol's services."
+
+_lookup_executor: Optional[ThreadPoolExecutor] = None
+_tool_executor: Optional[ThreadPoolExecutor] = None
+# Concurrent first calls must not each create a pool
+_executor_lock = threading.Lock()
+
+
+def _get_lookup_executor() -> ThreadPoolExecutor:
+    """Shared pool that runs directory lookups alongside greeting preparation."""
+    global _lookup_executor
+    if _lookup_executor is None:
+        with _executor_lock:
+            if _lookup_executor is None:
+                _lookup_executor = ThreadPoolExecutor(
+                    max_workers=8, thread_name_prefix="directory-lookup"
+                )
+    return _lookup_executor
+
+
+def _get_tool_executor() -> ThreadPoolExecutor:
+    """Shared pool that runs independent tool calls of one response in parallel."""
+    global _tool_executor
+    if _tool_executor is None:
+        with _executor_lock:
+            if _tool_executor is None:
+                _tool_executor = ThreadPoolExecutor(
+                    max_workers=8, thread_name_prefix="tool-call"
+                )
+    return _tool_executor
+
+
+class _ToolCallResults:
+    """
+    Results of one response's tool calls, filled in by the workers running them.
+
+    Once the turn stops waiting (``close``), calls that have not started are
+    never started, so a call is either finished, still running, or not run.
+    """
+
+    def __init__(self, count: int):
+        self.results: List[Optional[str]] = [None] * count
+        self._started = set()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self, index: int) -> bool:
+        """Claim a call for running; False once the turn has stopped waiting."""
+        with self._lock:
+            if self._closed:
+                return False
+            self._started.add(index)
+            return True
+
+    def close(self) -> Tuple[List[Optional[str]], set]:
+        """Stop new calls from starting; return the results so far and the started indexes."""
+        with self._lock:
+            self._closed = True
+            return list(self.results), set(self._started)
+
+
+class _BaseChatbot:
+    """
+    Call state, prompt selection and response handling.
+
+    Subclasses only perform the I/O (directory lookup and LLM request), either
+    blocking or with asyncio, and hand the results to these helpers.
+    """
+
+    def __init__(
+        self,
+        api_integration,
+        llm,
+        function_handler: FunctionHandler,
+        lookup_timeout: float = DIRECTORY_LOOKUP_TIMEOUT,
+        tool_followup: bool = TOOL_FOLLOWUP_PASS,
+        fast_path: Optional[FastPath] = None,
+        turn_deadline: float = TURN_DEADLINE,
+    ):
+        self.api_integration = api_integration
+        self.llm = llm
+        self.function_handler = function_handler
+        self.lookup_timeout = lookup_timeout
+        # After tool calls, ask the model for one reply covering all their results
+        self.tool_followup = tool_followup
+        # Answers trivial turns ("thanks", "bye", "repeat that") without the LLM
+        self.fast_path = fast_path or FastPath()
+        # Seconds each start_call / continue_conversation may take end to end
+        self.turn_deadline = turn_deadline
+        # Email and phone the caller mentioned, extracted locally
+        self.slots: Dict[str, str] = {}
+        self.prompt_builder = DEFAULT_PROMPT_BUILDER
         self.current_pharmacy = None
         self.conversation_state = "initial"
-
-    def start_call(self, caller_phone: str) -> str:
+        # Directory lookup that missed the greeting deadline, resolved on a later turn
+        self._pending_lookup = None
+        # Token usage and cost of every LLM request in the current call
+        self.call_usage = UsageTotals()
+
+    def _begin_call(
+        self, pharmacy: Optional[Dict[str, Any]], lookup_pending: bool = False
+    ) -> Tuple[str, str]:
         """
-        Initialize a new call session with caller ID lookup.
+        Set the call state from the lookup result.
 
         Args:
-            caller_phone: The phone number of the incoming caller
+            pharmacy: Directory record for the caller, if found
+            lookup_pending: Whether the lookup missed its deadline and the
+                caller's identity is not known yet
 
         Returns:
-            Initial greeting message
+            Tuple of (initial message, context prompt) for the greeting turn
         """
-        logger.info(f"Starting call from phone number: {caller_phone}")
+        self.current_pharmacy = pharmacy
 
-        # Look up pharmacy in the system
-        self.current_pharmacy = self.api_integration.get_pharmacy_by_phone(caller_phone)
-
-        if self.current_pharmacy:
+        if lookup_pending:
+            logger.info("Directory lookup missed its deadline - generic greeting")
+            self.conversation_state = "identifying"
+            initial_message = "Thank you for calling Pharmesol!"
+        elif self.current_pharmacy:
             # Returning customer
             logger.info(f"Returning customer: {self.current_pharmacy.get('name')}")
             self.conversation_state = "returning_customer"
-            prompt = get_returning_customer_prompt(self.current_pharmacy)
             initial_message = "Thank you for calling Pharmesol! I see you're calling from our records."
         else:
             # New customer
             logger.info("New customer - not found in system")
             self.conversation_state = "new_customer"
-            prompt = get_new_customer_prompt()
             initial_message = "Thank you for calling Pharmesol! I don't see your number in our system."
 
-        # Generate initial response
-        system_prompt = get_system_prompt()
-        response = self.llm.generate_response(
-            initial_message,
-            system_prompt + "\n\n" + prompt,
-            self.function_handler.get_function_definitions(),
-        )
+        return initial_message, self._context_prompt()
 
-        return self._process_response(response)
+    def _apply_late_lookup(self, pharmacy: Optional[Dict[str, Any]]):
+        """Upgrade the call context once a late directory lookup completes."""
+        self._pending_lookup = None
+        if self.conversation_state != "identifying":
+            # The caller already gave us their details during the call
+            return
 
-    def continue_conversation(self, user_input: str) -> str:
-        """
-        Continue the conversation with user input.
-
-        Args:
-            user_input: What the user/caller said
+        if pharmacy:
+            logger.info(f"Returning customer identified late: {pharmacy.get('name')}")
+            self.current_pharmacy = pharmacy
+            self.conversation_state = "returning_customer"
+        else:
+            logger.info("New customer - not found in system")
+            self.conversation_state = "new_customer"
 
-        Returns:
-            Bot response
+    def _prepare_greeting(self):
         """
-        logger.info(f"User input: {user_input}")
-
-        # Determine appropriate prompt based on conversation state and context
-        system_prompt = get_system_prompt()
+        Greeting work that does not depend on the caller, done while the lookup runs.
 
-        if self.conversation_state == "returning_customer" and self.current_pharmacy:
-            context_prompt = get_returning_customer_prompt(self.current_pharmacy)
-        elif self.conversation_state == "new_customer":
-            context_prompt = get_new_customer_prompt()
-        else:
-            # Default to general conversation
-            rx_volume = (
-                self.current_pharmacy.get("rx_volume")
-                if self.current_pharmacy
-                else None
+        Builds the LLM client (and its shared connection pool) and renders the
+        context prompts of the greetings that need no pharmacy record, so
+        only the returning-customer prompt is left once the lookup answers.
+        """
+        with span("greeting_prepare"):
+            try:
+                self.llm.client
+            except Exception as e:
+                # The greeting request reports the problem (and apologizes) itself
+                logger.debug(f"LLM client warm-up failed: {e}")
+            for state in ("new_customer", "identifying"):
+                self.prompt_builder.context_prompt(state)
+
+    def _new_deadline(self) -> Deadline:
+        """Deadline for one turn, shared by its lookup, LLM requests and function calls."""
+        return Deadline(self.turn_deadline)
+
+    def _context_prompt(self) -> str:
+        """Per-call context prompt for the current conversation state."""
+        with span("prompt_build", state=self.conversation_state):
+            return self.prompt_builder.context_prompt(
+                self.conversation_state, self.current_pharmacy
             )
-            context_prompt = get_volume_discussion_prompt(rx_volume)
-
-        full_prompt = system_prompt + "\n\n" + context_prompt
 
-        # Generate response
-        response = self.llm.generate_response(
-            user_input, full_prompt, self.function_handler.get_function_definitions()
-        )
-
-        return self._process_response(response)
-
-    def _process_response(self, llm_response: Dict[str, Any]) -> str:
+    def _fast_path_reply(self, user_input: str) -> Optional[str]:
         """
-        Process LLM response and handle function calls.
-
-        Args:
-            llm_response: Response from LLM including potential function calls
+        Answer a trivial turn from a template.
 
         Returns:
-            Final response to show to user
+            The reply, or None if the turn needs the LLM
         """
-        response_text = llm_response.get("content", "")
-        function_call = llm_response.get("function_call")
+        self.slots.update(extract_slots(user_input))
+        with span("fast_path", state=self.conversation_state):
+            answer = self.fast_path.answer(user_input, self.llm.last_reply)
+        if answer is None:
+            return None
+
+        intent, reply = answer
+        logger.info(f"Fast path answered '{intent}' turn without the LLM")
+        self.llm.add_exchange(user_input, reply)
+        FAST_PATH_TURNS.inc(intent=intent, state=self.conversation_state)
+        return reply
+
+    def _record_stream_timing(self, state: str):
+        """Record the latency of a streamed LLM request once it has been consumed."""
+        timing = self.llm.last_timing
+        if timing.get("total") is not None:
+            observe_stage("llm_request", timing["total"], state)
+        if timing.get("time_to_first_token") is not None:
+            observe_stage("llm_first_token", timing["time_to_first_token"], state)
+
+    def _record_usage(self, llm_response: Dict[str, Any]):
+        """Add a response's token usage to the call totals and process counters."""
+        usage = llm_response.get("usage")
+        if usage is not None:
+            self.call_usage.add(usage)
+            record_usage(usage)
+
+    def _response_function_calls(self, llm_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Record a response's usage and return the tool calls it contains, in order."""
+        self._record_usage(llm_response)
+        function_calls = llm_response.get("function_calls")
+        if function_calls is None:
+            function_call = llm_response.get("function_call")
+            function_calls = [function_call] if function_call else []
+        return function_calls
+
+    def _tool_call_groups(self, function_calls: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        Indexes of the calls that may run in parallel with each other's groups.
 
-        if function_call:
-            # Execute the function
-            function_name = function_call["name"]
-            function_args = function_call["arguments"]
+        Calls to different functions are independent; repeated calls to the
+        same function form one group and run in order.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, call in enumerate(function_calls):
+            groups.setdefault(call["name"], []).append(index)
+        return list(groups.values())
+
+    def _run_tool_call_group(
+        self,
+        function_calls: List[Dict[str, Any]],
+        indexes: List[int],
+        results: _ToolCallResults,
+        deadline: Optional[Deadline] = None,
+    ):
+        for index in indexes:
+            if not results.start(index):
+                return
+            results.results[index] = self._execute_function_call(function_calls[index], deadline)
+
+    def _settle_function_calls(
+        self, function_calls: List[Dict[str, Any]], results: _ToolCallResults, unfinished: int
+    ) -> List[str]:
+        """
+        Apply the results in the model's order, once all calls have finished or the deadline passed.
 
-            logger.info(
-                f"Executing function: {function_name} with args: {function_args}"
-            )
+        At the deadline, calls still running are reported as running (they
+        finish in the background, so the model must not repeat them) and
+        calls not started yet are cancelled with a ``deadline_exceeded`` error.
+        """
+        finished, started = results.close()
+        if unfinished:
+            logger.warning(f"{unfinished} tool call group(s) still running at the turn deadline")
+            DEADLINE_EXCEEDED.inc(stage="function_call")
+        settled = []
+        for index, (call, result) in enumerate(zip(function_calls, finished)):
+            if result is None and index in started:
+                result = (
+                    f"{call['name']} is still running and will complete in the background. "
+                    "Do not call it again."
+                )
+                self._apply_function_result(call, result, finished=False)
+            else:
+                if result is None:
+                    result = function_error(
+                        call["name"], "deadline_exceeded", ["Not run: the turn deadline passed"]
+                    )
+                self._apply_function_result(call, result)
+            settled.append(result)
+        return settled
+
+    def _execute_function_call(
+        self, function_call: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> str:
+        function_name = function_call["name"]
+        function_args = function_call["arguments"]
+
+        logger.info(f"Executing function: {function_name} with args: {function_args}")
+
+        return self.function_handler.execute_function(
+            function_name, function_args, deadline, state=self.conversation_state
+        )
 
-            function_result = self.function_handler.execute_function(
-                function_name, function_args
-            )
+    def _apply_function_result(
+        self, function_call: Dict[str, Any], function_result: str, finished: bool = True
+    ):
+        """
+        Record a function result in the conversation and update call state.
 
-            # Add function result to conversation
+        Call state is only updated from ``finished`` calls.
+        """
+        function_name = function_call["name"]
+
+        # Add function result to conversation, answering the call by id when it has one
+        if function_call.get("id"):
+            self.llm.add_tool_result(function_call["id"], function_result)
+        else:
             self.llm.add_function_result(function_name, function_result)
 
-            # If we collected pharmacy info, update our current pharmacy
-            if function_name == "collect_pharmacy_info":
-                self.current_pharmacy = function_args
-                self.conversation_state = "known_customer"
+        # If we collected pharmacy info, update our current pharmacy
+        if (
+            finished
+            and function_name == "collect_pharmacy_info"
+            and not is_function_error(function_result)
+        ):
+            self.current_pharmacy, _ = validate_arguments(function_name, function_call["arguments"])
+            annotate_volumes([self.current_pharmacy])
+            self.conversation_state = "known_customer"
+
+    def _followup_request(self, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Arguments for the optional follow-up pass over the tool results."""
+        return {
+            "system_prompt": self.prompt_builder.system_prompt,
+            "functions": self.function_handler.get_tools_for_state(self.conversation_state),
+            "context_prompt": self._context_prompt(),
+            "deadline": deadline,
+        }
 
-            # Append function result to response
-            if response_text:
-                return f"{response_text}\n\n{function_result}"
-            else:
-                return function_result
+    def _followup_text(self, followup: Dict[str, Any]) -> Optional[str]:
+        self._record_usage(followup)
+        return followup.get("content")
 
-        return (
-            response_text
-            or "I'm here to help with any questions about Pharmesol's services."
-        )
+    def _compose_reply(
+        self,
+        response_text: Optional[str],
+        function_results: List[str],
+        followup: Optional[str] = None,
+    ) -> str:
+        """
+        Final response to show to the user.
 
-    def end_call(self) -> Dict[str, Any]:
+        Args:
+            response_text: Content the model sent alongside its tool calls
+            function_results: Results of those tool calls
+            followup: Reply from the follow-up pass, used instead of the raw results
         """
-        End the call session and return summary.
+        if not function_results:
+            return response_text or DEFAULT_RESPONSE
+        tail = followup or "\n\n".join(function_results)
+        return f"{response_text}\n\n{tail}" if response_text else tail
+
+    def _stream_tail(
+        self,
+        function_results: List[str],
+        streamed: bool,
+        response_text: Optional[str],
+        followup: Optional[str] = None,
+    ) -> str:
+        """
+        Text still owed to the caller once a streamed response has ended.
+
+        Args:
+            function_results: Results of the response's tool calls
+            streamed: Whether any content was already yielded
+            response_text: The assembled content of the stream
+            followup: Reply from the follow-up pass, if one ran
 
         Returns:
-            Dictionary with call summary and metrics
+            Remaining text (possibly empty)
         """
+        if function_results:
+            tail = followup or "\n\n".join(function_results)
+            return f"\n\n{tail}" if streamed else tail
+        if streamed:
+            return ""
+        return response_text or DEFAULT_RESPONSE
+
+    def _summarize_call(self) -> Dict[str, Any]:
         summary = {
             "caller_phone": getattr(self, "caller_phone", "Unknown"),
             "pharmacy_info": self.current_pharmacy,
             "conversation_state": self.conversation_state,
             "function_summary": self.function_handler.get_summary(),
+            "token_usage": self.call_usage.as_dict(),
+            "slots": dict(self.slots),
         }
 
         logger.info(f"Call ended. Summary: {summary}")
 
-        # Clear conversation history for next call
+        # Clear conversation history and per-call records for next call
         self.llm.clear_history()
+        self.function_handler.reset()
         self.current_pharmacy = None
         self.conversation_state = "initial"
+        self._pending_lookup = None
+        self.call_usage = UsageTotals()
+        self.slots = {}
 
         return summary
 
@@ -170,4 +416,481 @@ class PharmacyChatbot:
             "current_pharmacy": self.current_pharmacy,
             "conversation_state": self.conversation_state,
             "conversation_history": self.llm.conversation_history,
+            "conversation_summary": self.llm.history.summary,
         }
+
+
+class PharmacyChatbot(_BaseChatbot):
+    def __init__(
+        self,
+        api_integration: Optional[PharmacyAPIIntegration] = None,
+        llm: Optional[ChatbotLLM] = None,
+        function_handler: Optional[FunctionHandler] = None,
+        lookup_timeout: float = DIRECTORY_LOOKUP_TIMEOUT,
+        tool_followup: bool = TOOL_FOLLOWUP_PASS,
+        fast_path: Optional[FastPath] = None,
+        turn_deadline: float = TURN_DEADLINE,
+    ):
+        super().__init__(
+            api_integration or PharmacyAPIIntegration(),
+            llm or ChatbotLLM(),
+            function_handler or FunctionHandler(),
+            lookup_timeout,
+            tool_followup,
+            fast_path,
+            turn_deadline,
+        )
+
+    def _execute_response(
+        self, llm_response: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> List[str]:
+        """
+        Record a response's usage and run every tool call it contains.
+
+        Calls to different functions run in parallel on the tool pool;
+        repeated calls to the same function run in order.
+
+        Args:
+            llm_response: Response from LLM including potential function calls
+            deadline: Turn deadline the tool calls must finish within
+
+        Returns:
+            One result string per tool call, in the order the model made them
+        """
+        function_calls = self._response_function_calls(llm_response)
+        results = _ToolCallResults(len(function_calls))
+        if len(function_calls) <= 1:
+            for indexes in self._tool_call_groups(function_calls):
+                self._run_tool_call_group(function_calls, indexes, results, deadline)
+            return self._settle_function_calls(function_calls, results, 0)
+
+        # Each worker gets a copy of this context so spans keep the state label
+        executor = _get_tool_executor()
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                self._run_tool_call_group, function_calls, indexes, results, deadline,
+            )
+            for indexes in self._tool_call_groups(function_calls)
+        ]
+        _, pending = wait(futures, timeout=time_left(deadline))
+        for future in futures:
+            if future not in pending:
+                future.result()
+        return self._settle_function_calls(function_calls, results, len(pending))
+
+    def _process_response(
+        self, llm_response: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Run the response's tool calls and build the reply to show the user.
+
+        Args:
+            llm_response: Response from LLM including potential function calls
+            deadline: Turn deadline; without time left the follow-up pass is
+                skipped and the raw tool results are used
+
+        Returns:
+            Final response to show to user
+        """
+        results = self._execute_response(llm_response, deadline)
+        followup = None
+        if results and self.tool_followup:
+            followup = self._followup_text(
+                self.llm.generate_followup(**self._followup_request(deadline))
+            )
+        return self._compose_reply(llm_response.get("content"), results, followup)
+
+    def _finish_stream(
+        self, llm_response: Dict[str, Any], streamed: bool, deadline: Optional[Deadline] = None
+    ) -> str:
+        """Run a streamed response's tool calls and return the text still owed."""
+        results = self._execute_response(llm_response, deadline)
+        followup = None
+        if results and self.tool_followup:
+            followup = self._followup_text(
+                self.llm.generate_followup(**self._followup_request(deadline))
+            )
+        return self._stream_tail(results, streamed, llm_response.get("content"), followup)
+
+    def _lookup_caller(
+        self, caller_phone: str, deadline: Optional[Deadline] = None
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Run the directory lookup with a deadline, preparing the greeting meanwhile.
+
+        Waits ``lookup_timeout`` from the start of the lookup, or less if the
+        turn deadline is nearer.
+
+        Returns:
+            Tuple of (pharmacy or None, whether the lookup is still pending)
+        """
+        lookup_deadline = Deadline(self.lookup_timeout)
+        lookup: Future = _get_lookup_executor().submit(
+            self.api_integration.get_pharmacy_by_phone, caller_phone, deadline=deadline
+        )
+        self._prepare_greeting()
+        try:
+            return lookup.result(timeout=time_left(deadline, lookup_deadline.remaining())), False
+        except FutureTimeoutError:
+            self._pending_lookup = lookup
+            return None, True
+
+    def _resolve_pending_lookup(self, deadline: Optional[Deadline] = None):
+        """Give a late lookup one more deadline and upgrade the context if it finished."""
+        if self._pending_lookup is None:
+            return
+        try:
+            pharmacy = self._pending_lookup.result(
+                timeout=time_left(deadline, self.lookup_timeout)
+            )
+        except FutureTimeoutError:
+            logger.warning("Directory lookup still pending - keeping generic context")
+            return
+        except Exception as e:
+            logger.error(f"Directory lookup failed: {e}")
+            pharmacy = None
+        self._apply_late_lookup(pharmacy)
+
+    def start_call(self, caller_phone: str) -> str:
+        """
+        Initialize a new call session with caller ID lookup.
+
+        Args:
+            caller_phone: The phone number of the incoming caller
+
+        Returns:
+            Initial greeting message
+        """
+        logger.info(f"Starting call from phone number: {caller_phone}")
+        self.caller_phone = caller_phone
+        deadline = self._new_deadline()
+
+        # Look up pharmacy in the system, without letting a slow directory hold up the greeting
+        pharmacy, lookup_pending = self._lookup_caller(caller_phone, deadline)
+        initial_message, context_prompt = self._begin_call(pharmacy, lookup_pending)
+
+        # Generate initial response
+        with conversation_state(self.conversation_state):
+            response = self.llm.generate_response(
+                initial_message,
+                self.prompt_builder.system_prompt,
+                self.function_handler.get_tools_for_state(self.conversation_state),
+                context_prompt=context_prompt,
+                deadline=deadline,
+            )
+
+            return self._process_response(response, deadline)
+
+    def continue_conversation(self, user_input: str) -> str:
+        """
+        Continue the conversation with user input.
+
+        Args:
+            user_input: What the user/caller said
+
+        Returns:
+            Bot response
+        """
+        logger.info(f"User input: {user_input}")
+        deadline = self._new_deadline()
+        self._resolve_pending_lookup(deadline)
+        reply = self._fast_path_reply(user_input)
+        if reply is not None:
+            return reply
+
+        # Generate response
+        with conversation_state(self.conversation_state):
+            response = self.llm.generate_response(
+                user_input,
+                self.prompt_builder.system_prompt,
+                self.function_handler.get_tools_for_state(self.conversation_state),
+                context_prompt=self._context_prompt(),
+                deadline=deadline,
+            )
+
+            return self._process_response(response, deadline)
+
+    def continue_conversation_stream(self, user_input: str) -> Iterator[str]:
+        """
+        Continue the conversation, yielding the reply as it is generated.
+
+        Args:
+            user_input: What the user/caller said
+
+        Yields:
+            Text fragments of the bot response, followed by any function result
+        """
+        logger.info(f"User input: {user_input}")
+        deadline = self._new_deadline()
+        self._resolve_pending_lookup(deadline)
+        reply = self._fast_path_reply(user_input)
+        if reply is not None:
+            yield reply
+            return
+
+        # Metric labels are passed explicitly: a context variable set here
+        # would leak into the consumer between yields
+        state = self.conversation_state
+        streamed = False
+        for event in self.llm.generate_response_stream(
+            user_input,
+            self.prompt_builder.system_prompt,
+            self.function_handler.get_tools_for_state(self.conversation_state),
+            context_prompt=self._context_prompt(),
+            deadline=deadline,
+        ):
+            if event["type"] == "delta":
+                streamed = True
+                yield event["content"]
+            else:
+                self._record_stream_timing(state)
+                with conversation_state(state):
+                    remaining = self._finish_stream(event["result"], streamed, deadline)
+                if remaining:
+                    yield remaining
+
+    def end_call(self) -> Dict[str, Any]:
+        """
+        End the call session and return summary.
+
+        Returns:
+            Dictionary with call summary and metrics
+        """
+        return self._summarize_call()
+
+
+class AsyncPharmacyChatbot(_BaseChatbot):
+    """
+    Asyncio counterpart of PharmacyChatbot.
+
+    Directory lookups and LLM requests are awaited, so one event loop can drive
+    many calls at once. Independent tool calls run on the tool pool and are
+    awaited; slow side effects belong on the background ActionExecutor.
+    """
+
+    def __init__(
+        self,
+        api_integration: Optional[AsyncPharmacyAPIIntegration] = None,
+        llm: Optional[AsyncChatbotLLM] = None,
+        function_handler: Optional[FunctionHandler] = None,
+        lookup_timeout: float = DIRECTORY_LOOKUP_TIMEOUT,
+        tool_followup: bool = TOOL_FOLLOWUP_PASS,
+        fast_path: Optional[FastPath] = None,
+        turn_deadline: float = TURN_DEADLINE,
+    ):
+        super().__init__(
+            api_integration or AsyncPharmacyAPIIntegration(),
+            llm or AsyncChatbotLLM(),
+            function_handler or FunctionHandler(),
+            lookup_timeout,
+            tool_followup,
+            fast_path,
+            turn_deadline,
+        )
+
+    async def _execute_response(
+        self, llm_response: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> List[str]:
+        """
+        Record a response's usage and run every tool call it contains.
+
+        Every call, even a lone one, runs on the tool pool and is awaited:
+        handlers may block on I/O, and other calls on the loop keep going
+        while they run.
+        """
+        function_calls = self._response_function_calls(llm_response)
+        results = _ToolCallResults(len(function_calls))
+        if not function_calls:
+            return self._settle_function_calls(function_calls, results, 0)
+
+        loop = asyncio.get_running_loop()
+        executor = _get_tool_executor()
+        tasks = [
+            loop.run_in_executor(
+                executor,
+                contextvars.copy_context().run,
+                self._run_tool_call_group, function_calls, indexes, results, deadline,
+            )
+            for indexes in self._tool_call_groups(function_calls)
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=time_left(deadline))
+        for task in done:
+            task.result()
+        for task in pending:
+            # Late groups finish in the background; collect their errors so none go unretrieved
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._settle_function_calls(function_calls, results, len(pending))
+
+    async def _process_response(
+        self, llm_response: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> str:
+        """Run the response's tool calls and build the reply to show the user."""
+        results = await self._execute_response(llm_response, deadline)
+        followup = None
+        if results and self.tool_followup:
+            followup = self._followup_text(
+                await self.llm.generate_followup(**self._followup_request(deadline))
+            )
+        return self._compose_reply(llm_response.get("content"), results, followup)
+
+    async def _finish_stream(
+        self, llm_response: Dict[str, Any], streamed: bool, deadline: Optional[Deadline] = None
+    ) -> str:
+        """Run a streamed response's tool calls and return the text still owed."""
+        results = await self._execute_response(llm_response, deadline)
+        followup = None
+        if results and self.tool_followup:
+            followup = self._followup_text(
+                await self.llm.generate_followup(**self._followup_request(deadline))
+            )
+        return self._stream_tail(results, streamed, llm_response.get("content"), followup)
+
+    async def _lookup_caller(
+        self, caller_phone: str, deadline: Optional[Deadline] = None
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Run the directory lookup with a deadline, preparing the greeting meanwhile.
+
+        Returns:
+            Tuple of (pharmacy or None, whether the lookup is still pending)
+        """
+        lookup_deadline = Deadline(self.lookup_timeout)
+        lookup = asyncio.ensure_future(
+            self.api_integration.get_pharmacy_by_phone(caller_phone, deadline=deadline)
+        )
+        # Let the lookup send its request before preparing the greeting
+        await asyncio.sleep(0)
+        self._prepare_greeting()
+        try:
+            pharmacy = await asyncio.wait_for(
+                asyncio.shield(lookup), timeout=time_left(deadline, lookup_deadline.remaining())
+            )
+            return pharmacy, False
+        except asyncio.TimeoutError:
+            self._pending_lookup = lookup
+            return None, True
+
+    async def _resolve_pending_lookup(self, deadline: Optional[Deadline] = None):
+        """Give a late lookup one more deadline and upgrade the context if it finished."""
+        if self._pending_lookup is None:
+            return
+        try:
+            pharmacy = await asyncio.wait_for(
+                asyncio.shield(self._pending_lookup),
+                timeout=time_left(deadline, self.lookup_timeout),
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Directory lookup still pending - keeping generic context")
+            return
+        except Exception as e:
+            logger.error(f"Directory lookup failed: {e}")
+            pharmacy = None
+        self._apply_late_lookup(pharmacy)
+
+    async def start_call(self, caller_phone: str) -> str:
+        """
+        Initialize a new call session with caller ID lookup.
+
+        Args:
+            caller_phone: The phone number of the incoming caller
+
+        Returns:
+            Initial greeting message
+        """
+        logger.info(f"Starting call from phone number: {caller_phone}")
+        self.caller_phone = caller_phone
+        deadline = self._new_deadline()
+
+        pharmacy, lookup_pending = await self._lookup_caller(caller_phone, deadline)
+        initial_message, context_prompt = self._begin_call(pharmacy, lookup_pending)
+
+        with conversation_state(self.conversation_state):
+            response = await self.llm.generate_response(
+                initial_message,
+                self.prompt_builder.system_prompt,
+                self.function_handler.get_tools_for_state(self.conversation_state),
+                context_prompt=context_prompt,
+                deadline=deadline,
+            )
+
+            return await self._process_response(response, deadline)
+
+    async def continue_conversation(self, user_input: str) -> str:
+        """
+        Continue the conversation with user input.
+
+        Args:
+            user_input: What the user/caller said
+
+        Returns:
+            Bot response
+        """
+        logger.info(f"User input: {user_input}")
+        deadline = self._new_deadline()
+        await self._resolve_pending_lookup(deadline)
+        reply = self._fast_path_reply(user_input)
+        if reply is not None:
+            return reply
+
+        with conversation_state(self.conversation_state):
+            response = await self.llm.generate_response(
+                user_input,
+                self.prompt_builder.system_prompt,
+                self.function_handler.get_tools_for_state(self.conversation_state),
+                context_prompt=self._context_prompt(),
+                deadline=deadline,
+            )
+
+            return await self._process_response(response, deadline)
+
+    async def continue_conversation_stream(self, user_input: str) -> AsyncIterator[str]:
+        """
+        Continue the conversation, yielding the reply as it is generated.
+
+        Args:
+            user_input: What the user/caller said
+
+        Yields:
+            Text fragments of the bot response, followed by any function result
+        """
+        logger.info(f"User input: {user_input}")
+        deadline = self._new_deadline()
+        await self._resolve_pending_lookup(deadline)
+        reply = self._fast_path_reply(user_input)
+        if reply is not None:
+            yield reply
+            return
+
+        state = self.conversation_state
+        streamed = False
+        async for event in self.llm.generate_response_stream(
+            user_input,
+            self.prompt_builder.system_prompt,
+            self.function_handler.get_tools_for_state(self.conversation_state),
+            context_prompt=self._context_prompt(),
+            deadline=deadline,
+        ):
+            if event["type"] == "delta":
+                streamed = True
+                yield event["content"]
+            else:
+                self._record_stream_timing(state)
+                with conversation_state(state):
+                    remaining = await self._finish_stream(event["result"], streamed, deadline)
+                if remaining:
+                    yield remaining
+
+    def end_call(self) -> Dict[str, Any]:
+        """
+        End the call session and return summary.
+
+        Returns:
+            Dictionary with call summary and metrics
+        """
+        return self._summarize_call()
+
+    async def aclose(self):
+        """Close the HTTP clients owned by this chatbot."""
+        await self.api_integration.aclose()
+        await self.llm.aclose()
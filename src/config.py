@@ -1,13 +1,137 @@
+"""
+Environment configuration.
+
+Settings are read once at import, which never fails: a malformed value
+falls back to its default and is reported, together with a missing
+OPENAI_API_KEY, by ``validate_config`` when the settings are first used
+(e.g. when the first OpenAI client is built).
+"""
 import os
+from typing import List
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Malformed settings seen while reading the environment
+_problems: List[str] = []
+_validated = False
+
+
+def _env_number(name: str, default: str, kind=float):
+    value = os.getenv(name, default)
+    try:
+        return kind(value)
+    except ValueError:
+        expected = "an integer" if kind is int else "a number"
+        _problems.append(f"{name} must be {expected}, got {value!r}")
+        return kind(default)
+
+
+def _env_int(name: str, default: str) -> int:
+    return _env_number(name, default, int)
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PHARMACY_API_URL = os.getenv(
     "PHARMACY_API_URL", "https://67e14fb758cc6bf785254550.mockapi.io/pharmacies"
 )
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is required")
+# Model hedged to when OPENAI_MODEL is slow or its circuit is open (unset: none)
+OPENAI_FALLBACK_MODEL = os.getenv("OPENAI_FALLBACK_MODEL") or None
+
+# Seconds a turn waits on one LLM request; percentile of recent primary latency
+# after which the request is hedged to the fallback (LLM_HEDGE_DELAY seconds
+# until enough latencies are known)
+LLM_TURN_BUDGET = _env_number("LLM_TURN_BUDGET", "8")
+LLM_HEDGE_PERCENTILE = _env_number("LLM_HEDGE_PERCENTILE", "95")
+LLM_HEDGE_DELAY = _env_number("LLM_HEDGE_DELAY", "2")
+
+# Consecutive transient failures that open a model's circuit, and seconds it stays open
+LLM_BREAKER_FAILURES = _env_int("LLM_BREAKER_FAILURES", "5")
+LLM_BREAKER_COOLDOWN = _env_number("LLM_BREAKER_COOLDOWN", "30")
+
+# Connection pool of each shared OpenAI client (see llm_clients.py): most open
+# connections, idle connections kept alive and for how many seconds, and whether
+# to multiplex requests over HTTP/2 (needs the h2 package)
+LLM_MAX_CONNECTIONS = _env_int("LLM_MAX_CONNECTIONS", "100")
+LLM_MAX_KEEPALIVE_CONNECTIONS = _env_int("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")
+LLM_KEEPALIVE_EXPIRY = _env_number("LLM_KEEPALIVE_EXPIRY", "30")
+LLM_HTTP2 = _env_bool("LLM_HTTP2", "false")
+
+# Seconds before the in-memory pharmacy directory is considered stale
+DIRECTORY_CACHE_TTL = _env_number("DIRECTORY_CACHE_TTL", "300")
+
+# Directory bulk loads: records per page and pages fetched in parallel
+DIRECTORY_PAGE_SIZE = _env_int("DIRECTORY_PAGE_SIZE", "500")
+DIRECTORY_PAGE_CONCURRENCY = _env_int("DIRECTORY_PAGE_CONCURRENCY", "4")
+
+# Country code assumed for national numbers, and whether caller matching may
+# fall back to one-digit-off numbers
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "1")
+PHONE_FUZZY_MATCH = _env_bool("PHONE_FUZZY_MATCH", "true")
+
+# Intents answered from templates without an LLM call (see intents.py); empty disables
+FAST_PATH_INTENTS = tuple(
+    intent.strip()
+    for intent in os.getenv("FAST_PATH_INTENTS", "thanks,goodbye,repeat").split(",")
+    if intent.strip()
+)
+
+# Seconds one turn (greeting or reply) may take end to end, shared by the
+# directory lookup, LLM requests and function calls (see deadline.py)
+TURN_DEADLINE = _env_number("TURN_DEADLINE", "10")
+
+# Seconds the greeting waits for the caller-ID lookup before greeting generically
+DIRECTORY_LOOKUP_TIMEOUT = _env_number("DIRECTORY_LOOKUP_TIMEOUT", "0.8")
+
+# Token budget for verbatim conversation history, and turns always kept verbatim
+HISTORY_TOKEN_BUDGET = _env_int("HISTORY_TOKEN_BUDGET", "1500")
+HISTORY_RECENT_TURNS = _env_int("HISTORY_RECENT_TURNS", "4")
+
+# Live call sessions kept per process, and seconds of inactivity before one is evicted
+MAX_CALL_SESSIONS = _env_int("MAX_CALL_SESSIONS", "5000")
+SESSION_IDLE_TIMEOUT = _env_number("SESSION_IDLE_TIMEOUT", "600")
+
+# SQLite file for leads, callbacks and emails (unset: keep them in memory only),
+# and how many of each a FunctionHandler keeps in memory
+RECORD_STORE_PATH = os.getenv("RECORD_STORE_PATH")
+RECORD_RETENTION = _env_int("RECORD_RETENTION", "100")
+
+# Worker threads delivering emails and callbacks in the background (0: deliver inline)
+ACTION_WORKERS = _env_int("ACTION_WORKERS", "0")
+
+# After tool calls, make a second LLM request for one reply covering all results
+TOOL_FOLLOWUP_PASS = _env_bool("TOOL_FOLLOWUP_PASS", "false")
+
+
+def validate_config(require_openai_key: bool = True):
+    """
+    Check the configuration; cheap to call again once it has passed.
+
+    Args:
+        require_openai_key: Whether OPENAI_API_KEY must be set
+
+    Raises:
+        ValueError: Listing every malformed setting and a missing API key
+    """
+    global _validated
+    if _validated:
+        return
+    problems = list(_problems)
+    if require_openai_key and not OPENAI_API_KEY:
+        problems.append("OPENAI_API_KEY environment variable is required")
+    if problems:
+        raise ValueError("; ".join(problems))
+    if require_openai_key:
+        _validated = True
+
+
+def require_openai_api_key() -> str:
+    """The configured OpenAI API key, validating the configuration on first use."""
+    validate_config()
+    return OPENAI_API_KEY
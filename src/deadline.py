@@ -0,0 +1,75 @@
+"""
+Per-turn time budget.
+
+The chatbot creates one Deadline for each ``start_call`` and
+``continue_conversation`` (TURN_DEADLINE seconds) and hands it to every stage
+of the turn: the directory lookup, the LLM request(s) and the function calls.
+Each stage caps its own timeouts with ``timeout()`` so the turn as a whole
+stays within what a caller on the phone will wait, and skips or defers work
+once the deadline has passed instead of overrunning it.
+"""
+import time
+from typing import Callable, Optional, Tuple, Union
+
+from .config import TURN_DEADLINE
+from .metrics import REGISTRY
+
+DEADLINE_EXCEEDED = REGISTRY.counter(
+    "chatbot_turn_deadline_exceeded_total",
+    "Turn stages skipped, cut short or deferred because the turn deadline passed",
+    ("stage",),
+)
+
+# Smallest timeout handed to an HTTP client; zero or negative values are rejected
+MIN_TIMEOUT = 0.001
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class Deadline:
+    """
+    Point in time by which a turn must have answered.
+
+    Args:
+        budget: Seconds from now
+        clock: Monotonic time source
+    """
+
+    def __init__(self, budget: float = TURN_DEADLINE, clock: Callable[[], float] = time.monotonic):
+        self.budget = budget
+        self._clock = clock
+        self.expires_at = clock() + budget
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(self.expires_at - self._clock(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, limit: Optional[float] = None) -> float:
+        """
+        Timeout for one stage: the time left, capped by the stage's own limit.
+
+        Returns:
+            Seconds, at least MIN_TIMEOUT so it can be handed to HTTP clients
+        """
+        remaining = self.remaining()
+        if limit is not None:
+            remaining = min(remaining, limit)
+        return max(remaining, MIN_TIMEOUT)
+
+    def cap(self, timeout: Optional[Timeout]) -> Timeout:
+        """Cap a requests-style timeout (seconds or a (connect, read) pair) to the time left."""
+        if isinstance(timeout, tuple):
+            return tuple(self.timeout(part) for part in timeout)
+        return self.timeout(timeout)
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s of {self.budget}s)"
+
+
+def time_left(deadline: Optional[Deadline], limit: Optional[float] = None) -> Optional[float]:
+    """``deadline.timeout(limit)``, or just ``limit`` when there is no deadline."""
+    return limit if deadline is None else deadline.timeout(limit)
@@ -1,9 +1,29 @@
+import json
 import logging
-from typing import Dict, Any
+import threading
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+from .actions import (
+    ActionExecutor,
+    ActionQueueFullError,
+    get_default_executor,
+    get_deferral_executor,
+    idempotency_key,
+)
+from .config import RECORD_RETENTION
+from .deadline import DEADLINE_EXCEEDED, Deadline
+from .metrics import span
+from .scoring import annotate_volumes
+from .storage import RecordStore, get_default_store
 
 logger = logging.getLogger(__name__)
 
+# Deadline of the turn whose function call is executing; read by _dispatch
+_turn_deadline: ContextVar[Optional[Deadline]] = ContextVar("turn_deadline", default=None)
+
 # Function definitions for LLM function calling
 AVAILABLE_FUNCTIONS = [
     {
@@ -63,40 +83,351 @@ AVAILABLE_FUNCTIONS = [
 ]
 
 
+# Tool payloads in the shape the chat-completions API expects, built once at import
+TOOL_PAYLOADS = {
+    func["name"]: {"type": "function", "function": func} for func in AVAILABLE_FUNCTIONS
+}
+ALL_TOOLS = list(TOOL_PAYLOADS.values())
+
+# Built-in tools each conversation state exposes; states not listed get every
+# tool. Each list is built once, so the tools sent stay byte-identical (and the
+# prompt-cache prefix stable) within a state; execute_function enforces them as
+# a backstop.
+STATE_TOOLS = {
+    "returning_customer": ("send_email", "schedule_callback"),
+    "new_customer": ("send_email", "schedule_callback", "collect_pharmacy_info"),
+    "known_customer": ("send_email", "schedule_callback"),
+}
+_STATE_TOOL_PAYLOADS = {
+    state: [TOOL_PAYLOADS[name] for name in names] for state, names in STATE_TOOLS.items()
+}
+
+
+def get_tools_for_state(state: Optional[str] = None) -> list:
+    """Get the prebuilt tool payloads a conversation state may call."""
+    return _STATE_TOOL_PAYLOADS.get(state, ALL_TOOLS)
+
+
+def tool_allowed(function_name: str, state: Optional[str] = None) -> bool:
+    """Whether a conversation state may call a tool. Registered tools are never restricted."""
+    if function_name not in TOOL_PAYLOADS or state not in STATE_TOOLS:
+        return True
+    return function_name in STATE_TOOLS[state]
+
+
+def _coerce_string(value: Any) -> Tuple[Optional[str], Optional[str]]:
+    """Coerce a scalar to a string. Returns (value, problem)."""
+    if isinstance(value, str):
+        return value.strip(), None
+    if isinstance(value, bool):
+        return ("true" if value else "false"), None
+    if isinstance(value, (int, float)):
+        return str(value), None
+    return None, f"must be a string, got {type(value).__name__}"
+
+
+def _coerce_number(value: Any) -> Tuple[Optional[float], Optional[str]]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value, None
+    if isinstance(value, str):
+        try:
+            return float(value.strip()), None
+        except ValueError:
+            pass
+    return None, f"must be a number, got {value!r}"
+
+
+def _coerce_integer(value: Any) -> Tuple[Optional[int], Optional[str]]:
+    number, problem = _coerce_number(value)
+    if problem is None and float(number).is_integer():
+        return int(number), None
+    return None, f"must be an integer, got {value!r}"
+
+
+def _coerce_boolean(value: Any) -> Tuple[Optional[bool], Optional[str]]:
+    if isinstance(value, bool):
+        return value, None
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true", None
+    return None, f"must be true or false, got {value!r}"
+
+
+_COERCERS = {
+    "string": _coerce_string,
+    "number": _coerce_number,
+    "integer": _coerce_integer,
+    "boolean": _coerce_boolean,
+}
+
+ArgumentValidator = Callable[[Any], Tuple[Dict[str, Any], List[str]]]
+
+
+def compile_validator(parameters: Dict[str, Any]) -> ArgumentValidator:
+    """
+    Build a validator for one function's JSON-schema ``parameters``.
+
+    The schema is walked once; the returned function checks required keys,
+    coerces scalar values to the declared type and drops unknown keys.
+
+    Returns:
+        Function mapping raw arguments to (clean arguments, problems)
+    """
+    required = tuple(parameters.get("required", ()))
+    fields = tuple(
+        (name, _COERCERS.get(spec.get("type"), lambda value: (value, None)))
+        for name, spec in parameters.get("properties", {}).items()
+    )
+
+    def validate(arguments: Any) -> Tuple[Dict[str, Any], List[str]]:
+        if not isinstance(arguments, dict):
+            return {}, ["arguments must be a JSON object"]
+        clean, problems, invalid = {}, [], set()
+        for name, coerce in fields:
+            value = arguments.get(name)
+            if value is None:
+                continue
+            value, problem = coerce(value)
+            if problem:
+                problems.append(f"'{name}' {problem}")
+                invalid.add(name)
+            elif value != "":
+                clean[name] = value
+        problems.extend(
+            f"missing required argument '{name}'"
+            for name in required
+            if name not in clean and name not in invalid
+        )
+        return clean, problems
+
+    return validate
+
+
+# One validator per tool, compiled once at import
+VALIDATORS: Dict[str, ArgumentValidator] = {
+    func["name"]: compile_validator(func["parameters"]) for func in AVAILABLE_FUNCTIONS
+}
+
+
+def validate_arguments(function_name: str, arguments: Any) -> Tuple[Dict[str, Any], List[str]]:
+    """Validate and clean a tool call's arguments against its schema."""
+    validator = VALIDATORS.get(function_name)
+    if validator is None:
+        return {}, [f"Unknown function: {function_name}"]
+    return validator(arguments)
+
+
+def function_error(function_name: str, error: str, problems: List[str]) -> str:
+    """
+    Structured error returned to the LLM in place of a function result.
+
+    The model sees what was wrong and can call the function again with
+    corrected arguments, instead of the whole turn failing.
+    """
+    payload = {"error": error, "function": function_name, "problems": problems}
+    if error == "invalid_arguments":
+        payload["message"] = f"Call {function_name} again with corrected arguments."
+    return json.dumps(payload)
+
+
+def is_function_error(function_result: str) -> bool:
+    """Whether a function result is a structured error from ``function_error``."""
+    return isinstance(function_result, str) and function_result.startswith('{"error": ')
+
+
 class FunctionHandler:
-    def __init__(self):
-        self.collected_leads = []
-        self.scheduled_callbacks = []
-        self.sent_emails = []
-
-    def execute_function(self, function_name: str, arguments: Dict[str, Any]) -> str:
-        """Execute a function call and return the result as a string."""
-        if function_name == "send_email":
-            return self._send_email(**arguments)
-        elif function_name == "schedule_callback":
-            return self._schedule_callback(**arguments)
-        elif function_name == "collect_pharmacy_info":
-            return self._collect_pharmacy_info(**arguments)
-        else:
-            return f"Unknown function: {function_name}"
+    """
+    Executes the LLM's function calls.
+
+    The most recent ``max_records`` of each record type are kept in memory for
+    the call summary; every record is also appended to ``store`` when one is
+    configured (by default the shared store at RECORD_STORE_PATH).
+
+    With an ``executor`` (by default the shared one when ACTION_WORKERS > 0),
+    emails and callbacks are acknowledged immediately and delivered in the
+    background; their delivery status is listed under ``actions`` in the
+    summary.
+    """
+
+    def __init__(
+        self,
+        store: Optional[RecordStore] = None,
+        max_records: int = RECORD_RETENTION,
+        executor: Optional[ActionExecutor] = None,
+    ):
+        self.store = store if store is not None else get_default_store()
+        self.executor = executor if executor is not None else get_default_executor()
+        # Idempotency scope, keys of every side effect run this call, and those queued
+        self._scope = uuid.uuid4().hex
+        self._action_keys = set()
+        self._action_ids = []
+        self.collected_leads = deque(maxlen=max_records)
+        self.scheduled_callbacks = deque(maxlen=max_records)
+        self.sent_emails = deque(maxlen=max_records)
+        self._counts = {"email": 0, "callback": 0, "lead": 0}
+        # Independent tool calls of one response may run on different threads
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, Callable[..., str]] = {
+            "send_email": self._send_email,
+            "schedule_callback": self._schedule_callback,
+            "collect_pharmacy_info": self._collect_pharmacy_info,
+        }
+        self._validators: Dict[str, ArgumentValidator] = dict(VALIDATORS)
+
+    def register(self, name: str, handler: Callable[..., str], parameters: Dict[str, Any]):
+        """Add (or replace) a function: its handler and the JSON schema of its arguments."""
+        self._handlers[name] = handler
+        self._validators[name] = compile_validator(parameters)
+
+    def _record(
+        self,
+        kind: str,
+        records: deque,
+        record: Dict[str, Any],
+        phone: Optional[str] = None,
+    ):
+        with self._lock:
+            records.append(record)
+            self._counts[kind] += 1
+        if self.store is not None:
+            self.store.append(kind, record, phone=phone)
+
+    def reset(self):
+        """Forget the in-memory records and counts; persisted records are kept."""
+        self.collected_leads.clear()
+        self.scheduled_callbacks.clear()
+        self.sent_emails.clear()
+        self._counts = {"email": 0, "callback": 0, "lead": 0}
+        self._scope = uuid.uuid4().hex
+        self._action_keys = set()
+        self._action_ids = []
+
+    def execute_function(
+        self,
+        function_name: str,
+        arguments: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        state: Optional[str] = None,
+    ) -> str:
+        """
+        Execute a function call and return the result as a string.
+
+        Arguments are checked against the function's schema first; unknown
+        functions, functions the conversation ``state`` may not call (see
+        STATE_TOOLS) and invalid arguments return a ``function_error`` string
+        instead of raising. Once ``deadline`` has passed, side effects that
+        would run inline are deferred to the background instead.
+        """
+        with span("function_execution", function=function_name):
+            handler = self._handlers.get(function_name)
+            if handler is None:
+                logger.warning(f"LLM called unknown function: {function_name}")
+                return function_error(
+                    function_name, "unknown_function", [f"Unknown function: {function_name}"]
+                )
+            if not tool_allowed(function_name, state):
+                logger.warning(f"LLM called {function_name} in state {state}")
+                return function_error(
+                    function_name,
+                    "not_available",
+                    [f"{function_name} is not available in the {state} state"],
+                )
+
+            arguments, problems = self._validators[function_name](arguments)
+            if problems:
+                logger.warning(f"Invalid arguments for {function_name}: {problems}")
+                return function_error(function_name, "invalid_arguments", problems)
+            token = _turn_deadline.set(deadline)
+            try:
+                return handler(**arguments)
+            except ActionQueueFullError as e:
+                # Overloaded workers: tell the model the action did not happen
+                return function_error(function_name, "action_rejected", [str(e)])
+            finally:
+                _turn_deadline.reset(token)
+
+    def _dispatch(
+        self,
+        kind: str,
+        function_name: str,
+        arguments: Dict[str, Any],
+        action,
+        record: Dict[str, Any],
+    ) -> Optional[str]:
+        """
+        Run a side effect inline, or hand it to the executor.
+
+        Without an executor the action runs inline, unless the turn deadline
+        has passed: then it goes to the deferral executor so the reply is not
+        delayed further.
+
+        Returns:
+            None if the action ran inline, otherwise its idempotency key
+        """
+        key = idempotency_key(self._scope, function_name, arguments)
+        with self._lock:
+            # Keys are kept for inline actions too, so a repeated call is not run twice
+            self._action_keys.add(key)
+        executor = self.executor
+        if executor is None:
+            deadline = _turn_deadline.get()
+            if deadline is None or not deadline.expired:
+                action()
+                return None
+            logger.info(f"Turn deadline passed, deferring {kind} action")
+            DEADLINE_EXCEEDED.inc(stage="action")
+            executor = get_deferral_executor()
+        record["action_id"] = key
+        try:
+            executor.submit(key, kind, action)
+        except ActionQueueFullError:
+            with self._lock:
+                # Not accepted, so a later identical call may try again
+                self._action_keys.discard(key)
+            raise
+        with self._lock:
+            self._action_ids.append(key)
+        return key
+
+    def _is_duplicate(self, function_name: str, arguments: Dict[str, Any]) -> bool:
+        """Whether this call already ran or queued the same action (the model repeated itself)."""
+        with self._lock:
+            return idempotency_key(self._scope, function_name, arguments) in self._action_keys
 
     def _send_email(self, email: str, subject: str, content: str) -> str:
-        """Mock function to send email."""
+        """Send a follow-up email, in the background when an executor is configured."""
+        arguments = {"email": email, "subject": subject, "content": content}
+        if self._is_duplicate("send_email", arguments):
+            return f"An email to {email} with subject '{subject}' is already on its way."
         email_record = {
             "to": email,
             "subject": subject,
             "content": content,
             "sent_at": datetime.now().isoformat(),
         }
-        self.sent_emails.append(email_record)
+        queued = self._dispatch(
+            "email",
+            "send_email",
+            arguments,
+            lambda: self._deliver_email(email_record),
+            email_record,
+        )
+        self._record("email", self.sent_emails, email_record)
 
-        logger.info(f"Email sent to {email} with subject: {subject}")
+        if queued:
+            return f"Email to {email} with subject '{subject}' has been queued for sending. The pharmacy will receive our information shortly."
         return f"Email successfully sent to {email} with subject '{subject}'. The pharmacy will receive our information shortly."
 
+    def _deliver_email(self, email_record: Dict[str, Any]):
+        """Mock email delivery."""
+        logger.info(f"Email sent to {email_record['to']} with subject: {email_record['subject']}")
+
     def _schedule_callback(
         self, phone: str, preferred_time: str, notes: str = ""
     ) -> str:
-        """Mock function to schedule a callback."""
+        """Schedule a callback, in the background when an executor is configured."""
+        arguments = {"phone": phone, "preferred_time": preferred_time, "notes": notes}
+        if self._is_duplicate("schedule_callback", arguments):
+            return f"A callback for {phone} at {preferred_time} is already scheduled."
         callback_record = {
             "phone": phone,
             "preferred_time": preferred_time,
@@ -104,11 +435,25 @@ class FunctionHandler:
             "scheduled_at": datetime.now().isoformat(),
             "status": "scheduled",
         }
-        self.scheduled_callbacks.append(callback_record)
+        queued = self._dispatch(
+            "callback",
+            "schedule_callback",
+            arguments,
+            lambda: self._book_callback(callback_record),
+            callback_record,
+        )
+        self._record("callback", self.scheduled_callbacks, callback_record, phone=phone)
 
-        logger.info(f"Callback scheduled for {phone} at {preferred_time}")
+        if queued:
+            return f"Callback for {phone} at {preferred_time} is being booked. Our sales team will reach out to discuss how Pharmesol can support your pharmacy's needs."
         return f"Callback scheduled for {phone} at {preferred_time}. Our sales team will reach out to discuss how Pharmesol can support your pharmacy's needs."
 
+    def _book_callback(self, callback_record: Dict[str, Any]):
+        """Mock CRM booking."""
+        logger.info(
+            f"Callback scheduled for {callback_record['phone']} at {callback_record['preferred_time']}"
+        )
+
     def _collect_pharmacy_info(
         self,
         name: str,
@@ -129,24 +474,44 @@ class FunctionHandler:
             "collected_at": datetime.now().isoformat(),
             "status": "new_lead",
         }
-        self.collected_leads.append(pharmacy_info)
+        annotate_volumes([pharmacy_info])
+        self._record("lead", self.collected_leads, pharmacy_info, phone=phone)
 
         logger.info(f"New pharmacy information collected for: {name}")
         return f"Information for {name} has been recorded in our system. We'll use this to better serve your pharmacy's needs."
 
-    def get_function_definitions(self) -> list:
-        """Get the function definitions for LLM function calling."""
-        return AVAILABLE_FUNCTIONS
+    def get_function_definitions(self, state: Optional[str] = None) -> list:
+        """Get the function definitions for LLM function calling, optionally scoped to a state."""
+        if state is None:
+            return AVAILABLE_FUNCTIONS
+        return [tool["function"] for tool in get_tools_for_state(state)]
+
+    def get_tools(self) -> list:
+        """Get every prebuilt tool payload."""
+        return ALL_TOOLS
+
+    def get_tools_for_state(self, state: Optional[str] = None) -> list:
+        """Get the prebuilt tool payloads a conversation state exposes."""
+        return get_tools_for_state(state)
+
+    def get_action_statuses(self) -> list:
+        """Delivery status of every background action queued during this call."""
+        if not self._action_ids:
+            return []
+        executor = self.executor or get_deferral_executor()
+        statuses = (executor.status(key) for key in self._action_ids)
+        return [status for status in statuses if status is not None]
 
     def get_summary(self) -> Dict[str, Any]:
         """Get a summary of all function executions."""
         return {
-            "emails_sent": len(self.sent_emails),
-            "callbacks_scheduled": len(self.scheduled_callbacks),
-            "leads_collected": len(self.collected_leads),
+            "emails_sent": self._counts["email"],
+            "callbacks_scheduled": self._counts["callback"],
+            "leads_collected": self._counts["lead"],
             "details": {
-                "emails": self.sent_emails,
-                "callbacks": self.scheduled_callbacks,
-                "leads": self.collected_leads,
+                "emails": list(self.sent_emails),
+                "callbacks": list(self.scheduled_callbacks),
+                "leads": list(self.collected_leads),
             },
+            "actions": self.get_action_statuses(),
         }
@@ -0,0 +1,163 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import HISTORY_RECENT_TURNS, HISTORY_TOKEN_BUDGET
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message framing cost the chat format adds on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+MAX_FUNCTION_RESULT_CHARS = 400
+MAX_SUMMARY_TOKENS = 300
+SUMMARY_LINE_CHARS = 160
+
+_SUMMARY_LABELS = {"user": "Caller", "assistant": "Assistant"}
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a string (about four characters per token)."""
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """Estimate the tokens a chat message costs in a request."""
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content"))
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        tokens += count_tokens(function.get("name")) + count_tokens(
+            function.get("arguments")
+        )
+    return tokens
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[: limit - 3].rstrip() + "..."
+
+
+def summarize_messages(summary: str, messages: List[Dict[str, Any]]) -> str:
+    """
+    Fold dropped messages into the running summary, one short line each.
+
+    This is the default, LLM-free summarizer: it keeps who said what in
+    truncated form and drops the oldest lines once the summary itself grows
+    past MAX_SUMMARY_TOKENS.
+    """
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        role = message.get("role")
+        content = message.get("content")
+        if role in ("function", "tool"):
+            label = f"Action {message.get('name', 'result')}"
+        else:
+            label = _SUMMARY_LABELS.get(role, role)
+        if content:
+            lines.append(f"- {label}: {_truncate(' '.join(content.split()), SUMMARY_LINE_CHARS)}")
+
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > MAX_SUMMARY_TOKENS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationHistory:
+    """
+    Token-budgeted conversation history.
+
+    The most recent ``keep_recent_turns`` turns (a turn starts at each user
+    message) are always kept verbatim. Once the verbatim messages exceed
+    ``max_tokens``, the oldest turns beyond that are folded into a running
+    summary that is sent as a single system message ahead of them. Function
+    results are trimmed when they are added.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = HISTORY_TOKEN_BUDGET,
+        keep_recent_turns: int = HISTORY_RECENT_TURNS,
+        max_function_result_chars: int = MAX_FUNCTION_RESULT_CHARS,
+        summarizer: Callable[[str, List[Dict[str, Any]]], str] = summarize_messages,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_function_result_chars = max_function_result_chars
+        self.summarizer = summarizer
+        self.messages: List[Dict[str, Any]] = []
+        self.summary = ""
+        self._tokens = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @property
+    def token_count(self) -> int:
+        """Estimated tokens of the verbatim messages plus the summary."""
+        return self._tokens + (
+            MESSAGE_OVERHEAD_TOKENS + count_tokens(self.summary) if self.summary else 0
+        )
+
+    def append(self, message: Dict[str, Any]):
+        """Add a message, trimming function results and compacting if over budget."""
+        if message.get("role") in ("function", "tool") and message.get("content"):
+            message = dict(
+                message,
+                content=_truncate(message["content"], self.max_function_result_chars),
+            )
+        self.messages.append(message)
+        self._tokens += count_message_tokens(message)
+        self.compact()
+
+    def compact(self):
+        """Summarize the oldest turns until the verbatim history fits the budget."""
+        if self._tokens <= self.max_tokens:
+            return
+
+        turn_starts = [
+            i for i, message in enumerate(self.messages) if message.get("role") == "user"
+        ]
+        if len(turn_starts) <= self.keep_recent_turns:
+            return
+
+        # Candidate cut points: turn boundaries up to the first protected turn
+        if self.keep_recent_turns:
+            protected_from = turn_starts[-self.keep_recent_turns]
+        else:
+            protected_from = len(self.messages)
+        boundaries = [i for i in turn_starts if 0 < i < protected_from]
+        boundaries.append(protected_from)
+
+        cut = 0
+        tokens = self._tokens
+        for boundary in boundaries:
+            if tokens <= self.max_tokens:
+                break
+            tokens -= sum(count_message_tokens(m) for m in self.messages[cut:boundary])
+            cut = boundary
+
+        if cut == 0:
+            return
+
+        dropped = self.messages[:cut]
+        self.messages = self.messages[cut:]
+        self._tokens = tokens
+        self.summary = self.summarizer(self.summary, dropped)
+        logger.debug(f"Summarized {len(dropped)} history messages")
+
+    def to_messages(self) -> List[Dict[str, Any]]:
+        """Messages to send: the running summary (if any) followed by the verbatim turns."""
+        if not self.summary:
+            return list(self.messages)
+        return [
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{self.summary}",
+            },
+            *self.messages,
+        ]
+
+    def clear(self):
+        self.messages = []
+        self.summary = ""
+        self._tokens = 0
@@ -0,0 +1,194 @@
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+
+from .deadline import Deadline
+
+if TYPE_CHECKING:
+    # requests is imported when the first session is built
+    import requests
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class PoolStats:
+    """Thread-safe counters for requests sent and TCP connections opened."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.retries = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        """Snapshot of the counters; a hit is a request that reused a connection."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "pool_hits": max(self.requests - self.new_connections, 0),
+                "pool_misses": self.new_connections,
+                "retries": self.retries,
+            }
+
+
+def _counting_pool_class(pool_cls, stats: PoolStats):
+    """Build a connection pool class whose connections report each TCP connect."""
+    base_conn_cls = pool_cls.ConnectionCls
+
+    def connect(self):
+        stats.record_connect()
+        return base_conn_cls.connect(self)
+
+    conn_cls = type(f"Counting{base_conn_cls.__name__}", (base_conn_cls,), {"connect": connect})
+    return type(f"Counting{pool_cls.__name__}", (pool_cls,), {"ConnectionCls": conn_cls})
+
+
+@lru_cache(maxsize=None)
+def _counting_adapter_class():
+    """HTTPAdapter subclass whose pools count connects, defined on first use."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _CountingHTTPAdapter(HTTPAdapter):
+        def __init__(self, stats: PoolStats, **kwargs):
+            # init_poolmanager runs inside HTTPAdapter.__init__, so set stats first
+            self._stats = stats
+            super().__init__(**kwargs)
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _counting_pool_class(HTTPConnectionPool, self._stats),
+                "https": _counting_pool_class(HTTPSConnectionPool, self._stats),
+            }
+
+    return _CountingHTTPAdapter
+
+
+class PooledSession:
+    """
+    Keep-alive HTTP session with bounded, jittered retries.
+
+    Connections are pooled per host (``pool_maxsize`` per pool). Connection
+    errors, timeouts and retryable status codes are retried up to
+    ``max_retries`` times, sleeping a random amount up to an exponentially
+    growing cap between attempts. Each attempt gets its own ``timeout``.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 1.0,
+        timeout: Union[float, Tuple[float, float]] = (3.05, 10),
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.stats = PoolStats()
+
+        import requests
+
+        adapter = _counting_adapter_class()(
+            self.stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0,  # retries are handled here, with jitter
+        )
+        self._session = requests.Session()
+        self._session.trust_env = False
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (starting at 0)."""
+        cap = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return random.uniform(0, cap)
+
+    def _is_last_attempt(self, attempt: int, deadline: Optional[Deadline]) -> bool:
+        return attempt == self.max_retries or (deadline is not None and deadline.expired)
+
+    def get(
+        self, url: str, timeout=None, deadline: Optional[Deadline] = None, **kwargs: Any
+    ) -> "requests.Response":
+        """
+        GET a URL, retrying transient failures.
+
+        Args:
+            url: URL to fetch
+            timeout: Per-attempt timeout, defaults to the session timeout
+            deadline: Turn deadline; attempts and backoff sleeps are capped to
+                the time it leaves, and no retry starts once it has passed
+            **kwargs: Passed through to ``requests.Session.get``
+
+        Returns:
+            The last response received. Retryable status codes are returned
+            as-is once retries run out, so callers can ``raise_for_status``.
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed
+                without a response
+        """
+        import requests
+
+        timeout = self.timeout if timeout is None else timeout
+
+        for attempt in range(self.max_retries + 1):
+            self.stats.record_request()
+            try:
+                attempt_timeout = timeout if deadline is None else deadline.cap(timeout)
+                response = self._session.get(url, timeout=attempt_timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if self._is_last_attempt(attempt, deadline):
+                    raise
+                logger.warning(f"GET {url} failed ({e}), retrying")
+            else:
+                if (
+                    response.status_code not in RETRYABLE_STATUS_CODES
+                    or self._is_last_attempt(attempt, deadline)
+                ):
+                    return response
+                logger.warning(f"GET {url} returned {response.status_code}, retrying")
+                response.close()
+
+            self.stats.record_retry()
+            delay = self._backoff(attempt)
+            time.sleep(delay if deadline is None else min(delay, deadline.remaining()))
+
+    def close(self):
+        """Close all pooled connections."""
+        self._session.close()
+
+
+_shared_session: Optional[PooledSession] = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session() -> PooledSession:
+    """Return the process-wide session, creating it on first use."""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = PooledSession()
+    return _shared_session
@@ -1,61 +1,468 @@
-import requests
-from typing import Optional, Dict, Any
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING, Optional, Dict, Any, AsyncIterator, Callable, Iterable, Iterator, List
+)
 import logging
-from .config import PHARMACY_API_URL
+from .config import (
+    PHARMACY_API_URL,
+    DIRECTORY_CACHE_TTL,
+    DIRECTORY_PAGE_CONCURRENCY,
+    DIRECTORY_PAGE_SIZE,
+    PHONE_FUZZY_MATCH,
+)
+from .deadline import DEADLINE_EXCEEDED, Deadline, time_left
+from .http_session import PooledSession, get_shared_session
+from .metrics import span
+from .phone import PhoneIndex, normalize_phone
+from .scoring import annotate_volumes
+
+if TYPE_CHECKING:
+    # httpx is only imported once an async integration is built
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+_DIGIT_GROUPS = re.compile(r"\d+")
+
+
+def _phone_filter(phone_number: Optional[str]) -> Optional[str]:
+    """
+    Server-side filter value for a phone lookup.
+
+    The directory's filters are substring matches on however the number was
+    stored, so only the last four digits are sent and the few candidates are
+    then matched locally. That only works when those digits form one
+    unbroken group; a record stored with them split by formatting (e.g.
+    "+1 (555) 000-1") is not found by the query, only by the full load.
+
+    Returns:
+        The last four digits, or None when the caller ID has no digits or its
+        last digit group is shorter than four (the filter could miss the
+        record); callers then fall back to the full directory
+    """
+    groups = _DIGIT_GROUPS.findall(phone_number or "")
+    if not groups or len(groups[-1]) < 4:
+        return None
+    return normalize_phone(phone_number)[-4:]
+
+
+def _iter_pages(
+    fetch_page: Callable[[int, int], List[Dict[str, Any]]],
+    page_size: int,
+    concurrency: int,
+) -> Iterator[Dict[str, Any]]:
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="directory-page"
+    ) as pool:
+        pending = deque()
+        next_page = 1
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    pending.append(pool.submit(fetch_page, next_page, page_size))
+                    next_page += 1
+                records = pending.popleft().result()
+                yield from records
+                # A short page is the last one; a long one means the server
+                # ignored pagination and already sent everything
+                if len(records) != page_size:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class PharmacyDirectoryCache:
+    """
+    In-memory phone index (see PhoneIndex) over the pharmacy directory.
+
+    The first lookup loads the directory synchronously, unless a ``query``
+    function (``query(phone_number, deadline)``) is given: then it asks the
+    server for that one number and loads the directory in the background. After that, lookups are plain dict hits;
+    once the data is older than ``ttl`` the stale index keeps being served
+    while a single background thread reloads it.
+
+    Without a ``loader`` the cache is only an index: the owner feeds it through
+    ``update`` and reads it through ``get`` (see AsyncPharmacyAPIIntegration).
+    """
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None,
+        ttl: float = DIRECTORY_CACHE_TTL,
+        query: Optional[Callable[[str, Optional[Deadline]], Optional[Dict[str, Any]]]] = None,
+        fuzzy: bool = PHONE_FUZZY_MATCH,
+    ):
+        self._loader = loader
+        self._query = query
+        self.ttl = ttl
+        self.fuzzy = fuzzy
+        self._index = PhoneIndex(fuzzy=fuzzy)
+        self._loaded_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        """Whether the index is missing or older than the configured TTL."""
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at >= self.ttl
+
+    def lookup(
+        self, phone_number: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a pharmacy by phone number.
+
+        Args:
+            phone_number: The caller's phone number, in any formatting
+            deadline: Turn deadline for the server query on a cold cache; once
+                it has passed the query is skipped and the caller is unknown
+
+        Returns:
+            Pharmacy dictionary if indexed, None otherwise
+        """
+        if not normalize_phone(phone_number):
+            # Blank or withheld caller ID: nothing to look up
+            return None
+        if not self.is_loaded and self._query is not None and _phone_filter(phone_number):
+            try:
+                if deadline is not None and deadline.expired:
+                    logger.warning("Turn deadline passed before the directory query")
+                    DEADLINE_EXCEEDED.inc(stage="lookup")
+                    return None
+                return self._query(phone_number, deadline)
+            except Exception as e:
+                logger.error(f"Directory query failed: {e}")
+                return None
+            finally:
+                self.refresh_async()
+        if not self.is_loaded:
+            # Concurrent first lookups share a single cold load
+            with self._load_lock:
+                if not self.is_loaded:
+                    self.refresh()
+        elif self.is_stale():
+            self.refresh_async()
+
+        return self.get(phone_number)
+
+    def get(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        """Read the current index without triggering any load."""
+        return self._index.get(phone_number)
+
+    def refresh(self) -> bool:
+        """
+        Reload the directory and swap in a new index.
+
+        Returns:
+            True if the index was rebuilt, False if the load failed (the
+            previous index, if any, is kept)
+        """
+        try:
+            # The loader may stream pages lazily; a failure midway keeps the old index
+            self.update(self._loader())
+        except Exception as e:
+            logger.error(f"Directory refresh failed: {e}")
+            return False
+        return True
+
+    def update(self, pharmacies: Iterable[Dict[str, Any]]):
+        """Rebuild the index from a freshly loaded pharmacy list (or page stream)."""
+        # Volume tiers are computed for the whole load at once, not per turn
+        index = PhoneIndex(annotate_volumes(pharmacies), fuzzy=self.fuzzy)
+
+        # Single reference swap, so readers never see a half-built index
+        self._index = index
+        self._loaded_at = time.monotonic()
+        logger.info(f"Pharmacy directory indexed: {len(index)} phone numbers")
+
+    def refresh_async(self) -> Optional[threading.Thread]:
+        """
+        Start a background refresh unless one is already running.
+
+        Returns:
+            The refresh thread, or None if a refresh was already in flight
+        """
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return None
+            thread = threading.Thread(
+                target=self.refresh, name="pharmacy-directory-refresh", daemon=True
+            )
+            self._refresh_thread = thread
+            thread.start()
+            return thread
+
+    def clear(self):
+        """Drop the index so the next lookup reloads it."""
+        self._index = PhoneIndex(fuzzy=self.fuzzy)
+        self._loaded_at = None
+
 
 class PharmacyAPIIntegration:
-    def __init__(self, api_url: str = PHARMACY_API_URL):
+    def __init__(
+        self,
+        api_url: str = PHARMACY_API_URL,
+        cache_ttl: float = DIRECTORY_CACHE_TTL,
+        session: Optional[PooledSession] = None,
+    ):
         self.api_url = api_url
+        self.session = session or get_shared_session()
+        self.directory = PharmacyDirectoryCache(
+            self.iter_pharmacies, ttl=cache_ttl, query=self.query_by_phone
+        )
+
+    def _fetch_page(self, page: int, limit: int) -> List[Dict[str, Any]]:
+        """Download one page of the directory, raising on any failure."""
+        response = self.session.get(self.api_url, params={"page": page, "limit": limit})
+        response.raise_for_status()
+        return response.json()
+
+    def iter_pharmacies(
+        self,
+        page_size: int = DIRECTORY_PAGE_SIZE,
+        concurrency: int = DIRECTORY_PAGE_CONCURRENCY,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the whole directory page by page.
+
+        Up to ``concurrency`` pages are fetched ahead in parallel, so at most
+        that many pages are held in memory. Iteration stops at the first short
+        page. Raises on any failed page.
+        """
+        yield from _iter_pages(self._fetch_page, page_size, concurrency)
+
+    def query_by_phone(
+        self, phone_number: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ask the server for the pharmacy with this phone number.
+
+        The server returns the few numbers sharing its last four digits;
+        they are matched locally like the cached directory. Timeouts and
+        retries are capped by ``deadline``. Returns None without a request
+        when the number gives no usable filter (see ``_phone_filter``).
+        """
+        phone_filter = _phone_filter(phone_number)
+        if phone_filter is None:
+            return None
+        response = self.session.get(
+            self.api_url, params={"phone": phone_filter}, deadline=deadline
+        )
+        if response.status_code == 404:
+            # mockapi answers a filter with no matches with 404
+            return None
+        response.raise_for_status()
+        candidates = annotate_volumes(response.json())
+        return PhoneIndex(candidates, fuzzy=self.directory.fuzzy).get(phone_number)
 
-    def get_pharmacy_by_phone(self, phone_number: str) -> Optional[Dict[str, Any]]:
+    def get_pharmacy_by_phone(
+        self, phone_number: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        Fetch pharmacy data by phone number from the API.
+        Look up a pharmacy by phone number in the cached directory.
 
         Args:
             phone_number: The pharmacy's phone number
+            deadline: Turn deadline, bounding a server query on a cold cache
 
         Returns:
             Dictionary containing pharmacy data if found, None otherwise
         """
-        try:
-            response = requests.get(self.api_url, timeout=10)
-            response.raise_for_status()
+        with span("directory_lookup"):
+            pharmacy = self.directory.lookup(phone_number, deadline)
 
-            pharmacies = response.json()
+        if pharmacy:
+            logger.info(f"Found pharmacy: {pharmacy.get('name', 'Unknown')}")
+        else:
+            logger.info(f"No pharmacy found with phone number: {phone_number}")
+        return pharmacy
 
-            # Search for pharmacy with matching phone number
-            for pharmacy in pharmacies:
-                if pharmacy.get("phone") == phone_number:
-                    logger.info(f"Found pharmacy: {pharmacy.get('name', 'Unknown')}")
-                    return pharmacy
+    def get_all_pharmacies(self) -> list:
+        """
+        Fetch all pharmacies from the API.
 
-            logger.info(f"No pharmacy found with phone number: {phone_number}")
-            return None
+        Returns:
+            List of pharmacy dictionaries
+        """
+        import requests
 
+        try:
+            return list(self.iter_pharmacies())
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
-            return None
+            return []
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
+            return []
+
+
+class AsyncPharmacyAPIIntegration:
+    """Asyncio counterpart of PharmacyAPIIntegration built on httpx.AsyncClient."""
+
+    def __init__(
+        self,
+        api_url: str = PHARMACY_API_URL,
+        cache_ttl: float = DIRECTORY_CACHE_TTL,
+        client: Optional["httpx.AsyncClient"] = None,
+    ):
+        import httpx
+
+        self.api_url = api_url
+        self.client = client or httpx.AsyncClient(
+            trust_env=False,
+            timeout=httpx.Timeout(10, connect=3.05),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+        )
+        self.directory = PharmacyDirectoryCache(ttl=cache_ttl)
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _fetch_page(self, page: int, limit: int) -> List[Dict[str, Any]]:
+        """Download one page of the directory, raising on any failure."""
+        response = await self.client.get(self.api_url, params={"page": page, "limit": limit})
+        response.raise_for_status()
+        return response.json()
+
+    async def iter_pharmacies(
+        self,
+        page_size: int = DIRECTORY_PAGE_SIZE,
+        concurrency: int = DIRECTORY_PAGE_CONCURRENCY,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the whole directory page by page; see PharmacyAPIIntegration.iter_pharmacies."""
+        pending = deque()
+        next_page = 1
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    pending.append(asyncio.ensure_future(self._fetch_page(next_page, page_size)))
+                    next_page += 1
+                records = await pending.popleft()
+                for record in records:
+                    yield record
+                if len(records) != page_size:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def query_by_phone(
+        self, phone_number: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Ask the server for the pharmacy with this phone number, within ``deadline``."""
+        phone_filter = _phone_filter(phone_number)
+        if phone_filter is None:
             return None
+        # Without a deadline the client's own timeout applies
+        options = {} if deadline is None else {"timeout": deadline.timeout()}
+        response = await self.client.get(
+            self.api_url, params={"phone": phone_filter}, **options
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        candidates = annotate_volumes(response.json())
+        return PhoneIndex(candidates, fuzzy=self.directory.fuzzy).get(phone_number)
 
-    def get_all_pharmacies(self) -> list:
+    async def refresh_directory(self) -> bool:
+        """
+        Reload the directory index.
+
+        Returns:
+            True if the index was rebuilt, False if the load failed
+        """
+        try:
+            pharmacies = [pharmacy async for pharmacy in self.iter_pharmacies()]
+        except Exception as e:
+            logger.error(f"Directory refresh failed: {e}")
+            return False
+
+        self.directory.update(pharmacies)
+        return True
+
+    def _refresh_in_background(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self.refresh_directory())
+
+    async def get_pharmacy_by_phone(
+        self, phone_number: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a pharmacy by phone number in the cached directory.
+
+        Args:
+            phone_number: The pharmacy's phone number
+            deadline: Turn deadline, bounding a server query on a cold cache
+
+        Returns:
+            Dictionary containing pharmacy data if found, None otherwise
+        """
+        with span("directory_lookup"):
+            if not normalize_phone(phone_number):
+                # Blank or withheld caller ID: nothing to look up
+                pharmacy = None
+            elif not self.directory.is_loaded and _phone_filter(phone_number) is None:
+                # No reliable server filter for this number: wait for the full load
+                self._refresh_in_background()
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(self._refresh_task), timeout=time_left(deadline)
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning("Directory load still running at the turn deadline")
+                pharmacy = self.directory.get(phone_number)
+            elif not self.directory.is_loaded:
+                # Cold cache: ask for this one number, load the rest in the background
+                try:
+                    if deadline is not None and deadline.expired:
+                        logger.warning("Turn deadline passed before the directory query")
+                        DEADLINE_EXCEEDED.inc(stage="lookup")
+                        pharmacy = None
+                    else:
+                        pharmacy = await self.query_by_phone(phone_number, deadline)
+                except Exception as e:
+                    logger.error(f"Directory query failed: {e}")
+                    pharmacy = None
+                self._refresh_in_background()
+            else:
+                if self.directory.is_stale():
+                    self._refresh_in_background()
+                pharmacy = self.directory.get(phone_number)
+
+        if pharmacy:
+            logger.info(f"Found pharmacy: {pharmacy.get('name', 'Unknown')}")
+        else:
+            logger.info(f"No pharmacy found with phone number: {phone_number}")
+        return pharmacy
+
+    async def get_all_pharmacies(self) -> list:
         """
         Fetch all pharmacies from the API.
 
         Returns:
             List of pharmacy dictionaries
         """
+        import httpx
+
         try:
-            response = requests.get(self.api_url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return [pharmacy async for pharmacy in self.iter_pharmacies()]
+        except httpx.HTTPError as e:
             logger.error(f"API request failed: {e}")
             return []
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
             return []
+
+    async def aclose(self):
+        """Close the underlying HTTP connections."""
+        await self.client.aclose()
@@ -0,0 +1,236 @@
+"""
+Rule-based fast path for trivial caller turns.
+
+Short acknowledgements ("thanks", "bye", "can you repeat that") and bare
+answers (just an email address or phone number) are recognised without the
+LLM: fixed phrases by a token automaton compiled once from INTENT_PHRASES,
+answers by the regexes in INTENT_PATTERNS. An utterance is only classified
+when all of it matches, so "thanks, and can you email me?" still goes to the
+model. FastPath answers the enabled intents from templates.
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .config import FAST_PATH_INTENTS
+from .metrics import REGISTRY
+
+EMAIL_PATTERN = r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+PHONE_PATTERN = r"\+?\(?\d[\d\s().-]{5,}\d"
+
+_EMAIL = re.compile(EMAIL_PATTERN)
+_PHONE = re.compile(PHONE_PATTERN)
+_TOKEN = re.compile(r"[a-z']+")
+
+# Whole-utterance phrases per intent; a turn may chain several ("ok thanks, bye")
+INTENT_PHRASES: Dict[str, Tuple[str, ...]] = {
+    "thanks": (
+        "thanks", "thank you", "thanks a lot", "thank you so much", "thank you very much",
+        "thanks so much", "many thanks", "much appreciated", "appreciate it",
+        "i appreciate it", "that's helpful", "that helps", "thanks for your help",
+        "thank you for your help",
+    ),
+    "goodbye": (
+        "bye", "goodbye", "bye bye", "good bye", "have a good day", "have a great day",
+        "have a nice day", "talk to you later", "talk soon", "see you", "take care",
+        "that's all", "that's all for now", "that's it", "that's it for now",
+        "that's everything", "nothing else", "no that's all", "no that's it",
+        "no thanks that's all",
+    ),
+    "repeat": (
+        "repeat that", "can you repeat that", "could you repeat that",
+        "can you say that again", "could you say that again", "say that again",
+        "sorry what", "what was that", "pardon", "pardon me", "come again",
+        "sorry i didn't catch that", "i didn't catch that", "one more time",
+        "sorry can you repeat that", "please repeat that",
+    ),
+}
+
+# Words that may precede or follow a phrase without changing its intent. On
+# their own they never match: a bare "ok" or "sure" may be answering a question.
+FILLER_WORDS = frozenset({
+    "oh", "um", "uh", "well", "so", "then", "please", "again", "sure",
+    "ok", "okay", "great", "perfect", "alright", "cool", "awesome", "wonderful",
+})
+
+# Intents whose precedence wins when a turn chains phrases ("thanks, bye" is a goodbye)
+INTENT_PRIORITY = ("goodbye", "repeat", "thanks")
+
+# Bare answers: the whole utterance is a slot value, with an optional lead-in
+_LEAD_IN = r"(?:(?:sure|yes|yeah|ok|okay)[,.!]?\s+)?(?:(?:it's|it is|my \w+ is|that's|use)\s+)?"
+INTENT_PATTERNS: Dict[str, "re.Pattern"] = {
+    "provide_email": re.compile(
+        rf"^\s*{_LEAD_IN}(?P<email>{EMAIL_PATTERN})\s*[.!]?\s*$", re.IGNORECASE
+    ),
+    "provide_phone": re.compile(
+        rf"^\s*{_LEAD_IN}(?P<phone>{PHONE_PATTERN})\s*[.!]?\s*$", re.IGNORECASE
+    ),
+}
+
+# Replies for the intents FastPath may answer; {last_reply} and slot names are filled in
+RESPONSE_TEMPLATES: Dict[str, str] = {
+    "thanks": "You're welcome! Is there anything else I can help you with?",
+    "goodbye": "Thank you for calling Pharmesol! Have a great day.",
+    "repeat": "Of course. {last_reply}",
+    "provide_email": (
+        "Thanks, I've noted {email} as your email address. "
+        "Would you like me to send our information there?"
+    ),
+    "provide_phone": (
+        "Thanks, I've noted {phone} as the best number to reach you. "
+        "Would you like us to schedule a callback?"
+    ),
+}
+
+
+FAST_PATH_TURNS = REGISTRY.counter(
+    "chatbot_fast_path_turns_total",
+    "Caller turns answered from a template without an LLM call",
+    ("intent", "state"),
+)
+
+
+class Intent(NamedTuple):
+    name: str
+    slots: Dict[str, str]
+
+
+def extract_slots(text: str) -> Dict[str, str]:
+    """Email address and phone number mentioned anywhere in a caller's message."""
+    slots = {}
+    email = _EMAIL.search(text or "")
+    if email:
+        slots["email"] = email.group()
+    phone = _PHONE.search(text or "")
+    if phone:
+        slots["phone"] = phone.group().strip()
+    return slots
+
+
+def _compile_phrases(phrases: Dict[str, Iterable[str]]) -> List[Dict]:
+    """
+    Compile phrases into a token automaton.
+
+    States are trie nodes stored in a list; each maps a token to the next
+    state index, and the ``None`` key holds the intent accepted there.
+    """
+    states: List[Dict] = [{}]
+    for intent, intent_phrases in phrases.items():
+        for phrase in intent_phrases:
+            state = 0
+            for token in _TOKEN.findall(phrase.lower()):
+                next_state = states[state].get(token)
+                if next_state is None:
+                    next_state = len(states)
+                    states.append({})
+                    states[state][token] = next_state
+                state = next_state
+            states[state][None] = intent
+    return states
+
+
+class IntentClassifier:
+    """
+    Classify a whole caller utterance, or return None if it needs the LLM.
+
+    Args:
+        phrases: Intent name to whole-utterance phrases
+        patterns: Intent name to regex with named groups for slots
+        priority: Order in which chained phrase intents win
+    """
+
+    def __init__(
+        self,
+        phrases: Dict[str, Iterable[str]] = INTENT_PHRASES,
+        patterns: Dict[str, "re.Pattern"] = INTENT_PATTERNS,
+        priority: Iterable[str] = INTENT_PRIORITY,
+    ):
+        self._states = _compile_phrases(phrases)
+        self.patterns = patterns
+        self.priority = {name: rank for rank, name in enumerate(priority)}
+
+    def _match_phrases(self, tokens: List[str]) -> Optional[str]:
+        """
+        Intent of a token sequence made only of phrases and filler words.
+
+        Walks the automaton from every reachable segment start (utterances
+        are a handful of tokens, so this stays tiny).
+        """
+        # reachable[i]: intents matched by tokens[:i] when a segment can start at i
+        reachable: Dict[int, frozenset] = {0: frozenset()}
+        for start in range(len(tokens) + 1):
+            if start not in reachable:
+                continue
+            seen = reachable[start]
+            if start < len(tokens) and tokens[start] in FILLER_WORDS:
+                reachable[start + 1] = reachable.get(start + 1, frozenset()) | seen
+            state = 0
+            for position in range(start, len(tokens)):
+                state = self._states[state].get(tokens[position])
+                if state is None:
+                    break
+                intent = self._states[state].get(None)
+                if intent is not None:
+                    end = position + 1
+                    reachable[end] = reachable.get(end, frozenset()) | seen | {intent}
+        intents = reachable.get(len(tokens))
+        if not intents:
+            return None
+        return min(intents, key=lambda name: self.priority.get(name, len(self.priority)))
+
+    def classify(self, text: str) -> Optional[Intent]:
+        text = (text or "").strip()
+        if not text or len(text) > 200:
+            return None
+        for name, pattern in self.patterns.items():
+            match = pattern.match(text)
+            if match:
+                return Intent(name, {k: v.strip() for k, v in match.groupdict().items() if v})
+
+        tokens = _TOKEN.findall(text.lower().replace("’", "'"))
+        # Digits or symbols mean there is more to the turn than an acknowledgement
+        if not tokens or re.search(r"[^\w\s',.!?’-]", text) or re.search(r"\d", text):
+            return None
+        intent = self._match_phrases(tokens)
+        return Intent(intent, {}) if intent else None
+
+
+class FastPath:
+    """
+    Answer enabled intents from templates.
+
+    Args:
+        intents: Intent names answered locally; others go to the LLM
+        templates: Reply template per intent
+        classifier: Classifier to use; defaults to one over the built-in rules
+    """
+
+    def __init__(
+        self,
+        intents: Iterable[str] = FAST_PATH_INTENTS,
+        templates: Dict[str, str] = RESPONSE_TEMPLATES,
+        classifier: Optional[IntentClassifier] = None,
+    ):
+        self.intents = frozenset(intents)
+        self.templates = templates
+        self.classifier = classifier or IntentClassifier()
+
+    def answer(self, user_input: str, last_reply: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        Reply to a turn without the LLM, if it is a trivial one.
+
+        Args:
+            user_input: What the caller said
+            last_reply: The bot's previous message, for "repeat that"
+
+        Returns:
+            Tuple of (intent, reply), or None if the turn needs generation
+        """
+        if not self.intents:
+            return None
+        intent = self.classifier.classify(user_input)
+        if intent is None or intent.name not in self.intents:
+            return None
+        template = self.templates.get(intent.name)
+        if template is None or ("{last_reply}" in template and not last_reply):
+            return None
+        return intent.name, template.format(last_reply=last_reply, **intent.slots)
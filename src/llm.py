@@ -1,26 +1,400 @@
-from openai import OpenAI
+import asyncio
 import json
-from typing import Dict, Any, Optional
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Any, Iterator, Optional
 import logging
-from .config import OPENAI_API_KEY, OPENAI_MODEL
+from .config import OPENAI_MODEL
+from .deadline import DEADLINE_EXCEEDED, Deadline
+from .history import ConversationHistory
+# create_*_client are re-exported for callers that build unshared clients
+from .llm_clients import CLIENT_REGISTRY, create_async_openai_client, create_openai_client
+from .llm_routing import DEFAULT_ROUTER, LLMUnavailableError, ModelRouter
+from .metrics import span
+from .prompts import DEFAULT_PROMPT_BUILDER
+from .usage import TokenUsage
+
+if TYPE_CHECKING:
+    # The SDK (and httpx under it) is imported when the first client is built
+    from openai import AsyncOpenAI, OpenAI
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_RESPONSE = {
+    "content": "I apologize, but I'm experiencing technical difficulties. Please try again later.",
+    "function_call": None,
+    "function_calls": [],
+    "usage": None,
+}
 
-class ChatbotLLM:
-    def __init__(self, api_key: str = OPENAI_API_KEY, model: str = OPENAI_MODEL):
-        import httpx
+# Follow-up pass result when the request fails: callers fall back to the raw tool results
+EMPTY_FOLLOWUP = {"content": None, "function_call": None, "function_calls": [], "usage": None}
 
-        # Create custom httpx client without proxies
-        http_client = httpx.Client(
-            trust_env=False  # This disables automatic proxy detection from environment
-        )
-        self.client = OpenAI(api_key=api_key, http_client=http_client)
+
+def get_default_openai_client() -> "OpenAI":
+    """Process-wide OpenAI client (and connection pool) shared by every ChatbotLLM."""
+    return CLIENT_REGISTRY.get()
+
+
+class _StreamAssembler:
+    """
+    Accumulates streamed chat-completion chunks.
+
+    Content deltas are returned as they arrive; tool-call fragments are merged
+    by their ``index`` until the stream ends.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.content_parts = []
+        self.tool_calls: Dict[int, Dict[str, Any]] = {}
+        self.usage = None
+
+    def add_chunk(self, chunk) -> Optional[str]:
+        """Merge one chunk and return its content delta, if any."""
+        # With include_usage the last chunk has no choices, only usage
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self.usage = usage
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta
+
+        for fragment in getattr(delta, "tool_calls", None) or []:
+            self._mark_first_token()
+            call = self.tool_calls.setdefault(
+                fragment.index, {"id": None, "name": "", "arguments": ""}
+            )
+            if fragment.id:
+                call["id"] = fragment.id
+            if fragment.function is not None:
+                if fragment.function.name:
+                    call["name"] += fragment.function.name
+                if fragment.function.arguments:
+                    call["arguments"] += fragment.function.arguments
+
+        if delta.content:
+            self._mark_first_token()
+            self.content_parts.append(delta.content)
+            return delta.content
+        return None
+
+    def _mark_first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def timing(self) -> Dict[str, Optional[float]]:
+        now = time.perf_counter()
+        return {
+            "time_to_first_token": (
+                self.first_token_at - self.started_at
+                if self.first_token_at is not None
+                else None
+            ),
+            "total": now - self.started_at,
+        }
+
+    def message(self):
+        """The assembled message, shaped like a non-streamed ``choices[0].message``."""
+        tool_calls = [
+            _AssembledToolCall(call["id"], call["name"], call["arguments"])
+            for _, call in sorted(self.tool_calls.items())
+        ]
+        return _AssembledMessage("".join(self.content_parts) or None, tool_calls)
+
+
+_STREAM_END = object()
+
+
+def _close_stream(stream):
+    """Close a stream's HTTP response; plain iterators have nothing to close."""
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+
+async def _aclose_stream(stream):
+    close = getattr(stream, "close", None)
+    if close is not None:
+        await close()
+
+
+class _StreamReader:
+    """
+    Reads a sync stream on its own thread, so waits are bounded by a deadline.
+
+    httpx's timeout applies to each socket read, and closing a response does
+    not interrupt a read already blocked on it. The reader thread owns the
+    stream; the consumer waits for each chunk only as long as the deadline
+    allows. A stopped stream is drained while the deadline lasts, so its
+    connection goes back to the pool, and then closed.
+    """
+
+    def __init__(self, stream, deadline: Deadline):
+        self._stream = stream
+        self._deadline = deadline
+        self._chunks: "queue.Queue" = queue.Queue()
+        self._stopped = threading.Event()
+        threading.Thread(target=self._read, name="llm-stream-reader", daemon=True).start()
+
+    def _read(self):
+        try:
+            for chunk in self._stream:
+                if not self._stopped.is_set():
+                    self._chunks.put(chunk)
+                elif self._deadline.expired:
+                    break
+            self._chunks.put(_STREAM_END)
+        except Exception as e:
+            self._chunks.put(e)
+        finally:
+            _close_stream(self._stream)
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            try:
+                item = self._chunks.get(timeout=self._deadline.remaining())
+            except queue.Empty:
+                raise TimeoutError(
+                    f"Stream did not finish within {self._deadline.budget:.2f}s"
+                ) from None
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        """Stop handing out chunks; the reader closes the stream when it is done."""
+        self._stopped.set()
+
+
+class _AssembledFunction:
+    def __init__(self, name: str, arguments: str):
+        self.name = name
+        self.arguments = arguments
+
+
+class _AssembledToolCall:
+    type = "function"
+
+    def __init__(self, id: Optional[str], name: str, arguments: str):
+        self.id = id
+        self.function = _AssembledFunction(name, arguments)
+
+
+class _AssembledMessage:
+    def __init__(self, content: Optional[str], tool_calls: list):
+        self.content = content
+        self.tool_calls = tool_calls
+
+
+class _BaseChatbotLLM:
+    """Conversation history and request/response shaping shared by the sync and async clients."""
+
+    def __init__(self, model: str = OPENAI_MODEL, router: Optional[ModelRouter] = None):
         self.model = model
-        self.conversation_history = []
+        # Budget, hedging and circuit breaking; shared by every conversation by default
+        self.router = router or DEFAULT_ROUTER
+        # Model that answered the most recent request (the fallback, if it was hedged to)
+        self.last_model = model
+        self.history = ConversationHistory()
+        # Latency of the most recent request: time to first token and total, in seconds
+        self.last_timing: Dict[str, Optional[float]] = {}
+        # Tokens used by the most recent request, if the provider reported them
+        self.last_usage: Optional[TokenUsage] = None
+
+    @property
+    def conversation_history(self) -> list:
+        """Messages kept verbatim; older turns live in ``history.summary``."""
+        return self.history.messages
+
+    def _build_request(
+        self,
+        prompt: Optional[str],
+        system_prompt: str,
+        functions: Optional[list] = None,
+        context_prompt: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        messages = DEFAULT_PROMPT_BUILDER.build_messages(
+            prompt,
+            self.history.to_messages(),
+            context_prompt=context_prompt,
+            system_prompt=system_prompt,
+        )
+
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 500,
+        }
+
+        if functions:
+            # Prebuilt tool payloads (see function_calls.TOOL_PAYLOADS) are sent as-is
+            kwargs["tools"] = [
+                func if func.get("type") == "function" else {"type": "function", "function": func}
+                for func in functions
+            ]
+            kwargs["tool_choice"] = "auto" if prompt is not None else "none"
+
+        return kwargs
+
+    def _budget(self, deadline: Optional[Deadline]) -> float:
+        """Seconds this request may take: the router's budget, capped by the turn deadline."""
+        if deadline is None:
+            return self.router.budget
+        if deadline.expired:
+            DEADLINE_EXCEEDED.inc(stage="llm")
+            raise LLMUnavailableError("Turn deadline passed before the LLM request")
+        return deadline.timeout(self.router.budget)
+
+    def _handle_response(
+        self, prompt: Optional[str], response, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return self._handle_message(
+            prompt, response.choices[0].message, getattr(response, "usage", None), model
+        )
+
+    def _handle_message(
+        self, prompt: Optional[str], message, usage=None, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        self.last_model = model or self.model
+        self.last_usage = TokenUsage.from_openai(self.last_model, usage)
+        result = {
+            "content": message.content,
+            "function_call": None,
+            "function_calls": [],
+            "usage": self.last_usage,
+        }
+
+        raw_calls = []
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            if tool_call.type != "function":
+                continue
+            with span("tool_args_decode", function=tool_call.function.name):
+                try:
+                    arguments = json.loads(tool_call.function.arguments or "{}")
+                except json.JSONDecodeError:
+                    # Left to the function handler to report back to the model
+                    logger.warning(f"Malformed arguments for {tool_call.function.name}")
+                    arguments = None
+            result["function_calls"].append(
+                {"id": tool_call.id, "name": tool_call.function.name, "arguments": arguments}
+            )
+            raw_calls.append(tool_call)
+        if result["function_calls"]:
+            # Kept for callers that only handle one call per turn
+            first = result["function_calls"][0]
+            result["function_call"] = {"name": first["name"], "arguments": first["arguments"]}
+
+        # Add to conversation history
+        if prompt is not None:
+            self.history.append({"role": "user", "content": prompt})
+        if raw_calls and all(tool_call.id for tool_call in raw_calls):
+            # Tool results are attached to these calls by id (see add_tool_result)
+            self.history.append(
+                {
+                    "role": "assistant",
+                    "content": result["content"],
+                    "tool_calls": [
+                        {
+                            "id": tool_call.id,
+                            "type": "function",
+                            "function": {
+                                "name": tool_call.function.name,
+                                "arguments": tool_call.function.arguments,
+                            },
+                        }
+                        for tool_call in raw_calls
+                    ],
+                }
+            )
+        elif result["content"]:
+            self.history.append(
+                {"role": "assistant", "content": result["content"]}
+            )
+
+        return result
+
+    def _record_partial_stream(self, prompt: Optional[str], assembler: _StreamAssembler):
+        """Keep the turn in the history when a stream that was already heard did not finish."""
+        heard = "".join(assembler.content_parts)
+        if not heard:
+            return
+        if prompt is not None:
+            self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "assistant", "content": heard})
+
+    @property
+    def last_reply(self) -> Optional[str]:
+        """Text of the most recent assistant message, if any."""
+        for message in reversed(self.history.messages):
+            if message.get("role") == "assistant" and message.get("content"):
+                return message["content"]
+        return None
+
+    def add_exchange(self, user_input: str, reply: str):
+        """Record a turn that was answered without a request (see intents.FastPath)."""
+        self.history.append({"role": "user", "content": user_input})
+        self.history.append({"role": "assistant", "content": reply})
+
+    def clear_history(self):
+        """Clear conversation history."""
+        self.history.clear()
+
+    def add_function_result(self, function_name: str, function_result: str):
+        """Add function execution result to conversation history."""
+        self.history.append(
+            {"role": "function", "name": function_name, "content": function_result}
+        )
+
+    def add_tool_result(self, tool_call_id: str, function_result: str):
+        """Add the result of one tool call, answered by its ``tool_call_id``."""
+        self.history.append(
+            {"role": "tool", "tool_call_id": tool_call_id, "content": function_result}
+        )
+
+
+class ChatbotLLM(_BaseChatbotLLM):
+    """
+    Chat-completions client for one conversation.
+
+    Without an explicit ``client`` it uses the shared client for its API key
+    (see llm_clients.CLIENT_REGISTRY), built on the first request rather than
+    here.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = OPENAI_MODEL,
+        client: Optional["OpenAI"] = None,
+        router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(model, router)
+        self._api_key = api_key
+        self._client = client
+
+    @property
+    def client(self) -> "OpenAI":
+        if self._client is None:
+            self._client = CLIENT_REGISTRY.get(self._api_key)
+        return self._client
+
+    @client.setter
+    def client(self, client: "OpenAI"):
+        self._client = client
 
     def generate_response(
-        self, prompt: str, system_prompt: str, functions: Optional[list] = None
+        self,
+        prompt: str,
+        system_prompt: str,
+        functions: Optional[list] = None,
+        context_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
         """
         Generate a response using OpenAI's API with optional function calling.
@@ -29,66 +403,309 @@ class ChatbotLLM:
             prompt: User input or conversation context
             system_prompt: System instructions for the LLM
             functions: Optional list of function definitions for function calling
+            context_prompt: Optional per-call context, sent after the history
+            deadline: Turn deadline; the request gets only the time left
 
         Returns:
-            Dictionary containing response and any function calls
+            Dictionary containing response, any function calls and token usage
         """
         try:
-            messages = [
-                {"role": "system", "content": system_prompt},
-                *self.conversation_history,
-                {"role": "user", "content": prompt},
-            ]
+            kwargs = self._build_request(
+                prompt, system_prompt, functions, context_prompt
+            )
+            self.last_usage = None
+            started_at = time.perf_counter()
+            with span("llm_request"):
+                response, model = self.router.complete(
+                    self.client, kwargs, self._budget(deadline)
+                )
+            elapsed = time.perf_counter() - started_at
+            self.last_timing = {"time_to_first_token": elapsed, "total": elapsed}
+            return self._handle_response(prompt, response, model)
+
+        except Exception as e:
+            logger.error(f"LLM generation failed: {e}")
+            return dict(FALLBACK_RESPONSE)
+
+    def generate_response_stream(
+        self,
+        prompt: str,
+        system_prompt: str,
+        functions: Optional[list] = None,
+        context_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a response, yielding content as soon as the model produces it.
+
+        Args:
+            prompt: User input or conversation context
+            system_prompt: System instructions for the LLM
+            functions: Optional list of function definitions for function calling
+            context_prompt: Optional per-call context, sent after the history
+            deadline: Turn deadline; the request gets only the time left
+
+        Yields:
+            ``{"type": "delta", "content": str}`` for each content fragment, then
+            one ``{"type": "result", "result": dict}`` with the same shape
+            ``generate_response`` returns
+
+        The whole stream, not just each read, must finish within the
+        request budget. If it fails or is abandoned after content was
+        yielded, the user turn and the text already heard stay in the history.
+        """
+        try:
+            kwargs = self._build_request(
+                prompt, system_prompt, functions, context_prompt
+            )
+            self.last_timing = {}
+            self.last_usage = None
+            budget = self._budget(deadline)
+            # Streams are not hedged: the caller may already be hearing the first words
+            model = self.router.pick_models(self.model)[0]
+            assembler = _StreamAssembler()
+            reader = None
+            finished = False
+            try:
+                try:
+                    stream = self.client.chat.completions.create(
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        timeout=budget,
+                        **dict(kwargs, model=model),
+                    )
+                    # httpx's timeout applies per read; the reader bounds the whole response
+                    reader = _StreamReader(stream, Deadline(budget))
+                    for chunk in reader:
+                        content = assembler.add_chunk(chunk)
+                        if content:
+                            yield {"type": "delta", "content": content}
+                except Exception as e:
+                    self.router.record_failure(model, e)
+                    raise
+                except BaseException:
+                    # The caller stopped consuming the stream: free a half-open probe
+                    self.router.breaker(model).release_probe()
+                    raise
+                self.router.breaker(model).record_success()
+
+                self.last_timing = assembler.timing()
+                result = self._handle_message(prompt, assembler.message(), assembler.usage, model)
+                finished = True
+            finally:
+                if reader is not None:
+                    reader.close()
+                if not finished:
+                    self._record_partial_stream(prompt, assembler)
+
+        except Exception as e:
+            logger.error(f"LLM generation failed: {e}")
+            result = dict(FALLBACK_RESPONSE)
+
+        yield {"type": "result", "result": result}
+
+    def generate_followup(
+        self,
+        system_prompt: str,
+        functions: Optional[list] = None,
+        context_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ask for one reply covering the tool results already in the history.
+
+        No new user message is sent and no further tool calls are allowed.
+
+        Returns:
+            Same shape as ``generate_response``; ``content`` is None on failure
+        """
+        try:
+            kwargs = self._build_request(None, system_prompt, functions, context_prompt)
+            self.last_usage = None
+            with span("llm_followup"):
+                response, model = self.router.complete(
+                    self.client, kwargs, self._budget(deadline)
+                )
+            return self._handle_response(None, response, model)
+
+        except Exception as e:
+            logger.error(f"LLM follow-up failed: {e}")
+            return dict(EMPTY_FOLLOWUP)
+
+
+class AsyncChatbotLLM(_BaseChatbotLLM):
+    """
+    Asyncio counterpart of ChatbotLLM built on AsyncOpenAI.
+
+    Without an explicit ``client`` it uses the shared async client of the
+    running event loop, so it must first be used inside that loop.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = OPENAI_MODEL,
+        client: Optional["AsyncOpenAI"] = None,
+        router: Optional[ModelRouter] = None,
+    ):
+        super().__init__(model, router)
+        self._api_key = api_key
+        self._client = client
+        self._owns_client = client is not None
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            self._client = CLIENT_REGISTRY.get_async(self._api_key)
+        return self._client
 
-            kwargs = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 500,
-            }
-
-            if functions:
-                kwargs["tools"] = [
-                    {"type": "function", "function": func} for func in functions
-                ]
-                kwargs["tool_choice"] = "auto"
-
-            response = self.client.chat.completions.create(**kwargs)
-
-            message = response.choices[0].message
-
-            result = {"content": message.content, "function_call": None}
-
-            if hasattr(message, "tool_calls") and message.tool_calls:
-                tool_call = message.tool_calls[0]  # Take first tool call
-                if tool_call.type == "function":
-                    result["function_call"] = {
-                        "name": tool_call.function.name,
-                        "arguments": json.loads(tool_call.function.arguments),
-                    }
-
-            # Add to conversation history
-            self.conversation_history.append({"role": "user", "content": prompt})
-            if result["content"]:
-                self.conversation_history.append(
-                    {"role": "assistant", "content": result["content"]}
+    @client.setter
+    def client(self, client: "AsyncOpenAI"):
+        self._client = client
+        self._owns_client = True
+
+    async def generate_response(
+        self,
+        prompt: str,
+        system_prompt: str,
+        functions: Optional[list] = None,
+        context_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate a response without blocking the event loop.
+
+        Args:
+            prompt: User input or conversation context
+            system_prompt: System instructions for the LLM
+            functions: Optional list of function definitions for function calling
+            context_prompt: Optional per-call context, sent after the history
+            deadline: Turn deadline; the request gets only the time left
+
+        Returns:
+            Dictionary containing response, any function calls and token usage
+        """
+        try:
+            kwargs = self._build_request(
+                prompt, system_prompt, functions, context_prompt
+            )
+            self.last_usage = None
+            started_at = time.perf_counter()
+            with span("llm_request"):
+                response, model = await self.router.acomplete(
+                    self.client, kwargs, self._budget(deadline)
                 )
+            elapsed = time.perf_counter() - started_at
+            self.last_timing = {"time_to_first_token": elapsed, "total": elapsed}
+            return self._handle_response(prompt, response, model)
+
+        except Exception as e:
+            logger.error(f"LLM generation failed: {e}")
+            return dict(FALLBACK_RESPONSE)
 
-            return result
+    async def generate_response_stream(
+        self,
+        prompt: str,
+        system_prompt: str,
+        functions: Optional[list] = None,
+        context_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response without blocking the event loop.
+
+        Yields the same events, under the same total budget, as
+        ``ChatbotLLM.generate_response_stream``.
+        """
+        try:
+            kwargs = self._build_request(
+                prompt, system_prompt, functions, context_prompt
+            )
+            self.last_timing = {}
+            self.last_usage = None
+            budget = self._budget(deadline)
+            model = self.router.pick_models(self.model)[0]
+            assembler = _StreamAssembler()
+            # httpx's timeout applies per read; each wait here gets only the time left
+            stream_deadline = Deadline(budget)
+            stream = None
+            finished = False
+            try:
+                try:
+                    stream = await self.client.chat.completions.create(
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        timeout=budget,
+                        **dict(kwargs, model=model),
+                    )
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(
+                                chunks.__anext__(), stream_deadline.remaining()
+                            )
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise TimeoutError(
+                                f"Stream did not finish within {budget:.2f}s"
+                            ) from None
+                        content = assembler.add_chunk(chunk)
+                        if content:
+                            yield {"type": "delta", "content": content}
+                except Exception as e:
+                    self.router.record_failure(model, e)
+                    raise
+                except BaseException:
+                    # The caller stopped consuming the stream: free a half-open probe
+                    self.router.breaker(model).release_probe()
+                    raise
+                self.router.breaker(model).record_success()
+
+                self.last_timing = assembler.timing()
+                result = self._handle_message(prompt, assembler.message(), assembler.usage, model)
+                finished = True
+            finally:
+                if stream is not None:
+                    await _aclose_stream(stream)
+                if not finished:
+                    self._record_partial_stream(prompt, assembler)
 
         except Exception as e:
             logger.error(f"LLM generation failed: {e}")
-            return {
-                "content": "I apologize, but I'm experiencing technical difficulties. Please try again later.",
-                "function_call": None,
-            }
+            result = dict(FALLBACK_RESPONSE)
 
-    def clear_history(self):
-        """Clear conversation history."""
-        self.conversation_history = []
+        yield {"type": "result", "result": result}
 
-    def add_function_result(self, function_name: str, function_result: str):
-        """Add function execution result to conversation history."""
-        self.conversation_history.append(
-            {"role": "function", "name": function_name, "content": function_result}
-        )
+    async def generate_followup(
+        self,
+        system_prompt: str,
+        functions: Optional[list] = None,
+        context_prompt: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ask for one reply covering the tool results already in the history.
+
+        No new user message is sent and no further tool calls are allowed.
+
+        Returns:
+            Same shape as ``generate_response``; ``content`` is None on failure
+        """
+        try:
+            kwargs = self._build_request(None, system_prompt, functions, context_prompt)
+            self.last_usage = None
+            with span("llm_followup"):
+                response, model = await self.router.acomplete(
+                    self.client, kwargs, self._budget(deadline)
+                )
+            return self._handle_response(None, response, model)
+
+        except Exception as e:
+            logger.error(f"LLM follow-up failed: {e}")
+            return dict(EMPTY_FOLLOWUP)
+
+    async def aclose(self):
+        """Close a client handed to this instance; the shared one stays open for other calls."""
+        if self._owns_client:
+            await self._client.close()
@@ -0,0 +1,367 @@
+"""
+Process-wide OpenAI client registry.
+
+Every ChatbotLLM without its own client shares one OpenAI client per
+(API key, base URL), so a worker keeps a single keep-alive connection pool
+(and its TLS sessions) to the provider instead of one pool per call. Async
+clients are shared the same way within each event loop. Pools are bounded by
+LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE_CONNECTIONS, may multiplex requests
+over HTTP/2 (LLM_HTTP2, needs the optional ``h2`` package), and report
+utilization through ``CLIENT_REGISTRY.stats()``.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .config import (
+    LLM_HTTP2,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    require_openai_api_key,
+)
+
+if TYPE_CHECKING:
+    # The SDK (and httpx under it) is imported when the first client is built
+    from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+
+class LLMPoolStats:
+    """Thread-safe request, connection and concurrency counters for one client's pool."""
+
+    def __init__(self, max_connections: int = LLM_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._seen = weakref.WeakSet()
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.open_connections = 0
+        self.idle_connections = 0
+
+    def record_start(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def record_finish(self, failed: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += failed
+
+    def observe_pool(self, connections: List[Any]):
+        """Count connections not seen before and note how many are open and idle."""
+        with self._lock:
+            for connection in connections:
+                if connection not in self._seen:
+                    self._seen.add(connection)
+                    self.new_connections += 1
+            self.open_connections = len(connections)
+            self.idle_connections = sum(1 for connection in connections if connection.is_idle())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Snapshot of the counters; a hit is a request that reused a connection.
+
+        ``in_flight`` includes requests queued for a free connection, so a
+        utilization above 1 means the pool is saturated.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "pool_hits": max(self.requests - self.new_connections, 0),
+                "pool_misses": self.new_connections,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "open_connections": self.open_connections,
+                "idle_connections": self.idle_connections,
+                "max_connections": self.max_connections,
+                "utilization": self.in_flight / self.max_connections,
+                "peak_utilization": self.peak_in_flight / self.max_connections,
+            }
+
+
+@lru_cache(maxsize=None)
+def _http2_available() -> bool:
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 was requested but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def _pool_connections(transport) -> List[Any]:
+    pool = getattr(transport, "_pool", None)
+    return list(getattr(pool, "connections", None) or [])
+
+
+@lru_cache(maxsize=None)
+def _counting_transport_classes():
+    """httpx transports that report to LLMPoolStats, defined on first use."""
+    import httpx
+
+    class _TrackedStream(httpx.SyncByteStream):
+        """Response body that marks its request finished once closed."""
+
+        def __init__(self, stream, stats: LLMPoolStats):
+            self._stream = stream
+            self._stats = stats
+            self._open = True
+
+        def __iter__(self):
+            yield from self._stream
+
+        def close(self):
+            try:
+                self._stream.close()
+            finally:
+                if self._open:
+                    self._open = False
+                    self._stats.record_finish()
+
+    class _AsyncTrackedStream(httpx.AsyncByteStream):
+        def __init__(self, stream, stats: LLMPoolStats):
+            self._stream = stream
+            self._stats = stats
+            self._open = True
+
+        async def __aiter__(self):
+            async for chunk in self._stream:
+                yield chunk
+
+        async def aclose(self):
+            try:
+                await self._stream.aclose()
+            finally:
+                if self._open:
+                    self._open = False
+                    self._stats.record_finish()
+
+    class _CountingTransport(httpx.BaseTransport):
+        def __init__(self, stats: LLMPoolStats, **kwargs):
+            self._transport = httpx.HTTPTransport(**kwargs)
+            self._stats = stats
+
+        def handle_request(self, request):
+            self._stats.record_start()
+            try:
+                response = self._transport.handle_request(request)
+            except Exception:
+                self._stats.record_finish(failed=True)
+                raise
+            self._stats.observe_pool(_pool_connections(self._transport))
+            # Streamed bodies keep the connection busy until they are closed
+            response.stream = _TrackedStream(response.stream, self._stats)
+            return response
+
+        def close(self):
+            self._transport.close()
+
+    class _AsyncCountingTransport(httpx.AsyncBaseTransport):
+        def __init__(self, stats: LLMPoolStats, **kwargs):
+            self._transport = httpx.AsyncHTTPTransport(**kwargs)
+            self._stats = stats
+
+        async def handle_async_request(self, request):
+            self._stats.record_start()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except Exception:
+                self._stats.record_finish(failed=True)
+                raise
+            self._stats.observe_pool(_pool_connections(self._transport))
+            response.stream = _AsyncTrackedStream(response.stream, self._stats)
+            return response
+
+        async def aclose(self):
+            await self._transport.aclose()
+
+    return _CountingTransport, _AsyncCountingTransport
+
+
+def _transport_kwargs(
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    http2: bool,
+) -> Dict[str, Any]:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        "http2": http2 and _http2_available(),
+    }
+
+
+def create_openai_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    max_connections: int = LLM_MAX_CONNECTIONS,
+    max_keepalive_connections: int = LLM_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+    http2: bool = LLM_HTTP2,
+    stats: Optional[LLMPoolStats] = None,
+) -> "OpenAI":
+    """
+    Build an OpenAI client with a bounded keep-alive connection pool.
+
+    Prefer ``CLIENT_REGISTRY.get``, which builds one client per endpoint and
+    shares it; use this for a client that must not be shared.
+
+    Args:
+        api_key: API key; defaults to the configured OPENAI_API_KEY, which is
+            validated here
+        base_url: Endpoint, for OpenAI-compatible servers
+        max_connections: Most connections open at once
+        max_keepalive_connections: Most idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+        http2: Multiplex requests over HTTP/2 (needs ``h2``)
+        stats: Counters the pool reports to; a new set if not given
+    """
+    import httpx
+    from openai import OpenAI
+
+    api_key = api_key or require_openai_api_key()
+    transport_cls, _ = _counting_transport_classes()
+    transport = transport_cls(
+        stats or LLMPoolStats(max_connections),
+        **_transport_kwargs(max_connections, max_keepalive_connections, keepalive_expiry, http2),
+    )
+    # trust_env=False disables automatic proxy detection from the environment
+    http_client = httpx.Client(transport=transport, trust_env=False)
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+
+
+def create_async_openai_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    max_connections: int = LLM_MAX_CONNECTIONS,
+    max_keepalive_connections: int = LLM_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+    http2: bool = LLM_HTTP2,
+    stats: Optional[LLMPoolStats] = None,
+) -> "AsyncOpenAI":
+    """AsyncOpenAI counterpart of create_openai_client."""
+    import httpx
+    from openai import AsyncOpenAI
+
+    api_key = api_key or require_openai_api_key()
+    _, transport_cls = _counting_transport_classes()
+    transport = transport_cls(
+        stats or LLMPoolStats(max_connections),
+        **_transport_kwargs(max_connections, max_keepalive_connections, keepalive_expiry, http2),
+    )
+    http_client = httpx.AsyncClient(transport=transport, trust_env=False)
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+
+
+class LLMClientRegistry:
+    """
+    Shared OpenAI clients, one per (API key, base URL).
+
+    Sync clients are shared across threads. Async clients are bound to the
+    event loop they first ran on, so each running loop gets its own, dropped
+    with the loop.
+
+    Args:
+        max_connections: Most connections each client's pool opens at once
+        max_keepalive_connections: Most idle connections each pool keeps
+        keepalive_expiry: Seconds an idle connection is kept
+        http2: Multiplex requests over HTTP/2 (needs ``h2``)
+    """
+
+    def __init__(
+        self,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_keepalive_connections: int = LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+        http2: bool = LLM_HTTP2,
+    ):
+        self.settings = {
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+            "http2": http2,
+        }
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[Optional[str], Optional[str]], Tuple["OpenAI", LLMPoolStats]] = {}
+        self._async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def get(self, api_key: Optional[str] = None, base_url: Optional[str] = None) -> "OpenAI":
+        """Shared client for an endpoint (the configured key and default URL if not given)."""
+        key = (api_key, base_url)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                stats = LLMPoolStats(self.settings["max_connections"])
+                client = create_openai_client(api_key, base_url, stats=stats, **self.settings)
+                entry = self._clients[key] = (client, stats)
+        return entry[0]
+
+    def get_async(
+        self, api_key: Optional[str] = None, base_url: Optional[str] = None
+    ) -> "AsyncOpenAI":
+        """Shared async client for an endpoint on the running event loop."""
+        loop = asyncio.get_running_loop()
+        key = (api_key, base_url)
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            entry = clients.get(key)
+            if entry is None:
+                stats = LLMPoolStats(self.settings["max_connections"])
+                client = create_async_openai_client(api_key, base_url, stats=stats, **self.settings)
+                entry = clients[key] = (client, stats)
+        return entry[0]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Pool stats of every shared client, labelled by base URL and flavour."""
+        with self._lock:
+            entries = [(key, "sync", stats) for key, (_, stats) in self._clients.items()]
+            for clients in self._async_clients.values():
+                entries.extend((key, "async", stats) for key, (_, stats) in clients.items())
+        return [
+            {"base_url": base_url or "default", "client": flavour, **stats.as_dict()}
+            for (_, base_url), flavour, stats in entries
+        ]
+
+    def close(self):
+        """Close the shared sync clients; the next ``get`` builds new ones."""
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        for client, _ in entries:
+            client.close()
+
+    async def aclose(self):
+        """Close the shared async clients of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.pop(loop, {})
+        for client, _ in clients.values():
+            await client.close()
+
+    def _forget_after_fork(self):
+        # Connections cannot be shared with a forked child; it builds its own clients
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._async_clients = weakref.WeakKeyDictionary()
+
+
+CLIENT_REGISTRY = LLMClientRegistry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=CLIENT_REGISTRY._forget_after_fork)
@@ -0,0 +1,398 @@
+"""
+Latency budget, hedging and circuit breaking for LLM requests.
+
+ModelRouter sends each chat-completions request to the primary model within
+a latency budget. When a fallback model is configured and the primary has
+not answered by its recent p95 (LLM_HEDGE_PERCENTILE) latency, the same
+request is also sent to the fallback and the first good answer wins. Each
+model has a CircuitBreaker: after LLM_BREAKER_FAILURES transient failures in
+a row (timeouts, connection errors, 429 and 5xx) the model gets no traffic
+for LLM_BREAKER_COOLDOWN seconds, then one probe request decides whether it
+is healthy again.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import (
+    LLM_BREAKER_COOLDOWN,
+    LLM_BREAKER_FAILURES,
+    LLM_HEDGE_DELAY,
+    LLM_HEDGE_PERCENTILE,
+    LLM_MAX_CONNECTIONS,
+    LLM_TURN_BUDGET,
+    OPENAI_FALLBACK_MODEL,
+)
+from .metrics import REGISTRY, percentile
+
+logger = logging.getLogger(__name__)
+
+LLM_ROUTING = REGISTRY.counter(
+    "chatbot_llm_routing_total",
+    "LLM routing events; event is hedge, hedge_won, failure, breaker_open or budget_exceeded",
+    ("model", "event"),
+)
+
+# Successful requests needed before the hedge delay follows observed latency
+MIN_LATENCY_SAMPLES = 20
+
+
+class LLMUnavailableError(Exception):
+    """No model could answer: every breaker is open or the budget ran out."""
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether an error says the model is unhealthy, rather than the request being bad."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    # Connection errors and timeouts raised by the SDK
+    from openai import APIConnectionError
+
+    return isinstance(error, APIConnectionError)
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one model.
+
+    Args:
+        failure_threshold: Consecutive transient failures that open it
+        cooldown: Seconds it stays open before letting one probe through
+        clock: Monotonic time source
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = LLM_BREAKER_FAILURES,
+        cooldown: float = LLM_BREAKER_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; in half-open state, only one at a time."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def release_probe(self):
+        """Free the half-open probe slot of a request that ended without an outcome (cancelled)."""
+        with self._lock:
+            self._probing = False
+
+
+class LatencyTracker:
+    """Sliding window of recent successful request latencies."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return percentile(samples, pct)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Threads that carry sync requests, so a turn can stop waiting at its budget."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=LLM_MAX_CONNECTIONS * 2, thread_name_prefix="llm-request"
+            )
+    return _executor
+
+
+def _reset_executor_after_fork():
+    # A forked worker (e.g. the replay process pool) inherits the executor but not its threads
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executor_after_fork)
+
+
+class ModelRouter:
+    """
+    Send chat-completions requests within a budget, hedging to a fallback model.
+
+    Breakers and latency windows live on the router, so every conversation
+    sharing it (DEFAULT_ROUTER by default) shares what it learns about each
+    model's health.
+
+    Args:
+        fallback_model: Model hedged to, and used while the primary's breaker
+            is open; None disables both
+        budget: Seconds a request may take before the turn gives up on it
+        hedge_percentile: Primary latency percentile after which to hedge
+        hedge_delay: Hedge delay used until enough latencies are known
+        failure_threshold: Consecutive transient failures that open a breaker
+        cooldown: Seconds a breaker stays open
+    """
+
+    def __init__(
+        self,
+        fallback_model: Optional[str] = OPENAI_FALLBACK_MODEL,
+        budget: float = LLM_TURN_BUDGET,
+        hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+        hedge_delay: float = LLM_HEDGE_DELAY,
+        failure_threshold: int = LLM_BREAKER_FAILURES,
+        cooldown: float = LLM_BREAKER_COOLDOWN,
+    ):
+        self.fallback_model = fallback_model
+        self.budget = budget
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(self.failure_threshold, self.cooldown)
+            return self._breakers[model]
+
+    def latency(self, model: str) -> LatencyTracker:
+        with self._lock:
+            if model not in self._latency:
+                self._latency[model] = LatencyTracker()
+            return self._latency[model]
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait on ``model`` before hedging: its recent percentile latency."""
+        observed = self.latency(model).percentile(self.hedge_percentile)
+        return self.default_hedge_delay if observed is None else observed
+
+    def pick_models(self, primary: str) -> List[str]:
+        """
+        Models a request may go to: the first is sent now, the second is the hedge target.
+
+        Raises:
+            LLMUnavailableError: If the primary's circuit is open and no
+                fallback can take its place
+        """
+        fallback = self.fallback_model if self.fallback_model != primary else None
+        if self.breaker(primary).allow():
+            return [primary, fallback] if fallback else [primary]
+        LLM_ROUTING.inc(model=primary, event="breaker_open")
+        if fallback and self.breaker(fallback).allow():
+            return [fallback]
+        raise LLMUnavailableError(f"Circuit open for {primary}, no fallback available")
+
+    def _start_hedge(self, model: str) -> bool:
+        """Whether a hedged request may go to ``model`` now."""
+        if not self.breaker(model).allow():
+            return False
+        logger.info(f"Hedging LLM request to {model}")
+        LLM_ROUTING.inc(model=model, event="hedge")
+        return True
+
+    def record_success(self, model: str, seconds: float):
+        self.breaker(model).record_success()
+        self.latency(model).record(seconds)
+
+    def record_failure(self, model: str, error: BaseException):
+        if is_transient_error(error):
+            LLM_ROUTING.inc(model=model, event="failure")
+            self.breaker(model).record_failure()
+        else:
+            # The model answered; the request itself was at fault
+            self.breaker(model).record_success()
+
+    def _request(self, client, request: Dict[str, Any], model: str, deadline: float):
+        started = time.monotonic()
+        try:
+            response = client.chat.completions.create(
+                **dict(request, model=model), timeout=max(deadline - started, 0.001)
+            )
+        except Exception as e:
+            self.record_failure(model, e)
+            raise
+        self.record_success(model, time.monotonic() - started)
+        return response
+
+    def complete(
+        self, client, request: Dict[str, Any], budget: Optional[float] = None
+    ) -> Tuple[Any, str]:
+        """
+        Run a non-streamed request, hedging to the fallback model if the primary is slow.
+
+        Args:
+            client: OpenAI client
+            request: ``chat.completions.create`` arguments; ``model`` is the primary
+            budget: Seconds allowed, if not the router's budget
+
+        Returns:
+            Tuple of (completion, model that produced it)
+
+        Raises:
+            LLMUnavailableError: If no model answered within the budget
+            Exception: The last model's error, if every model failed
+        """
+        deadline = time.monotonic() + (self.budget if budget is None else budget)
+        models = self.pick_models(request["model"])
+        hedge_at = time.monotonic() + self.hedge_delay(models[0])
+        executor = _get_executor()
+
+        launched = {executor.submit(self._request, client, request, models[0], deadline): models[0]}
+        pending = set(launched)
+        error: Optional[BaseException] = None
+        while True:
+            now = time.monotonic()
+            hedging = len(launched) < len(models)
+            wait_until = min(deadline, hedge_at) if hedging else deadline
+            done, pending = wait(
+                pending, timeout=max(wait_until - now, 0), return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    model = launched[future]
+                    if model != models[0]:
+                        LLM_ROUTING.inc(model=model, event="hedge_won")
+                    return future.result(), model
+                error = future.exception()
+
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if hedging and (not pending or now >= hedge_at):
+                model = models[len(launched)]
+                if self._start_hedge(model):
+                    future = executor.submit(self._request, client, request, model, deadline)
+                    launched[future] = model
+                    pending.add(future)
+                else:
+                    models = models[:len(launched)]
+            if not pending:
+                raise error
+
+        # Requests still running finish in the background and update the breakers
+        LLM_ROUTING.inc(model=models[0], event="budget_exceeded")
+        raise LLMUnavailableError("No LLM response within the budget")
+
+    async def _arequest(self, client, request: Dict[str, Any], model: str, deadline: float):
+        started = time.monotonic()
+        try:
+            response = await client.chat.completions.create(
+                **dict(request, model=model), timeout=max(deadline - started, 0.001)
+            )
+        except Exception as e:
+            self.record_failure(model, e)
+            raise
+        except BaseException:
+            # Cancelled (e.g. the hedge loser): no outcome, but a half-open probe must not stay taken
+            self.breaker(model).release_probe()
+            raise
+        self.record_success(model, time.monotonic() - started)
+        return response
+
+    async def acomplete(
+        self, client, request: Dict[str, Any], budget: Optional[float] = None
+    ) -> Tuple[Any, str]:
+        """Asyncio counterpart of ``complete``; the losing request is cancelled."""
+        deadline = time.monotonic() + (self.budget if budget is None else budget)
+        models = self.pick_models(request["model"])
+        hedge_at = time.monotonic() + self.hedge_delay(models[0])
+
+        launched = {
+            asyncio.ensure_future(self._arequest(client, request, models[0], deadline)): models[0]
+        }
+        pending = set(launched)
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                now = time.monotonic()
+                hedging = len(launched) < len(models)
+                wait_until = min(deadline, hedge_at) if hedging else deadline
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(wait_until - now, 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        model = launched[task]
+                        if model != models[0]:
+                            LLM_ROUTING.inc(model=model, event="hedge_won")
+                        return task.result(), model
+                    error = task.exception()
+
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                if hedging and (not pending or now >= hedge_at):
+                    model = models[len(launched)]
+                    if self._start_hedge(model):
+                        task = asyncio.ensure_future(
+                            self._arequest(client, request, model, deadline)
+                        )
+                        launched[task] = model
+                        pending.add(task)
+                    else:
+                        models = models[:len(launched)]
+                if not pending:
+                    raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+        LLM_ROUTING.inc(model=models[0], event="budget_exceeded")
+        raise LLMUnavailableError("No LLM response within the budget")
+
+
+DEFAULT_ROUTER = ModelRouter()
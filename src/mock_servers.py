@@ -0,0 +1,381 @@
+"""
+Local stand-ins for the OpenAI chat-completions API and the pharmacy directory.
+
+Both servers run in a background thread on 127.0.0.1 and are meant for load
+tests and offline development, not for production use.
+"""
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger(__name__)
+
+MOCK_REPLIES = [
+    "Thanks for calling Pharmesol! How can I help your pharmacy today?",
+    "That's great to hear. Pharmesol helps high-volume pharmacies keep up with demand.",
+    "Happy to help with that. Could you tell me a bit more about your current volume?",
+    "Absolutely, I can send more information or schedule a callback - whichever works best.",
+]
+
+_MOCK_ARGUMENT_VALUES = {
+    "email": "owner@example-pharmacy.com",
+    "phone": "555-010-0000",
+    "preferred_time": "tomorrow at 2pm",
+    "name": "Example Pharmacy",
+    "city": "Springfield",
+    "rx_volume": "800 per day",
+}
+
+
+class LatencyModel:
+    """
+    Samples response delays, in seconds.
+
+    Spec strings: ``fixed:0.2``, ``uniform:0.1,0.5``, ``normal:0.3,0.05`` or
+    ``lognormal:MU,SIGMA`` (parameters of the underlying normal, in log-seconds).
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value]
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values or [0.0]
+        self._random = random.Random()
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return self._random.uniform(self.values[0], self.values[1])
+        if self.kind == "normal":
+            return max(0.0, self._random.gauss(self.values[0], self.values[1]))
+        return self._random.lognormvariate(self.values[0], self.values[1])
+
+
+def mock_arguments(function: Dict[str, Any]) -> Dict[str, str]:
+    """Fill every required parameter of a tool schema with a plausible value."""
+    parameters = function.get("parameters", {})
+    return {
+        name: _MOCK_ARGUMENT_VALUES.get(name, f"mock {name}")
+        for name in parameters.get("required", [])
+    }
+
+
+def _usage(request: Dict[str, Any], content: Optional[str]) -> Dict[str, int]:
+    """Rough token counts (four characters per token) for a mock reply."""
+    prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(content or "") // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+
+def chat_completion(
+    request: Dict[str, Any], content: Optional[str], tool_calls: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Non-streamed chat-completion body answering ``request``."""
+    message: Dict[str, Any] = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }
+        ],
+        "usage": _usage(request, content),
+    }
+
+
+class _BackgroundServer:
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), self.handler_class)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+        logger.info(f"{type(self).__name__} listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def owner(self):
+        return self.server.owner
+
+    def _send_json(self, status: int, payload: Any = None, body: Optional[bytes] = None):
+        body = body if body is not None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class _ChatCompletionsHandler(_JSONHandler):
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.owner.record_request(request)
+
+        content, tool_call = self.owner.plan_reply(request)
+        if request.get("stream"):
+            self._stream(request, content, tool_call)
+        else:
+            time.sleep(self.owner.latency.sample())
+            self._send_json(200, self.owner.completion(request, content, tool_call))
+
+    def _stream(self, request, content: Optional[str], tool_call: Optional[Dict[str, Any]]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        # Chunked like the real API, so the connection is reused once the stream is read
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        time.sleep(self.owner.first_token_latency.sample())
+        for chunk in self.owner.stream_chunks(request, content, tool_call):
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            time.sleep(self.owner.inter_token_latency.sample())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        """Write one chunked-encoding frame; an empty one ends the body."""
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockOpenAIServer(_BackgroundServer):
+    """
+    Minimal chat-completions endpoint.
+
+    Replies are picked from MOCK_REPLIES. With probability ``tool_call_rate``
+    (and when the request offers tools) the reply also calls one of the
+    offered tools with schema-valid arguments. Non-streamed replies wait one
+    ``latency`` sample; streamed replies wait ``first_token_latency`` and then
+    ``inter_token_latency`` between word-sized chunks.
+    """
+
+    handler_class = _ChatCompletionsHandler
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        first_token_latency: Optional[str] = None,
+        inter_token_latency: str = "fixed:0",
+        tool_call_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(host, port)
+        self.latency = LatencyModel(latency)
+        self.first_token_latency = LatencyModel(first_token_latency or latency)
+        self.inter_token_latency = LatencyModel(inter_token_latency)
+        self.tool_call_rate = tool_call_rate
+        self.requests: List[Dict[str, Any]] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def api_base_url(self) -> str:
+        """Base URL to hand to the OpenAI client."""
+        return f"{self.base_url}/v1"
+
+    def record_request(self, request: Dict[str, Any]):
+        with self._lock:
+            self.requests.append(request)
+
+    def plan_reply(self, request: Dict[str, Any]):
+        with self._lock:
+            content = self._random.choice(MOCK_REPLIES)
+            tools = request.get("tools") or []
+            if request.get("tool_choice") == "none":
+                tools = []
+            if tools and self._random.random() < self.tool_call_rate:
+                function = self._random.choice(tools)["function"]
+                tool_call = {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {
+                        "name": function["name"],
+                        "arguments": json.dumps(mock_arguments(function)),
+                    },
+                }
+                return content, tool_call
+        return content, None
+
+    def completion(self, request, content, tool_call) -> Dict[str, Any]:
+        return chat_completion(request, content, [tool_call] if tool_call else [])
+
+    def stream_chunks(self, request, content, tool_call):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        base = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+        }
+
+        def chunk(delta, finish_reason=None):
+            return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+        yield chunk({"role": "assistant", "content": ""})
+        words = (content or "").split(" ")
+        for i, word in enumerate(words):
+            yield chunk({"content": word if i == 0 else f" {word}"})
+        if tool_call:
+            arguments = tool_call["function"]["arguments"]
+            middle = len(arguments) // 2
+            yield chunk({"tool_calls": [{
+                "index": 0,
+                "id": tool_call["id"],
+                "type": "function",
+                "function": {"name": tool_call["function"]["name"], "arguments": arguments[:middle]},
+            }]})
+            yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": arguments[middle:]}}]})
+        yield chunk({}, "tool_calls" if tool_call else "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            yield dict(base, choices=[], usage=_usage(request, content))
+
+
+def generate_pharmacies(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Build a synthetic pharmacy directory with unique phone numbers."""
+    rng = random.Random(seed)
+    cities = ["New York", "Chicago", "Houston", "Phoenix", "Denver", "Seattle", "Miami"]
+    units = ["per day", "per week", "per month"]
+    return [
+        {
+            "id": str(i + 1),
+            "name": f"Pharmacy {i + 1}",
+            "phone": f"555-{i // 10000:03d}-{i % 10000:04d}",
+            "email": f"contact{i + 1}@pharmacy.example",
+            "city": rng.choice(cities),
+            "address": f"{rng.randint(1, 9999)} Main St",
+            "rx_volume": f"{rng.randint(1, 60) * 50} {rng.choice(units)}",
+        }
+        for i in range(count)
+    ]
+
+
+class _DirectoryHandler(_JSONHandler):
+    def do_GET(self):
+        owner = self.owner
+        time.sleep(owner.latency.sample())
+        path, _, query = self.path.partition("?")
+        if path.rstrip("/") != owner.path:
+            self._send_json(404, {"error": "not found"})
+            return
+        params = dict(parse_qsl(query))
+        owner.record_request(params)
+        if not params:
+            self._send_json(200, body=owner.body)
+            return
+
+        status, payload = owner.query(params)
+        self._send_json(status, payload)
+
+
+class MockPharmacyServer(_BackgroundServer):
+    """
+    Serves a synthetic pharmacy directory at ``/pharmacies``.
+
+    Like mockapi.io, it accepts field filters (``?phone=555-000``, substring
+    match) and 1-based ``page``/``limit`` pagination, and answers a filter
+    with no matches with 404.
+    """
+
+    handler_class = _DirectoryHandler
+    path = "/pharmacies"
+
+    def __init__(
+        self,
+        pharmacies: Optional[List[Dict[str, Any]]] = None,
+        count: int = 100_000,
+        latency: str = "fixed:0",
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        super().__init__(host, port)
+        self.pharmacies = pharmacies if pharmacies is not None else generate_pharmacies(count)
+        self.latency = LatencyModel(latency)
+        # Serialized once; the directory is read-only
+        self.body = json.dumps(self.pharmacies).encode()
+        self.requests: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+
+    def record_request(self, params: Dict[str, str]):
+        with self._lock:
+            self.requests.append(params)
+
+    def query(self, params: Dict[str, str]):
+        """Apply filters and pagination. Returns (status, payload)."""
+        filters = {k: v for k, v in params.items() if k not in ("page", "limit")}
+        records = self.pharmacies
+        if filters:
+            records = [
+                pharmacy
+                for pharmacy in records
+                if all(value in str(pharmacy.get(field, "")) for field, value in filters.items())
+            ]
+            if not records:
+                return 404, "Not found"
+        if "limit" in params:
+            limit = int(params["limit"])
+            start = (int(params.get("page", 1)) - 1) * limit
+            records = records[start:start + limit]
+        return 200, records
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}{self.path}"
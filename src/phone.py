@@ -0,0 +1,135 @@
+"""
+Phone number normalization and caller matching.
+
+Numbers are reduced to E.164-style digits (country code included, no "+").
+PhoneIndex is built once per directory load and answers, in order of
+preference, exact, suffix and edit-distance-1 matches.
+"""
+import logging
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from .config import DEFAULT_COUNTRY_CODE
+
+logger = logging.getLogger(__name__)
+
+_NON_DIGITS = re.compile(r"\D")
+
+# Shortest number (a local subscriber number) a suffix match may rely on
+MIN_SUFFIX_DIGITS = 7
+_DIGITS = "0123456789"
+
+
+def normalize_phone(phone_number: Optional[str], country_code: str = DEFAULT_COUNTRY_CODE) -> str:
+    """
+    Reduce a phone number to E.164-style digits.
+
+    "+1 (555) 123-4567", "555.123.4567" and "001 555 123 4567" all become
+    "15551234567". National numbers of NANP length get ``country_code``;
+    other lengths are kept as dialled, digits only.
+    """
+    raw = (phone_number or "").strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if not digits:
+        return ""
+    if raw.startswith("+"):
+        return digits
+    if digits.startswith("00"):
+        # International call prefix
+        return digits[2:]
+    if country_code == "1" and len(digits) == 10:
+        return "1" + digits
+    return digits
+
+
+class PhoneMatch(NamedTuple):
+    pharmacy: Dict[str, Any]
+    kind: str  # "exact", "suffix" or "fuzzy"
+
+
+def _edit_variants(digits: str) -> Iterable[str]:
+    """Every digit string one substitution, insertion, deletion or swap away."""
+    n = len(digits)
+    for i in range(n):
+        head, tail = digits[:i], digits[i + 1:]
+        yield head + tail
+        for d in _DIGITS:
+            if d != digits[i]:
+                yield head + d + tail
+        if i + 1 < n and digits[i] != digits[i + 1]:
+            yield head + digits[i + 1] + digits[i] + digits[i + 2:]
+    for i in range(n + 1):
+        for d in _DIGITS:
+            yield digits[:i] + d + digits[i:]
+
+
+class PhoneIndex:
+    """
+    Phone lookups over a pharmacy list.
+
+    Building is one pass; a lookup is a dict hit, a suffix-bucket scan, or at
+    most a few hundred dict probes for the edit-distance-1 neighbourhood, so
+    it stays well under a millisecond on a 100k-record directory. Suffix and
+    fuzzy matches must be unique: an ambiguous number matches nobody rather
+    than the wrong pharmacy.
+    """
+
+    def __init__(
+        self,
+        pharmacies: Iterable[Dict[str, Any]] = (),
+        fuzzy: bool = True,
+        country_code: str = DEFAULT_COUNTRY_CODE,
+    ):
+        self.fuzzy = fuzzy
+        self.country_code = country_code
+        self._exact: Dict[str, Dict[str, Any]] = {}
+        self._by_suffix: Dict[str, List[str]] = {}
+        for pharmacy in pharmacies:
+            self.add(pharmacy)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(self, pharmacy: Dict[str, Any]):
+        key = normalize_phone(pharmacy.get("phone"), self.country_code)
+        if not key or key in self._exact:
+            return
+        self._exact[key] = pharmacy
+        if len(key) >= MIN_SUFFIX_DIGITS:
+            self._by_suffix.setdefault(key[-MIN_SUFFIX_DIGITS:], []).append(key)
+
+    def match(self, phone_number: Optional[str]) -> Optional[PhoneMatch]:
+        """Best match for a phone number, or None."""
+        key = normalize_phone(phone_number, self.country_code)
+        if not key:
+            return None
+
+        pharmacy = self._exact.get(key)
+        if pharmacy is not None:
+            return PhoneMatch(pharmacy, "exact")
+
+        if len(key) >= MIN_SUFFIX_DIGITS:
+            # One number is the other with a country or area code in front
+            candidates = [
+                other
+                for other in self._by_suffix.get(key[-MIN_SUFFIX_DIGITS:], ())
+                if other.endswith(key) or key.endswith(other)
+            ]
+            if len(candidates) == 1:
+                return PhoneMatch(self._exact[candidates[0]], "suffix")
+            if candidates:
+                logger.info(f"Ambiguous suffix match for {phone_number}: {len(candidates)} numbers")
+                return None
+
+        if self.fuzzy and len(key) >= MIN_SUFFIX_DIGITS:
+            candidates = {variant for variant in _edit_variants(key) if variant in self._exact}
+            if len(candidates) == 1:
+                return PhoneMatch(self._exact[candidates.pop()], "fuzzy")
+            if candidates:
+                logger.info(f"Ambiguous fuzzy match for {phone_number}: {len(candidates)} numbers")
+        return None
+
+    def get(self, phone_number: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Matched pharmacy for a phone number, or None."""
+        match = self.match(phone_number)
+        return match.pharmacy if match else None
@@ -1,4 +1,6 @@
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 
 def get_system_prompt() -> str:
@@ -60,9 +62,35 @@ Your goals:
 Be conversational and focus on learning about their operation before pitching our services."""
 
 
-def get_volume_discussion_prompt(rx_volume: Optional[str] = None) -> str:
-    """Generate a prompt focused on discussing prescription volume and our solutions."""
+def get_identifying_caller_prompt() -> str:
+    """Generate a prompt for the greeting while the caller's records are still loading."""
+    return """We are still looking up this caller in our records.
+
+Greet them warmly on behalf of Pharmesol and ask how you can help today. Do not assume whether they are a new or returning customer, and do not ask for their pharmacy details yet - we may already have them."""
+
+
+# Talking point per volume tier (see scoring.VOLUME_TIERS)
+_VOLUME_TIER_POINTS = {
+    "low": "- They are a smaller operation: focus on growing volume without adding staff",
+    "medium": "- They are a mid-size operation: focus on absorbing growth and smoothing peak days",
+    "high": "- They are a high-volume operation: focus on throughput, accuracy and staff workload",
+    "very_high": "- They are among the highest-volume pharmacies: focus on scale, automation and multi-site support",
+}
+
+
+def get_volume_discussion_prompt(
+    rx_volume: Optional[str] = None, volume_tier: Optional[str] = None
+) -> str:
+    """
+    Generate a prompt focused on discussing prescription volume and our solutions.
+
+    Args:
+        rx_volume: Volume as the caller stated it
+        volume_tier: Tier precomputed from the volume by scoring.annotate_volumes
+    """
     volume_context = f"with your current volume of {rx_volume}" if rx_volume else ""
+    tier_point = _VOLUME_TIER_POINTS.get(volume_tier)
+    tier_context = f"\n{tier_point}" if tier_point else ""
 
     return f"""Focus the conversation on prescription volume and how Pharmesol can help {volume_context}.
 
@@ -70,6 +98,110 @@ Key discussion points:
 - How has their prescription volume been trending?
 - What challenges do they face with high-volume processing?
 - How does Pharmesol's solutions scale with growing volume?
-- What specific pain points can we address?
+- What specific pain points can we address?{tier_context}
 
 Present Pharmesol as the ideal partner for pharmacies looking to efficiently manage high prescription volumes."""
+
+
+_RETURNING_CUSTOMER_FIELDS = ("name", "city", "rx_volume", "phone", "address")
+
+
+class PromptBuilder:
+    """
+    Renders and memoizes prompts, and orders request messages for prompt caching.
+
+    The system prompt is rendered once and always sent first, so together with
+    the tool schemas it forms a byte-identical prefix across every turn and
+    call. Per-call context (who the caller is, what stage the call is in) is
+    rendered once per (state, pharmacy details) key and sent after the
+    conversation history, right before the caller's message.
+    """
+
+    def __init__(self, max_cached: int = 1024):
+        self.system_prompt = get_system_prompt()
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _render(self, key: Tuple, render: Callable[[], str]) -> str:
+        with self._lock:
+            prompt = self._cache.get(key)
+            if prompt is not None:
+                self._cache.move_to_end(key)
+                return prompt
+
+        prompt = render()
+        with self._lock:
+            self._cache[key] = prompt
+            if len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return prompt
+
+    def context_prompt(
+        self, state: str, pharmacy: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Get the context prompt for a conversation state.
+
+        Args:
+            state: Conversation state (e.g. 'returning_customer', 'new_customer')
+            pharmacy: Current pharmacy record, if any
+
+        Returns:
+            Rendered context prompt
+        """
+        if state == "returning_customer" and pharmacy:
+            details = tuple(
+                (field, pharmacy[field])
+                for field in _RETURNING_CUSTOMER_FIELDS
+                if field in pharmacy
+            )
+            return self._render(
+                ("returning_customer", details),
+                lambda: get_returning_customer_prompt(dict(details)),
+            )
+        if state == "new_customer":
+            return self._render(("new_customer",), get_new_customer_prompt)
+        if state == "identifying":
+            return self._render(("identifying",), get_identifying_caller_prompt)
+
+        # Default to general conversation
+        rx_volume = pharmacy.get("rx_volume") if pharmacy else None
+        volume_tier = pharmacy.get("volume_tier") if pharmacy else None
+        return self._render(
+            ("volume_discussion", rx_volume, volume_tier),
+            lambda: get_volume_discussion_prompt(rx_volume, volume_tier),
+        )
+
+    def build_messages(
+        self,
+        prompt: Optional[str],
+        history: List[Dict[str, Any]],
+        context_prompt: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Order request messages: static system prompt, history, context, user input.
+
+        Args:
+            prompt: The caller's message; None when the request only continues
+                the history (e.g. after tool results)
+            history: Prior conversation messages
+            context_prompt: Per-call context, placed after the stable prefix
+            system_prompt: Overrides the static system prompt
+
+        Returns:
+            List of chat messages
+        """
+        messages = [
+            {"role": "system", "content": system_prompt or self.system_prompt},
+            *history,
+        ]
+        if context_prompt:
+            messages.append({"role": "system", "content": context_prompt})
+        if prompt is not None:
+            messages.append({"role": "user", "content": prompt})
+        return messages
+
+
+DEFAULT_PROMPT_BUILDER = PromptBuilder()
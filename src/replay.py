@@ -0,0 +1,372 @@
+"""
+Offline batch replay of scripted calls.
+
+Each script is one JSON line: the caller's phone number and the caller's
+turns, optionally with the LLM responses recorded from an earlier run. Calls
+are replayed through PharmacyChatbot in a process pool, against a pharmacy
+directory held in memory and either a deterministic stub LLM or a real
+OpenAI-compatible endpoint, and one result line per call (summary, tool-call
+outcomes, timings and the LLM responses seen) is written to JSONL. A result
+file can be fed back as input to replay the exact same LLM responses.
+"""
+import json
+import logging
+import re
+import time
+import zlib
+from collections import Counter as TallyCounter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+
+from openai.types.chat import ChatCompletion
+
+from .chatbot import PharmacyChatbot
+from .deadline import Deadline
+from .function_calls import FunctionHandler, is_function_error
+from .integration import PharmacyDirectoryCache
+from .llm import ChatbotLLM, create_openai_client
+from .llm_routing import ModelRouter
+from .metrics import percentile
+from .mock_servers import MOCK_REPLIES, chat_completion, mock_arguments
+
+logger = logging.getLogger(__name__)
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+
+# User-message keywords that make the stub LLM call a tool, checked in order
+_STUB_TOOL_TRIGGERS = (
+    ("send_email", re.compile(r"\bemail\b|@", re.IGNORECASE)),
+    ("schedule_callback", re.compile(r"call (me )?back|callback", re.IGNORECASE)),
+    ("collect_pharmacy_info", re.compile(r"\bour pharmacy is\b|\bwe are\b", re.IGNORECASE)),
+)
+
+
+def load_scripts(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse call scripts from JSONL.
+
+    Each line needs ``phone`` and ``turns`` (list of caller messages, or
+    turn records from a previous replay's results); ``id``
+    defaults to the line number and ``llm_responses`` (as written by a
+    previous replay) pins the LLM's answers.
+    """
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        script = json.loads(line)
+        if not isinstance(script.get("turns"), list) or "phone" not in script:
+            raise ValueError(f"Script on line {number} needs 'phone' and a 'turns' list")
+        script.setdefault("id", str(number))
+        yield script
+
+
+def _last_user_message(request: Dict[str, Any]) -> str:
+    for message in reversed(request.get("messages", [])):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def stub_reply(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deterministic LLM answer for a chat-completions request.
+
+    The reply text is picked by a hash of the caller's last message, and a
+    tool is called when that message asks for it (email, callback, pharmacy
+    details) and the request offers the tool.
+    """
+    user_message = _last_user_message(request)
+    content = MOCK_REPLIES[zlib.crc32(user_message.encode()) % len(MOCK_REPLIES)]
+
+    offered = {}
+    if request.get("tool_choice") != "none":
+        offered = {tool["function"]["name"]: tool["function"] for tool in request.get("tools") or []}
+    for name, trigger in _STUB_TOOL_TRIGGERS:
+        if name in offered and trigger.search(user_message):
+            arguments = mock_arguments(offered[name])
+            email = _EMAIL.search(user_message)
+            if email and "email" in arguments:
+                arguments["email"] = email.group()
+            return {"content": content, "tool_calls": [{"name": name, "arguments": arguments}]}
+    return {"content": content, "tool_calls": []}
+
+
+def _response_record(completion: ChatCompletion) -> Dict[str, Any]:
+    """Recordable form of a completion: its text and tool calls."""
+    message = completion.choices[0].message
+    tool_calls = []
+    for tool_call in message.tool_calls or []:
+        try:
+            arguments = json.loads(tool_call.function.arguments)
+        except (TypeError, ValueError):
+            arguments = tool_call.function.arguments
+        tool_calls.append({"name": tool_call.function.name, "arguments": arguments})
+    return {"content": message.content, "tool_calls": tool_calls}
+
+
+class _ReplayCompletions:
+    """``chat.completions`` of ReplayClient."""
+
+    def __init__(self, owner: "ReplayClient"):
+        self._owner = owner
+
+    def create(self, **request) -> ChatCompletion:
+        return self._owner.create(request)
+
+
+class _ReplayChat:
+    def __init__(self, owner: "ReplayClient"):
+        self.completions = _ReplayCompletions(owner)
+
+
+class ReplayClient:
+    """
+    OpenAI client stand-in that serves recorded responses, then stub ones.
+
+    With ``client`` set, requests past the recording go to that real client
+    instead of the stub. Every response served is appended to ``responses``,
+    so a replay doubles as a recording.
+    """
+
+    def __init__(
+        self,
+        recorded: Optional[List[Dict[str, Any]]] = None,
+        client: Any = None,
+    ):
+        self.chat = _ReplayChat(self)
+        self.client = client
+        self.responses: List[Dict[str, Any]] = []
+        self._recorded = list(recorded or [])
+
+    @staticmethod
+    def _completion(request: Dict[str, Any], reply: Dict[str, Any], index: int) -> ChatCompletion:
+        tool_calls = [
+            {
+                "id": f"call_replay_{index}_{i}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+            }
+            for i, call in enumerate(reply.get("tool_calls") or [])
+        ]
+        return ChatCompletion.model_validate(
+            chat_completion(request, reply.get("content"), tool_calls)
+        )
+
+    def create(self, request: Dict[str, Any]) -> ChatCompletion:
+        if request.get("stream"):
+            raise ValueError("Replay runs non-streamed turns only")
+
+        index = len(self.responses)
+        if index < len(self._recorded):
+            completion = self._completion(request, self._recorded[index], index)
+        elif self.client is not None:
+            completion = self.client.chat.completions.create(**request)
+        else:
+            completion = self._completion(request, stub_reply(request), index)
+
+        self.responses.append(_response_record(completion))
+        return completion
+
+
+class _RecordingFunctionHandler(FunctionHandler):
+    """FunctionHandler that keeps the outcome of every tool call."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.outcomes: List[Dict[str, Any]] = []
+
+    def execute_function(
+        self,
+        function_name: str,
+        arguments: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        state: Optional[str] = None,
+    ) -> str:
+        started = time.perf_counter()
+        result = super().execute_function(function_name, arguments, deadline, state)
+        self.outcomes.append({
+            "name": function_name,
+            "arguments": arguments,
+            "ok": not is_function_error(result),
+            "result": result,
+            "seconds": time.perf_counter() - started,
+        })
+        return result
+
+
+class StaticDirectory:
+    """Pharmacy directory integration over an in-memory list; never touches the network."""
+
+    def __init__(self, pharmacies: Iterable[Dict[str, Any]] = ()):
+        pharmacies = list(pharmacies)
+        self.directory = PharmacyDirectoryCache(lambda: pharmacies, ttl=float("inf"))
+        self.directory.refresh()
+
+    def get_pharmacy_by_phone(
+        self, phone_number: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        return self.directory.lookup(phone_number, deadline)
+
+
+# Per-process replay environment, set up once by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(
+    pharmacies: List[Dict[str, Any]],
+    llm: str,
+    model: Optional[str],
+    openai_base_url: Optional[str],
+    tool_followup: bool,
+):
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker.update(
+        directory=StaticDirectory(pharmacies),
+        client=create_openai_client(base_url=openai_base_url) if llm == "openai" else None,
+        model=model,
+        tool_followup=tool_followup,
+    )
+
+
+def replay_call(script: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replay one scripted call in the current worker's environment.
+
+    Returns:
+        Result record: call summary, per-turn replies and timings, tool-call
+        outcomes and the LLM responses seen (or an ``error``)
+    """
+    client = ReplayClient(script.get("llm_responses"), client=_worker.get("client"))
+    # No hedging: a second request would consume the next recorded response
+    llm_kwargs = {"client": client, "router": ModelRouter(fallback_model=None)}
+    if _worker.get("model"):
+        llm_kwargs["model"] = _worker["model"]
+    function_handler = _RecordingFunctionHandler(store=None, executor=None)
+    chatbot = PharmacyChatbot(
+        api_integration=_worker["directory"],
+        llm=ChatbotLLM(**llm_kwargs),
+        function_handler=function_handler,
+        tool_followup=_worker.get("tool_followup", False),
+    )
+
+    result: Dict[str, Any] = {"id": script["id"], "phone": script["phone"]}
+    turns = []
+    started = time.perf_counter()
+    try:
+        turn_started = time.perf_counter()
+        greeting = chatbot.start_call(script["phone"])
+        result["greeting"] = {"reply": greeting, "seconds": time.perf_counter() - turn_started}
+
+        for turn in script["turns"]:
+            # Result files list turns as {"user": ..., "reply": ...}
+            user_input = turn["user"] if isinstance(turn, dict) else turn
+            tools_before = len(function_handler.outcomes)
+            turn_started = time.perf_counter()
+            reply = chatbot.continue_conversation(user_input)
+            turns.append({
+                "user": user_input,
+                "reply": reply,
+                "seconds": time.perf_counter() - turn_started,
+                "tool_calls": [
+                    outcome["name"] for outcome in function_handler.outcomes[tools_before:]
+                ],
+            })
+
+        summary = chatbot.end_call()
+        result.update(
+            conversation_state=summary["conversation_state"],
+            pharmacy=summary["pharmacy_info"],
+            function_summary={
+                key: value
+                for key, value in summary["function_summary"].items()
+                if key != "details"
+            },
+            token_usage=summary["token_usage"],
+        )
+    except Exception as e:
+        logger.exception(f"Replay of call {script['id']} failed")
+        result["error"] = str(e)
+
+    result.update(
+        turns=turns,
+        tool_calls=function_handler.outcomes,
+        seconds=time.perf_counter() - started,
+        llm_responses=client.responses,
+    )
+    return result
+
+
+def run_replay(
+    scripts: Iterable[Dict[str, Any]],
+    output: IO[str],
+    pharmacies: Iterable[Dict[str, Any]] = (),
+    workers: int = 4,
+    llm: str = "stub",
+    model: Optional[str] = None,
+    openai_base_url: Optional[str] = None,
+    tool_followup: bool = False,
+    chunksize: int = 16,
+) -> Dict[str, Any]:
+    """
+    Replay scripted calls and write one JSON result line per call, in input order.
+
+    Args:
+        scripts: Parsed call scripts (see load_scripts)
+        output: Text stream the result lines are written to
+        pharmacies: Directory records callers are looked up in
+        workers: Worker processes; 0 replays in this process
+        llm: "stub" for the deterministic stub, "openai" for a real endpoint
+            (recorded responses are used first either way)
+        model: Model name to request, if not the configured default
+        openai_base_url: Endpoint for ``llm="openai"``
+        tool_followup: Run the follow-up pass after tool calls
+        chunksize: Scripts handed to a worker at a time
+
+    Returns:
+        Report with call, error and tool-call counts, turn latency
+        percentiles (seconds) and throughput
+    """
+    if llm not in ("stub", "openai"):
+        raise ValueError(f"Unknown LLM mode: {llm}")
+    initargs = (list(pharmacies), llm, model, openai_base_url, tool_followup)
+
+    calls, errors = 0, 0
+    tool_outcomes: TallyCounter = TallyCounter()
+    turn_latencies: List[float] = []
+
+    started = time.perf_counter()
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+        results = pool.map(replay_call, scripts, chunksize=chunksize)
+    else:
+        pool = None
+        _init_worker(*initargs)
+        results = map(replay_call, scripts)
+
+    try:
+        for result in results:
+            output.write(json.dumps(result, default=str) + "\n")
+            calls += 1
+            errors += "error" in result
+            turn_latencies.extend(turn["seconds"] for turn in result["turns"])
+            for outcome in result["tool_calls"]:
+                tool_outcomes[f"{outcome['name']}:{'ok' if outcome['ok'] else 'error'}"] += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "calls": calls,
+        "errors": errors,
+        "workers": workers,
+        "elapsed": elapsed,
+        "calls_per_s": calls / elapsed if elapsed else 0.0,
+        "tool_calls": dict(sorted(tool_outcomes.items())),
+        "turn_latency": {
+            "count": len(turn_latencies),
+            "p50": percentile(turn_latencies, 50),
+            "p95": percentile(turn_latencies, 95),
+        },
+    }
@@ -0,0 +1,178 @@
+"""
+Prescription volume parsing and lead scoring.
+
+``rx_volume`` is free text ("500 per day", "3000 per month", "1000/month").
+parse_rx_volume turns it into a daily rate once; scoring and ranking then run
+over NumPy arrays, so thousands of leads or directory records are scored in
+one pass. Records are annotated with ``rx_daily`` and ``volume_tier`` so
+prompts never re-parse the text.
+"""
+import logging
+import math
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    # NumPy is imported by the batch functions, not at startup
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Days per unit; a month is an average calendar month
+_UNIT_DAYS = {
+    "day": 1.0,
+    "week": 7.0,
+    "month": 365.0 / 12,
+    "year": 365.0,
+}
+_UNIT_ALIASES = {
+    "d": "day", "day": "day", "days": "day", "daily": "day",
+    "wk": "week", "week": "week", "weeks": "week", "weekly": "week",
+    "mo": "month", "mon": "month", "month": "month", "months": "month", "monthly": "month",
+    "yr": "year", "year": "year", "years": "year", "annual": "year", "annually": "year",
+    "yearly": "year",
+}
+_NUMBER = re.compile(r"(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<scale>k\b)?")
+_WORD = re.compile(r"[a-z]+")
+
+# Lower bounds (Rx per day) of each tier above "low"
+VOLUME_TIERS = ("low", "medium", "high", "very_high")
+TIER_BOUNDS = (100.0, 300.0, 1000.0)
+
+# Daily volume that earns the full volume score; above it scores saturate
+SCORE_SATURATION = 2000.0
+
+
+def parse_rx_volume(rx_volume: Any) -> Optional[float]:
+    """
+    Normalize a prescription volume to prescriptions per day.
+
+    "500 per day", "3000 per month", "1000/month", "1.5k weekly" and
+    "about 2,000 a week" are understood; a number with no unit (or a bare
+    int/float from the API) is taken as a daily figure, the way volumes are
+    usually quoted.
+
+    Returns:
+        Prescriptions per day, or None if the value holds no volume
+    """
+    if isinstance(rx_volume, str):
+        return _parse_rx_text(rx_volume)
+    if isinstance(rx_volume, (int, float)) and not isinstance(rx_volume, bool):
+        return float(rx_volume) if math.isfinite(rx_volume) and rx_volume >= 0 else None
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_rx_text(rx_volume: str) -> Optional[float]:
+    if not rx_volume:
+        return None
+    text = rx_volume.lower()
+    match = _NUMBER.search(text)
+    if match is None:
+        return None
+
+    number = float(match.group("number").replace(",", ""))
+    if match.group("scale"):
+        number *= 1000
+    # First unit word after the number ("500 scripts a week" -> week)
+    unit = next(
+        (_UNIT_ALIASES[word] for word in _WORD.findall(text, match.end()) if word in _UNIT_ALIASES),
+        "day",
+    )
+    return number / _UNIT_DAYS[unit]
+
+
+def daily_volumes(records: Sequence[Dict[str, Any]]) -> "np.ndarray":
+    """Daily Rx volume of each record, NaN where it is unknown."""
+    import numpy as np
+
+    return np.array([_daily_volume(record) for record in records], dtype=float)
+
+
+def _daily_volume(record: Dict[str, Any]) -> float:
+    # One malformed record must not fail a whole directory load
+    try:
+        daily = parse_rx_volume(record.get("rx_volume"))
+    except Exception as e:
+        logger.warning(f"Unreadable rx_volume in record {record!r:.80}: {e}")
+        return math.nan
+    return math.nan if daily is None else daily
+
+
+def volume_tiers(daily: "np.ndarray") -> List[Optional[str]]:
+    """Tier name for each daily volume (None where the volume is unknown)."""
+    import numpy as np
+
+    positions = np.searchsorted(TIER_BOUNDS, daily, side="right")
+    known = ~np.isnan(daily)
+    return [VOLUME_TIERS[p] if k else None for p, k in zip(positions.tolist(), known.tolist())]
+
+
+def volume_tier(rx_volume: Optional[str]) -> Optional[str]:
+    """Tier name for one free-text volume."""
+    daily = parse_rx_volume(rx_volume)
+    if daily is None:
+        return None
+    return VOLUME_TIERS[bisect_right(TIER_BOUNDS, daily)]
+
+
+def score_volumes(daily: "np.ndarray") -> "np.ndarray":
+    """
+    Score daily volumes in [0, 1].
+
+    Scores grow with the log of volume, so a 10x bigger pharmacy is a
+    constant step up rather than drowning out the rest; unknown volumes
+    score 0.
+    """
+    import numpy as np
+
+    scores = np.log1p(np.nan_to_num(daily, nan=0.0)) / np.log1p(SCORE_SATURATION)
+    return np.clip(scores, 0.0, 1.0)
+
+
+def score_records(records: Sequence[Dict[str, Any]]) -> "np.ndarray":
+    """Lead score of each record (leads or directory entries) by Rx volume."""
+    return score_volumes(daily_volumes(records))
+
+
+def rank_records(
+    records: Sequence[Dict[str, Any]], limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Order records from the best lead to the worst.
+
+    Args:
+        records: Leads or directory entries with an ``rx_volume`` field
+        limit: Return only this many of the best
+
+    Returns:
+        Records sorted by descending score, saturated scores by descending
+        volume; remaining ties keep their input order
+    """
+    import numpy as np
+
+    daily = np.nan_to_num(daily_volumes(records), nan=0.0)
+    # lexsort is stable and sorts by the last key first
+    order = np.lexsort((-daily, -score_volumes(daily)))
+    if limit is not None:
+        order = order[:limit]
+    return [records[i] for i in order.tolist()]
+
+
+def annotate_volumes(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add ``rx_daily`` and ``volume_tier`` to each record, in place.
+
+    Returns:
+        The records, as a list
+    """
+    records = list(records)
+    daily = daily_volumes(records)
+    for record, rate, tier in zip(records, daily.tolist(), volume_tiers(daily)):
+        if not isinstance(record, dict):
+            continue
+        record["rx_daily"] = None if tier is None else round(rate, 1)
+        record["volume_tier"] = tier
+    return records
@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .chatbot import PharmacyChatbot
+from .config import MAX_CALL_SESSIONS, SESSION_IDLE_TIMEOUT
+from .function_calls import FunctionHandler
+from .integration import PharmacyAPIIntegration
+from .llm import ChatbotLLM
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CallSession:
+    """Per-call state: the chatbot holding this call's history plus bookkeeping."""
+
+    call_id: str
+    chatbot: PharmacyChatbot
+    created_at: float = field(default_factory=time.monotonic)
+    last_active: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+def _estimate_size(chatbot: PharmacyChatbot) -> int:
+    """Rough byte count of a call's state, dominated by its conversation history."""
+    size = len(chatbot.llm.history.summary)
+    for message in chatbot.llm.conversation_history:
+        size += len(message.get("content") or "")
+    if chatbot.current_pharmacy:
+        size += sum(len(str(value)) for value in chatbot.current_pharmacy.values())
+    return size
+
+
+class CallSessionManager:
+    """
+    Holds many concurrent calls keyed by call ID.
+
+    Each session gets its own PharmacyChatbot, but all of them share one
+    PharmacyAPIIntegration (and so one directory cache and HTTP session) and
+    one OpenAI client. Sessions are kept in LRU order and evicted when idle
+    longer than ``idle_timeout``, when there are more than ``max_sessions``,
+    or when their estimated total size exceeds ``max_memory_bytes``.
+
+    Turns on the same call are serialized; different calls run in parallel.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_CALL_SESSIONS,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        max_memory_bytes: Optional[int] = None,
+        api_integration: Optional[PharmacyAPIIntegration] = None,
+        llm_client=None,
+        on_evict: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_memory_bytes = max_memory_bytes
+        self.api_integration = api_integration or PharmacyAPIIntegration()
+        # None: every chatbot uses the process-wide default client
+        self.llm_client = llm_client
+        self.on_evict = on_evict
+        self._sessions: "OrderedDict[str, CallSession]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, call_id: str) -> bool:
+        return call_id in self._sessions
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _new_chatbot(self) -> PharmacyChatbot:
+        return PharmacyChatbot(
+            api_integration=self.api_integration,
+            llm=ChatbotLLM(client=self.llm_client),
+            function_handler=FunctionHandler(),
+        )
+
+    def _get(self, call_id: str) -> CallSession:
+        with self._lock:
+            session = self._sessions.get(call_id)
+            if session is None:
+                raise KeyError(f"No active call session: {call_id}")
+            session.last_active = time.monotonic()
+            self._sessions.move_to_end(call_id)
+            return session
+
+    def _resize(self, session: CallSession):
+        """Re-measure a session after a turn and enforce the caps."""
+        size = _estimate_size(session.chatbot)
+        with self._lock:
+            if self._sessions.get(session.call_id) is session:
+                self._total_bytes += size - session.size_bytes
+                session.size_bytes = size
+            evicted = self._enforce_limits_locked()
+        self._finish_evictions(evicted)
+
+    def _enforce_limits_locked(self) -> List[CallSession]:
+        evicted = []
+        while self._sessions and (
+            len(self._sessions) > self.max_sessions
+            or (
+                self.max_memory_bytes is not None
+                and self._total_bytes > self.max_memory_bytes
+                and len(self._sessions) > 1
+            )
+        ):
+            _, session = self._sessions.popitem(last=False)
+            self._total_bytes -= session.size_bytes
+            evicted.append(session)
+        return evicted
+
+    def _finish_evictions(self, sessions: List[CallSession]):
+        for session in sessions:
+            logger.info(f"Evicting call session: {session.call_id}")
+            with session.lock:
+                summary = session.chatbot.end_call()
+            if self.on_evict:
+                self.on_evict(session.call_id, summary)
+
+    def start_call(self, call_id: str, caller_phone: str) -> str:
+        """
+        Open a session for a new call and return the greeting.
+
+        Args:
+            call_id: Unique identifier for the call
+            caller_phone: The phone number of the incoming caller
+
+        Returns:
+            Initial greeting message
+
+        Raises:
+            ValueError: If a session with this call ID is already active
+        """
+        self.evict_idle()
+        session = CallSession(call_id=call_id, chatbot=self._new_chatbot())
+        session.chatbot.caller_phone = caller_phone
+
+        with self._lock:
+            if call_id in self._sessions:
+                raise ValueError(f"Call session already active: {call_id}")
+            self._sessions[call_id] = session
+            evicted = self._enforce_limits_locked()
+        self._finish_evictions(evicted)
+
+        with session.lock:
+            greeting = session.chatbot.start_call(caller_phone)
+        self._resize(session)
+        return greeting
+
+    def continue_conversation(self, call_id: str, user_input: str) -> str:
+        """
+        Run one turn of an active call.
+
+        Raises:
+            KeyError: If the call ID has no active session (ended or evicted)
+        """
+        session = self._get(call_id)
+        with session.lock:
+            response = session.chatbot.continue_conversation(user_input)
+        self._resize(session)
+        return response
+
+    def continue_conversation_stream(self, call_id: str, user_input: str) -> Iterator[str]:
+        """
+        Run one turn of an active call, yielding the reply as it is generated.
+
+        Raises:
+            KeyError: If the call ID has no active session (ended or evicted)
+        """
+        session = self._get(call_id)
+        with session.lock:
+            yield from session.chatbot.continue_conversation_stream(user_input)
+        self._resize(session)
+
+    def end_call(self, call_id: str) -> Dict[str, Any]:
+        """
+        Close a session and return its call summary.
+
+        Raises:
+            KeyError: If the call ID has no active session
+        """
+        with self._lock:
+            session = self._sessions.pop(call_id, None)
+            if session is None:
+                raise KeyError(f"No active call session: {call_id}")
+            self._total_bytes -= session.size_bytes
+        with session.lock:
+            return session.chatbot.end_call()
+
+    def get_session(self, call_id: str) -> CallSession:
+        """Return an active session, marking it as recently used."""
+        return self._get(call_id)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """
+        Evict sessions idle longer than ``idle_timeout``.
+
+        Returns:
+            Number of sessions evicted
+        """
+        now = time.monotonic() if now is None else now
+        evicted = []
+        with self._lock:
+            # LRU order means the idle sessions are all at the front
+            while self._sessions:
+                call_id, session = next(iter(self._sessions.items()))
+                if now - session.last_active < self.idle_timeout:
+                    break
+                del self._sessions[call_id]
+                self._total_bytes -= session.size_bytes
+                evicted.append(session)
+        self._finish_evictions(evicted)
+        return len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current session count and estimated memory use."""
+        return {
+            "active_sessions": len(self._sessions),
+            "total_bytes": self._total_bytes,
+            "max_sessions": self.max_sessions,
+            "max_memory_bytes": self.max_memory_bytes,
+        }
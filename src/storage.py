@@ -0,0 +1,250 @@
+"""
+Persistence for the leads, callbacks and emails recorded by FunctionHandler.
+
+Stores are append-only. SQLiteRecordStore keeps appends off the caller's
+thread: records go onto a bounded queue and a single writer thread commits
+them in batches, so one fsync covers many records. When the writer falls
+too far behind, new records are dropped and counted rather than blocking
+the conversation turn.
+"""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .config import RECORD_STORE_PATH
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RECORD_KINDS = ("email", "callback", "lead")
+
+RECORDS_DROPPED = REGISTRY.counter(
+    "chatbot_records_dropped_total",
+    "Records not persisted because the record store writer fell behind",
+    ("kind",),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    phone TEXT,
+    created_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_phone_time ON records (phone, created_at);
+CREATE INDEX IF NOT EXISTS idx_records_kind_time ON records (kind, created_at);
+"""
+
+
+class RecordStore(ABC):
+    """Append-only store interface. Records are plain JSON-serializable dicts."""
+
+    @abstractmethod
+    def append(self, kind: str, record: Dict[str, Any], phone: Optional[str] = None):
+        """Store a record; must not block the caller on I/O."""
+
+    @abstractmethod
+    def query(
+        self,
+        kind: Optional[str] = None,
+        phone: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Most recent records matching every given filter, newest first.
+
+        Args:
+            kind: One of RECORD_KINDS
+            phone: Exact phone number the record was stored under
+            since: ISO timestamp, inclusive lower bound
+            until: ISO timestamp, exclusive upper bound
+            limit: Maximum number of records to return
+        """
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every appended record is durable. Returns False on timeout."""
+        return True
+
+    def close(self):
+        pass
+
+
+class SQLiteRecordStore(RecordStore):
+    """
+    SQLite store in WAL mode with batched group commits.
+
+    Args:
+        path: Database file
+        batch_size: Most records committed in one transaction
+        flush_interval: Seconds the writer waits for more records before
+            committing a partial batch
+        max_pending: Queue bound; ``append`` drops records, counting them
+            in ``dropped`` and RECORDS_DROPPED, when the writer falls this
+            far behind
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        max_pending: int = 10_000,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._local = threading.local()
+        self._closed = False
+        self.dropped = 0
+
+        connection = self._connect()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        connection.commit()
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="record-store-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # WAL only needs a sync at checkpoints; commits stay cheap
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        """Per-thread read connection; WAL lets readers run alongside the writer."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def append(self, kind: str, record: Dict[str, Any], phone: Optional[str] = None):
+        if self._closed:
+            raise RuntimeError("Record store is closed")
+        row = (kind, phone, datetime.now().isoformat(), json.dumps(record))
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            RECORDS_DROPPED.inc(kind=kind)
+            logger.warning(
+                f"Record store writer {self._queue.maxsize} records behind, dropped {kind} record"
+            )
+
+    def _write_loop(self):
+        connection = self._connect()
+        running = True
+        while running:
+            item = self._queue.get()
+            batch, waiters = [], []
+            while True:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if not running or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO records (kind, phone, created_at, payload) "
+                            "VALUES (?, ?, ?, ?)",
+                            batch,
+                        )
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to persist {len(batch)} records: {e}")
+            for waiter in waiters:
+                waiter.set()
+        connection.close()
+
+    def query(
+        self,
+        kind: Optional[str] = None,
+        phone: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        for column, op, value in (
+            ("kind", "=", kind),
+            ("phone", "=", phone),
+            ("created_at", ">=", since),
+            ("created_at", "<", until),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._reader().execute(
+            f"SELECT payload FROM records {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [json.loads(payload) for (payload,) in rows]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if not self._writer.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        started = time.monotonic()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        if timeout is not None:
+            timeout = max(timeout - (time.monotonic() - started), 0)
+        return done.wait(timeout)
+
+    def close(self):
+        """Commit everything still queued, then stop the writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+_default_store: Optional[RecordStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> Optional[RecordStore]:
+    """
+    Process-wide store shared by every FunctionHandler.
+
+    Returns:
+        A SQLiteRecordStore at RECORD_STORE_PATH, or None when persistence
+        is not configured
+    """
+    global _default_store
+    if not RECORD_STORE_PATH:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SQLiteRecordStore(RECORD_STORE_PATH)
+    return _default_store
@@ -0,0 +1,163 @@
+"""
+Token usage and cost accounting for LLM requests.
+
+Every request's usage is turned into a TokenUsage, summed per call by
+UsageTotals and added to process-wide counters labelled by model and
+conversation state.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .metrics import REGISTRY, current_state
+
+# USD per million tokens. Dated snapshots (e.g. gpt-4o-2024-08-06) are priced
+# by their longest matching prefix.
+MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+    "gpt-4.1-nano": {"input": 0.10, "cached_input": 0.025, "output": 0.40},
+    "gpt-3.5-turbo": {"input": 0.50, "cached_input": 0.50, "output": 1.50},
+}
+
+LLM_REQUESTS = REGISTRY.counter(
+    "chatbot_llm_requests_total",
+    "LLM requests that reported token usage",
+    ("model", "state"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "chatbot_llm_tokens_total",
+    "Tokens used by LLM requests; kind is prompt, cached_prompt or completion",
+    ("model", "state", "kind"),
+)
+LLM_COST = REGISTRY.counter(
+    "chatbot_llm_cost_usd_total",
+    "Estimated LLM spend in US dollars",
+    ("model", "state"),
+)
+
+
+def _pricing_for(model: str) -> Optional[Dict[str, float]]:
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]
+    matches = [name for name in MODEL_PRICING if model.startswith(f"{name}-")]
+    return MODEL_PRICING[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0
+) -> Optional[float]:
+    """
+    Estimate the price of one request.
+
+    Args:
+        model: Model name the request was sent to
+        prompt_tokens: Prompt tokens, including cached ones
+        completion_tokens: Generated tokens
+        cached_tokens: Prompt tokens served from the provider's prompt cache
+
+    Returns:
+        Cost in US dollars, or None if the model has no known pricing
+    """
+    pricing = _pricing_for(model)
+    if pricing is None:
+        return None
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (
+        uncached * pricing["input"]
+        + cached_tokens * pricing["cached_input"]
+        + completion_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+def _field(source: Any, name: str) -> Any:
+    if isinstance(source, dict):
+        return source.get(name)
+    return getattr(source, name, None)
+
+
+@dataclass
+class TokenUsage:
+    """Tokens used by one LLM request."""
+
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: Optional[float] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def from_openai(cls, model: str, usage: Any) -> Optional["TokenUsage"]:
+        """
+        Read the ``usage`` block of a chat completion (or its final stream chunk).
+
+        Returns:
+            TokenUsage, or None if the response carried no usable counts
+        """
+        if usage is None:
+            return None
+        prompt_tokens = _field(usage, "prompt_tokens")
+        completion_tokens = _field(usage, "completion_tokens")
+        if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+            return None
+
+        cached_tokens = _field(_field(usage, "prompt_tokens_details"), "cached_tokens")
+        if not isinstance(cached_tokens, int):
+            cached_tokens = 0
+
+        return cls(
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            cost_usd=estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens),
+        )
+
+
+class UsageTotals:
+    """Running token and cost totals across the requests of one call."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost_usd = 0.0
+        self.unpriced_requests = 0
+
+    def add(self, usage: TokenUsage):
+        self.requests += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        self.cached_tokens += usage.cached_tokens
+        if usage.cost_usd is None:
+            self.unpriced_requests += 1
+        else:
+            self.cost_usd += usage.cost_usd
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "unpriced_requests": self.unpriced_requests,
+        }
+
+
+def record_usage(usage: TokenUsage, state: Optional[str] = None):
+    """Add one request's usage to the process-wide counters."""
+    state = current_state() if state is None else state
+    LLM_REQUESTS.inc(model=usage.model, state=state)
+    LLM_TOKENS.inc(usage.prompt_tokens, model=usage.model, state=state, kind="prompt")
+    LLM_TOKENS.inc(usage.cached_tokens, model=usage.model, state=state, kind="cached_prompt")
+    LLM_TOKENS.inc(usage.completion_tokens, model=usage.model, state=state, kind="completion")
+    if usage.cost_usd is not None:
+        LLM_COST.inc(usage.cost_usd, model=usage.model, state=state)
@@ -0,0 +1,127 @@
+"""
+Startup benchmark for the Pharmesol inbound sales chatbot.
+
+Starts fresh interpreters, as an autoscaled worker would, and measures how
+long importing ``src.chatbot`` takes, which heavy SDKs that import loads,
+and the time from process start to the first greeting. Local mock OpenAI
+and pharmacy-directory servers are used, so no API key or network access is
+needed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from src.metrics import percentile
+from src.mock_servers import MockOpenAIServer, MockPharmacyServer
+
+# Modules that should only be imported once they are needed
+HEAVY_MODULES = ("openai", "httpx", "requests", "numpy")
+
+# Runs in the fresh interpreter; prints one JSON line of timings
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import src.chatbot
+imported = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+chatbot = src.chatbot.PharmacyChatbot()
+constructed = time.perf_counter()
+chatbot.start_call({phone!r})
+greeted = time.perf_counter()
+print(json.dumps({{
+    "import": imported - started,
+    "construct": constructed - imported,
+    "first_greeting": greeted - started,
+    "heavy_modules": loaded,
+}}))
+"""
+
+
+def measure_once(env: Dict[str, str], phone: str) -> Dict[str, Any]:
+    """Time one cold start in a fresh interpreter."""
+    code = _CHILD.format(heavy=HEAVY_MODULES, phone=phone)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    process = time.perf_counter() - started
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Wall time including interpreter startup, as a new worker sees it
+    result["process"] = process
+    return result
+
+
+def run_startup_bench(runs: int = 5, phone: str = "555-0001") -> Dict[str, Any]:
+    """
+    Measure cold starts against local mock servers.
+
+    Returns:
+        Report with median and p95 (seconds) of import, construction,
+        first-greeting and whole-process times, and the heavy modules the
+        import pulled in
+    """
+    llm_server = MockOpenAIServer().start()
+    directory_server = MockPharmacyServer(count=1000).start()
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="bench-key",
+        OPENAI_BASE_URL=llm_server.api_base_url,
+        PHARMACY_API_URL=f"{directory_server.base_url}{directory_server.path}",
+    )
+    try:
+        results: List[Dict[str, Any]] = [measure_once(env, phone) for _ in range(runs)]
+    finally:
+        llm_server.stop()
+        directory_server.stop()
+
+    report: Dict[str, Any] = {"runs": runs}
+    for key in ("import", "construct", "first_greeting", "process"):
+        values = [result[key] for result in results]
+        report[key] = {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+    report["heavy_modules"] = sorted({name for result in results for name in result["heavy_modules"]})
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print("=" * 60)
+    print(f"Cold starts: {report['runs']}")
+    print("-" * 60)
+    rows = [
+        ("Import", "import"),
+        ("Construct", "construct"),
+        ("1st greeting", "first_greeting"),
+        ("Process", "process"),
+    ]
+    for label, key in rows:
+        stats = report[key]
+        print(f"{label:<13} p50={stats['p50'] * 1000:8.1f} ms  p95={stats['p95'] * 1000:8.1f} ms")
+    print("-" * 60)
+    print(f"Heavy modules loaded by import: {', '.join(report['heavy_modules']) or 'none'}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--phone", default="555-0001", help="Caller ID for the first greeting")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_startup_bench(runs=args.runs, phone=args.phone)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from src.actions import FAILED, SUCCEEDED, ActionExecutor, ActionQueueFullError, idempotency_key
+from src.function_calls import FunctionHandler, is_function_error
+
+
+class TestActionExecutor:
+
+    def setup_method(self):
+        self.executor = ActionExecutor(workers=2, max_retries=2, backoff_base=0.001)
+
+    def teardown_method(self):
+        self.executor.shutdown()
+
+    def test_retries_until_success(self):
+        action = Mock(side_effect=[ConnectionError("smtp down"), None])
+
+        self.executor.submit("key-1", "email", action)
+        assert self.executor.wait(["key-1"], timeout=5)
+
+        status = self.executor.status("key-1")
+        assert status["status"] == SUCCEEDED
+        assert status["attempts"] == 2
+        assert status["error"] is None
+
+    def test_gives_up_after_max_retries(self):
+        action = Mock(side_effect=ConnectionError("smtp down"))
+
+        self.executor.submit("key-1", "email", action)
+        self.executor.wait(["key-1"], timeout=5)
+
+        status = self.executor.status("key-1")
+        assert status["status"] == FAILED
+        assert status["attempts"] == 3
+        assert "smtp down" in status["error"]
+
+    def test_duplicate_key_runs_once(self):
+        release = threading.Event()
+        action = Mock(side_effect=lambda: release.wait(5))
+
+        self.executor.submit("key-1", "email", action)
+        self.executor.submit("key-1", "email", action)
+        release.set()
+        self.executor.wait(["key-1"], timeout=5)
+
+        assert action.call_count == 1
+
+    def test_full_queue_rejects_without_blocking(self):
+        started, release = threading.Event(), threading.Event()
+        executor = ActionExecutor(workers=1, max_pending=1)
+        try:
+            executor.submit("key-1", "email", lambda: started.set() or release.wait(5))
+            assert started.wait(5)
+            executor.submit("key-2", "email", Mock())
+
+            with pytest.raises(ActionQueueFullError):
+                executor.submit("key-3", "email", Mock())
+            assert executor.status("key-3") is None
+        finally:
+            release.set()
+            executor.shutdown()
+
+    def test_idempotency_key_ignores_argument_order(self):
+        assert idempotency_key("call", "send_email", {"a": 1, "b": 2}) == \
+            idempotency_key("call", "send_email", {"b": 2, "a": 1})
+        assert idempotency_key("call", "send_email", {"a": 1}) != \
+            idempotency_key("other", "send_email", {"a": 1})
+
+
+class TestFunctionHandlerBackgroundActions:
+
+    def setup_method(self):
+        self.executor = ActionExecutor(workers=1, backoff_base=0.001)
+        self.handler = FunctionHandler(executor=self.executor)
+
+    def teardown_method(self):
+        self.executor.shutdown()
+
+    def test_email_acknowledged_then_delivered(self):
+        result = self.handler.execute_function("send_email", {
+            "email": "a@b.com", "subject": "Hi", "content": "Info"
+        })
+
+        assert "queued for sending" in result
+        action_id = self.handler.sent_emails[0]["action_id"]
+        assert self.executor.wait([action_id], timeout=5)
+        assert self.handler.get_summary()["actions"] == [self.executor.status(action_id)]
+        assert self.executor.status(action_id)["status"] == SUCCEEDED
+
+    def test_repeated_call_is_not_sent_twice(self):
+        arguments = {"phone": "555-123-4567", "preferred_time": "tomorrow at 2pm"}
+
+        self.handler.execute_function("schedule_callback", arguments)
+        result = self.handler.execute_function("schedule_callback", dict(arguments))
+
+        assert "already scheduled" in result
+        assert len(self.handler.get_summary()["actions"]) == 1
+        assert self.handler.get_summary()["callbacks_scheduled"] == 1
+
+    def test_same_action_allowed_on_next_call(self):
+        arguments = {"email": "a@b.com", "subject": "Hi", "content": "Info"}
+
+        self.handler.execute_function("send_email", arguments)
+        self.handler.reset()
+        result = self.handler.execute_function("send_email", dict(arguments))
+
+        assert "queued for sending" in result
+
+    def test_rejected_action_reported_to_model_and_retryable(self):
+        arguments = {"email": "a@b.com", "subject": "Hi", "content": "Info"}
+        self.executor.submit = Mock(side_effect=ActionQueueFullError("Too many pending actions"))
+
+        result = self.handler.execute_function("send_email", arguments)
+
+        assert is_function_error(result)
+        assert not self.handler.sent_emails
+        assert not self.handler._is_duplicate("send_email", arguments)
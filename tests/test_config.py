@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src import config
+from src.llm import ChatbotLLM
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code, **env):
+    """Run code in a fresh interpreter without an API key (an empty one hides a .env file's)."""
+    environ = dict(os.environ, OPENAI_API_KEY="", **env)
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env=environ,
+        capture_output=True,
+        text=True,
+    )
+
+
+class TestValidateConfig:
+    def setup_method(self):
+        self._saved = (config.OPENAI_API_KEY, list(config._problems), config._validated)
+        config._validated = False
+
+    def teardown_method(self):
+        config.OPENAI_API_KEY, problems, config._validated = self._saved
+        config._problems[:] = problems
+
+    def test_missing_key_is_reported_on_use(self, monkeypatch):
+        monkeypatch.setattr(config, "OPENAI_API_KEY", None)
+        config._problems.clear()
+
+        with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+            config.require_openai_api_key()
+        # Code paths that need no key can still check the rest
+        config.validate_config(require_openai_key=False)
+
+    def test_malformed_values_are_listed_together(self, monkeypatch):
+        monkeypatch.setattr(config, "OPENAI_API_KEY", None)
+        config._problems[:] = ["MAX_CALL_SESSIONS must be an integer, got 'lots'"]
+
+        with pytest.raises(ValueError) as excinfo:
+            config.validate_config()
+        assert "MAX_CALL_SESSIONS" in str(excinfo.value)
+        assert "OPENAI_API_KEY" in str(excinfo.value)
+
+    def test_valid_config_returns_key(self, monkeypatch):
+        monkeypatch.setattr(config, "OPENAI_API_KEY", "sk-test")
+        config._problems.clear()
+
+        assert config.require_openai_api_key() == "sk-test"
+
+
+class TestLazyStartup:
+    def test_import_needs_no_key_and_no_sdks(self):
+        result = _run(
+            "import sys, src.chatbot\n"
+            "print(sorted(m for m in ('openai', 'httpx', 'requests', 'numpy') if m in sys.modules))"
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    def test_malformed_value_falls_back_until_validated(self):
+        result = _run(
+            "from src import config\n"
+            "print(config.MAX_CALL_SESSIONS)\n"
+            "config.validate_config(require_openai_key=False)",
+            MAX_CALL_SESSIONS="lots",
+        )
+        assert result.stdout.strip() == "5000"
+        assert "MAX_CALL_SESSIONS must be an integer, got 'lots'" in result.stderr
+
+    def test_llm_without_key_fails_on_first_client_use(self):
+        result = _run(
+            "from src.llm import ChatbotLLM\n"
+            "llm = ChatbotLLM()\n"
+            "llm.client",
+        )
+        assert "OPENAI_API_KEY environment variable is required" in result.stderr
+
+
+class TestSharedClient:
+    def test_llms_share_default_client(self, monkeypatch):
+        import src.llm_clients as llm_clients
+
+        created = []
+        monkeypatch.setattr(llm_clients, "CLIENT_REGISTRY", llm_clients.LLMClientRegistry())
+        monkeypatch.setattr("src.llm.CLIENT_REGISTRY", llm_clients.CLIENT_REGISTRY)
+        monkeypatch.setattr(
+            llm_clients,
+            "create_openai_client",
+            lambda *args, **kwargs: created.append(object()) or created[-1],
+        )
+
+        first, second = ChatbotLLM(), ChatbotLLM()
+        assert first.client is second.client
+        assert len(created) == 1
+
+    def test_explicit_client_is_used(self):
+        client = object()
+        assert ChatbotLLM(client=client).client is client
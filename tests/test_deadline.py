@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from src.chatbot import PharmacyChatbot
+from src.deadline import MIN_TIMEOUT, Deadline, time_left
+from src.function_calls import FunctionHandler, is_function_error
+from src.http_session import PooledSession
+from src.integration import PharmacyDirectoryCache
+from src.llm import EMPTY_FOLLOWUP, FALLBACK_RESPONSE, ChatbotLLM
+from src.llm_routing import ModelRouter
+
+
+class TestDeadline:
+
+    def setup_method(self):
+        self.now = 100.0
+        self.deadline = Deadline(2, clock=lambda: self.now)
+
+    def test_remaining_counts_down_and_stops_at_zero(self):
+        assert self.deadline.remaining() == 2
+        self.now = 101.5
+        assert self.deadline.remaining() == 0.5
+        self.now = 103
+        assert self.deadline.remaining() == 0
+        assert self.deadline.expired
+
+    def test_timeout_capped_by_stage_limit(self):
+        assert self.deadline.timeout(0.5) == 0.5
+        assert self.deadline.timeout(5) == 2
+
+    def test_timeout_never_zero(self):
+        self.now = 103
+        assert self.deadline.timeout() == MIN_TIMEOUT
+
+    def test_cap_connect_read_pair(self):
+        self.now = 101
+        assert self.deadline.cap((3.05, 0.5)) == (1, 0.5)
+        assert self.deadline.cap(None) == 1
+
+    def test_time_left_without_deadline(self):
+        assert time_left(None, 3) == 3
+        assert time_left(None) is None
+
+
+class TestDeadlinePropagation:
+
+    def test_session_stops_retrying_at_deadline(self):
+        session = PooledSession(max_retries=5, backoff_base=1)
+        session._session = Mock()
+        session._session.get.side_effect = requests.exceptions.ConnectionError("reset")
+        deadline = Deadline(0.05)
+
+        started = time.monotonic()
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get("http://test-api.com/pharmacies", timeout=(3.05, 10), deadline=deadline)
+
+        assert time.monotonic() - started < 0.5
+        assert session._session.get.call_count < 6
+        connect, read = session._session.get.call_args_list[0].kwargs["timeout"]
+        assert read <= 0.05
+
+    def test_cold_cache_query_skipped_after_deadline(self):
+        query = Mock(return_value={"name": "Test Pharmacy"})
+        cache = PharmacyDirectoryCache(lambda: [], query=query)
+
+        with patch.object(cache, "refresh_async"):
+            assert cache.lookup("555-123-4567", Deadline(0)) is None
+            assert cache.lookup("555-123-4567", Deadline(5)) == {"name": "Test Pharmacy"}
+
+        query.assert_called_once()
+
+    def test_llm_request_skipped_after_deadline(self):
+        client = Mock()
+        llm = ChatbotLLM(client=client, router=ModelRouter(fallback_model=None))
+
+        assert llm.generate_response("Hi", "System prompt", deadline=Deadline(0)) == FALLBACK_RESPONSE
+        assert llm.generate_followup("System prompt", deadline=Deadline(0)) == EMPTY_FOLLOWUP
+        client.chat.completions.create.assert_not_called()
+
+    def test_llm_budget_capped_by_deadline(self):
+        router = ModelRouter(fallback_model=None, budget=8)
+        router.complete = Mock(side_effect=TimeoutError())
+        llm = ChatbotLLM(client=Mock(), router=router)
+
+        llm.generate_response("Hi", "System prompt", deadline=Deadline(0.5))
+
+        budget = router.complete.call_args.args[2]
+        assert 0 < budget <= 0.5
+
+    def test_inline_side_effect_deferred_after_deadline(self):
+        handler = FunctionHandler()
+        # Side effects run inline, as with ACTION_WORKERS=0
+        handler.executor = None
+        delivered = threading.Event()
+        handler._deliver_email = lambda record: delivered.set()
+
+        result = handler.execute_function(
+            "send_email",
+            {"email": "a@b.com", "subject": "Info", "content": "Hello"},
+            Deadline(0),
+        )
+
+        assert "queued" in result
+        assert delivered.wait(5)
+        [status] = handler.get_action_statuses()
+        assert status["kind"] == "email"
+
+
+class TestChatbotTurnDeadline:
+
+    def setup_method(self):
+        self.api = Mock()
+        self.api.get_pharmacy_by_phone.return_value = None
+        self.llm = Mock()
+        self.llm.last_reply = None
+        self.handler = FunctionHandler()
+        self.handler.executor = None
+
+    def test_slow_lookup_bounded_by_turn_deadline(self):
+        release = threading.Event()
+        self.api.get_pharmacy_by_phone.side_effect = lambda phone, deadline=None: release.wait(5)
+        self.llm.generate_response.return_value = {"content": "Welcome!", "function_call": None}
+        chatbot = PharmacyChatbot(
+            self.api, self.llm, self.handler, lookup_timeout=5, turn_deadline=0.1
+        )
+
+        started = time.monotonic()
+        try:
+            assert chatbot.start_call("555-123-4567") == "Welcome!"
+        finally:
+            release.set()
+
+        assert time.monotonic() - started < 1
+        assert chatbot.conversation_state == "identifying"
+        deadline = self.llm.generate_response.call_args.kwargs["deadline"]
+        assert deadline.budget == 0.1
+
+    def test_running_tool_calls_reported_as_running(self):
+        release = threading.Event()
+        self.handler.register(
+            "slow_check", lambda: release.wait(5) and "done", {"type": "object", "properties": {}}
+        )
+        self.llm.generate_response.return_value = {
+            "content": None,
+            "function_calls": [
+                {"id": "call_1", "name": "slow_check", "arguments": {}},
+                {"id": "call_2", "name": "collect_pharmacy_info",
+                 "arguments": {"name": "Corner Drugs", "phone": "555-000-1111"}},
+            ],
+        }
+        chatbot = PharmacyChatbot(
+            self.api, self.llm, self.handler, tool_followup=False, turn_deadline=0.2
+        )
+        chatbot.conversation_state = "new_customer"
+
+        started = time.monotonic()
+        try:
+            reply = chatbot.continue_conversation("Here are our details")
+        finally:
+            release.set()
+
+        assert time.monotonic() - started < 1
+        assert "slow_check is still running" in reply
+        assert chatbot.conversation_state == "known_customer"
+        slow_result = self.llm.add_tool_result.call_args_list[0].args[1]
+        assert not is_function_error(slow_result)
+
+    def test_calls_not_started_by_the_deadline_are_cancelled(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_check(host):
+            calls.append(host)
+            release.wait(5)
+            return f"checked {host}"
+
+        self.handler.register(
+            "slow_check", slow_check,
+            {"type": "object", "properties": {"host": {"type": "string"}}, "required": ["host"]},
+        )
+        self.llm.generate_response.return_value = {
+            "content": None,
+            "function_calls": [
+                {"id": "call_1", "name": "slow_check", "arguments": {"host": "a"}},
+                {"id": "call_2", "name": "slow_check", "arguments": {"host": "b"}},
+            ],
+        }
+        chatbot = PharmacyChatbot(
+            self.api, self.llm, self.handler, tool_followup=False, turn_deadline=0.2
+        )
+
+        try:
+            chatbot.continue_conversation("Check both")
+        finally:
+            release.set()
+        time.sleep(0.1)
+
+        first, second = [c.args[1] for c in self.llm.add_tool_result.call_args_list]
+        assert "still running" in first
+        assert json.loads(second)["error"] == "deadline_exceeded"
+        # The second call of the group never ran, even after the first finished
+        assert calls == ["a"]
+
+    def test_repeated_inline_side_effect_runs_once(self):
+        sent = []
+        self.handler._deliver_email = sent.append
+        arguments = {"email": "a@b.com", "subject": "Info", "content": "Hello"}
+
+        self.handler.execute_function("send_email", dict(arguments))
+        result = self.handler.execute_function("send_email", dict(arguments))
+
+        assert len(sent) == 1
+        assert "already on its way" in result
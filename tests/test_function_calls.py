@@ -1,5 +1,12 @@
+import json
 import pytest
-from src.function_calls import FunctionHandler
+from src.function_calls import (
+    FunctionHandler,
+    TOOL_PAYLOADS,
+    compile_validator,
+    get_tools_for_state,
+    is_function_error
+)
 from datetime import datetime
 
 class TestFunctionHandler:
@@ -85,6 +92,42 @@ class TestFunctionHandler:
         assert "schedule_callback" in function_names
         assert "collect_pharmacy_info" in function_names
         
+    def test_get_function_definitions_for_state(self):
+        returning = [f["name"] for f in self.handler.get_function_definitions("returning_customer")]
+        new = [f["name"] for f in self.handler.get_function_definitions("new_customer")]
+
+        assert "collect_pharmacy_info" not in returning
+        assert set(returning) == {"send_email", "schedule_callback"}
+        assert "collect_pharmacy_info" in new
+
+    def test_tools_built_once(self):
+        first = self.handler.get_tools()
+        second = FunctionHandler().get_tools()
+
+        assert first is second
+        assert first[0] is TOOL_PAYLOADS["send_email"]
+        assert first[0] == {"type": "function", "function": first[0]["function"]}
+        known = self.handler.get_tools_for_state("known_customer")
+        assert known is FunctionHandler().get_tools_for_state("known_customer")
+        assert known[0] is TOOL_PAYLOADS["send_email"]
+
+    def test_state_restriction_enforced_on_execution(self):
+        arguments = {"name": "Corner Drugs", "phone": "555-000-1111"}
+
+        result = self.handler.execute_function(
+            "collect_pharmacy_info", arguments, state="returning_customer"
+        )
+
+        assert json.loads(result)["error"] == "not_available"
+        assert len(self.handler.collected_leads) == 0
+        assert not is_function_error(
+            self.handler.execute_function("collect_pharmacy_info", arguments, state="new_customer")
+        )
+
+    def test_unknown_state_gets_all_tools(self):
+        assert len(get_tools_for_state("identifying")) == 3
+        assert len(get_tools_for_state(None)) == 3
+
     def test_get_summary_empty(self):
         summary = self.handler.get_summary()
         
@@ -116,4 +159,65 @@ class TestFunctionHandler:
         assert summary["leads_collected"] == 1
         assert len(summary["details"]["emails"]) == 1
         assert len(summary["details"]["callbacks"]) == 1
-        assert len(summary["details"]["leads"]) == 1
\ No newline at end of file
+        assert len(summary["details"]["leads"]) == 1
+
+class TestArgumentValidation:
+
+    def setup_method(self):
+        self.handler = FunctionHandler()
+
+    def test_missing_argument_returns_structured_error(self):
+        result = self.handler.execute_function("send_email", {"email": "a@b.com"})
+
+        error = json.loads(result)
+        assert is_function_error(result)
+        assert error["error"] == "invalid_arguments"
+        assert error["function"] == "send_email"
+        assert "missing required argument 'subject'" in error["problems"]
+        assert len(self.handler.sent_emails) == 0
+
+    def test_unknown_keys_stripped_and_scalars_coerced(self):
+        result = self.handler.execute_function("schedule_callback", {
+            "phone": 5551234567,
+            "preferred_time": " tomorrow ",
+            "urgency": "high"
+        })
+
+        assert "Callback scheduled" in result
+        assert self.handler.scheduled_callbacks[0]["phone"] == "5551234567"
+        assert self.handler.scheduled_callbacks[0]["preferred_time"] == "tomorrow"
+
+    def test_wrong_type_reported(self):
+        result = self.handler.execute_function("collect_pharmacy_info", {
+            "name": {"first": "Test"},
+            "phone": "555-123-4567"
+        })
+
+        assert json.loads(result)["problems"] == ["'name' must be a string, got dict"]
+
+    def test_non_object_arguments(self):
+        result = self.handler.execute_function("send_email", None)
+
+        assert json.loads(result)["problems"] == ["arguments must be a JSON object"]
+
+    def test_unknown_function_is_structured(self):
+        assert json.loads(self.handler.execute_function("fax", {}))["error"] == "unknown_function"
+
+    def test_compiled_validator_types(self):
+        validate = compile_validator({
+            "properties": {"count": {"type": "integer"}, "urgent": {"type": "boolean"}},
+            "required": ["count"]
+        })
+
+        assert validate({"count": "3", "urgent": "true"}) == ({"count": 3, "urgent": True}, [])
+        assert validate({"count": "3.5"})[1] == ["'count' must be an integer, got '3.5'"]
+
+    def test_registered_function(self):
+        self.handler.register(
+            "ping",
+            lambda host: f"pong from {host}",
+            {"properties": {"host": {"type": "string"}}, "required": ["host"]}
+        )
+
+        assert self.handler.execute_function("ping", {"host": "a", "extra": 1}) == "pong from a"
+        assert is_function_error(self.handler.execute_function("ping", {}))
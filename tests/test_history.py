@@ -0,0 +1,103 @@
+import pytest
+from src.history import ConversationHistory, count_tokens, summarize_messages
+
+
+def _turn(history, user_text, assistant_text):
+    history.append({"role": "user", "content": user_text})
+    history.append({"role": "assistant", "content": assistant_text})
+
+
+class TestConversationHistory:
+
+    def setup_method(self):
+        self.history = ConversationHistory(max_tokens=200, keep_recent_turns=2)
+
+    def test_short_history_kept_verbatim(self):
+        _turn(self.history, "Hi", "Hello!")
+
+        assert self.history.summary == ""
+        assert self.history.to_messages() == [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello!"}
+        ]
+
+    def test_old_turns_folded_into_summary(self):
+        for i in range(20):
+            _turn(self.history, f"Question {i} " + "x" * 100, f"Answer {i} " + "y" * 100)
+
+        messages = self.history.to_messages()
+
+        assert messages[0]["role"] == "system"
+        assert "Summary of the earlier conversation" in messages[0]["content"]
+        # The two most recent turns survive verbatim
+        assert messages[-1]["content"].startswith("Answer 19")
+        assert any(m["content"].startswith("Question 18") for m in messages)
+        assert self.history.messages[0]["role"] == "user"
+
+    def test_prompt_size_stays_bounded(self):
+        sizes = []
+        for i in range(50):
+            _turn(self.history, f"Question {i} " + "x" * 100, f"Answer {i} " + "y" * 100)
+            sizes.append(self.history.token_count)
+
+        assert max(sizes[10:]) - min(sizes[10:]) < 200
+        assert max(sizes) < 700
+
+    def test_recent_turns_never_summarized(self):
+        history = ConversationHistory(max_tokens=10, keep_recent_turns=2)
+        _turn(history, "a" * 200, "b" * 200)
+        _turn(history, "c" * 200, "d" * 200)
+
+        assert history.summary == ""
+        assert len(history) == 4
+
+    def test_function_results_trimmed(self):
+        history = ConversationHistory(max_function_result_chars=50)
+
+        history.append({"role": "function", "name": "send_email", "content": "z" * 500})
+
+        assert len(history.messages[0]["content"]) == 50
+        assert history.messages[0]["content"].endswith("...")
+
+    def test_custom_summarizer(self):
+        history = ConversationHistory(
+            max_tokens=50,
+            keep_recent_turns=1,
+            summarizer=lambda summary, dropped: f"{len(dropped)} messages dropped"
+        )
+        _turn(history, "a" * 200, "b" * 200)
+        _turn(history, "c" * 20, "d" * 20)
+
+        assert history.summary == "2 messages dropped"
+
+    def test_clear(self):
+        for i in range(20):
+            _turn(self.history, "x" * 100, "y" * 100)
+
+        self.history.clear()
+
+        assert self.history.to_messages() == []
+        assert self.history.token_count == 0
+
+
+class TestSummarizeMessages:
+
+    def test_labels_and_truncation(self):
+        summary = summarize_messages("", [
+            {"role": "user", "content": "We fill 500 scripts a day"},
+            {"role": "function", "name": "schedule_callback", "content": "Callback scheduled"},
+            {"role": "assistant", "content": "w " * 200}
+        ])
+
+        lines = summary.splitlines()
+        assert lines[0] == "- Caller: We fill 500 scripts a day"
+        assert lines[1] == "- Action schedule_callback: Callback scheduled"
+        assert len(lines[2]) < 200
+
+    def test_summary_is_bounded(self):
+        summary = ""
+        for i in range(200):
+            summary = summarize_messages(summary, [{"role": "user", "content": f"Message {i} " + "x" * 100}])
+
+        assert count_tokens(summary) <= 300
+        assert "Message 199" in summary
@@ -0,0 +1,105 @@
+import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+import requests
+from src.http_session import PooledSession
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPooledSession:
+
+    def setup_method(self):
+        self.session = PooledSession(max_retries=2)
+        self.session._session = Mock()
+
+    @patch('src.http_session.time.sleep')
+    def test_retries_connection_error_then_succeeds(self, mock_sleep):
+        ok_response = Mock(status_code=200)
+        self.session._session.get.side_effect = [
+            requests.exceptions.ConnectionError("reset"),
+            ok_response
+        ]
+
+        result = self.session.get("http://test-api.com/pharmacies")
+
+        assert result is ok_response
+        assert self.session._session.get.call_count == 2
+        assert mock_sleep.call_count == 1
+        assert self.session.stats.as_dict()["retries"] == 1
+
+    @patch('src.http_session.time.sleep')
+    def test_raises_after_retries_exhausted(self, mock_sleep):
+        self.session._session.get.side_effect = requests.exceptions.Timeout("timeout")
+
+        with pytest.raises(requests.exceptions.Timeout):
+            self.session.get("http://test-api.com/pharmacies")
+
+        assert self.session._session.get.call_count == 3
+
+    @patch('src.http_session.time.sleep')
+    def test_retryable_status_returned_when_exhausted(self, mock_sleep):
+        self.session._session.get.return_value = Mock(status_code=503)
+
+        result = self.session.get("http://test-api.com/pharmacies")
+
+        assert result.status_code == 503
+        assert self.session._session.get.call_count == 3
+
+    def test_client_error_not_retried(self):
+        self.session._session.get.return_value = Mock(status_code=404)
+
+        result = self.session.get("http://test-api.com/pharmacies")
+
+        assert result.status_code == 404
+        self.session._session.get.assert_called_once()
+
+    def test_per_attempt_timeout_passed(self):
+        self.session._session.get.return_value = Mock(status_code=200)
+
+        self.session.get("http://test-api.com/pharmacies", timeout=2)
+
+        self.session._session.get.assert_called_once_with("http://test-api.com/pharmacies", timeout=2)
+
+    def test_backoff_is_bounded(self):
+        for attempt in range(10):
+            assert 0 <= self.session._backoff(attempt) <= self.session.backoff_max
+
+
+class TestPooledSessionConnectionReuse:
+
+    def setup_method(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/pharmacies"
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        session = PooledSession()
+
+        for _ in range(3):
+            assert session.get(self.url).json() == []
+        session.close()
+
+        stats = session.stats.as_dict()
+        assert stats["requests"] == 3
+        assert stats["pool_misses"] == 1
+        assert stats["pool_hits"] == 2
@@ -1,15 +1,23 @@
 import pytest
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import Mock, call, patch
+import httpx
 import requests
-from src.integration import PharmacyAPIIntegration
+from src.integration import (
+    AsyncPharmacyAPIIntegration,
+    PharmacyAPIIntegration,
+    PharmacyDirectoryCache,
+    _phone_filter
+)
 
 class TestPharmacyAPIIntegration:
     
     def setup_method(self):
-        self.api = PharmacyAPIIntegration("http://test-api.com/pharmacies")
+        self.session = Mock()
+        self.api = PharmacyAPIIntegration("http://test-api.com/pharmacies", session=self.session)
         
-    @patch('src.integration.requests.get')
-    def test_get_pharmacy_by_phone_found(self, mock_get):
+    def test_get_pharmacy_by_phone_found(self):
+        mock_get = self.session.get
         # Mock successful API response
         mock_response = Mock()
         mock_response.json.return_value = [
@@ -37,10 +45,15 @@ class TestPharmacyAPIIntegration:
         assert result["name"] == "Test Pharmacy"
         assert result["phone"] == "555-123-4567"
         assert result["city"] == "Test City"
-        mock_get.assert_called_once_with("http://test-api.com/pharmacies", timeout=10)
+        # Cold cache: the lookup is a server-side query, the full load happens in the background
+        assert mock_get.call_args_list[0] == call(
+            "http://test-api.com/pharmacies", params={"phone": "4567"}, deadline=None
+        )
+        self.api.directory._refresh_thread.join()
+        assert self.api.directory.get("555-987-6543")["name"] == "Another Pharmacy"
         
-    @patch('src.integration.requests.get')  
-    def test_get_pharmacy_by_phone_not_found(self, mock_get):
+    def test_get_pharmacy_by_phone_not_found(self):
+        mock_get = self.session.get
         # Mock API response with no matching pharmacy
         mock_response = Mock()
         mock_response.json.return_value = [
@@ -58,8 +71,8 @@ class TestPharmacyAPIIntegration:
         
         assert result is None
         
-    @patch('src.integration.requests.get')
-    def test_get_pharmacy_by_phone_api_error(self, mock_get):
+    def test_get_pharmacy_by_phone_api_error(self):
+        mock_get = self.session.get
         # Mock API request exception
         mock_get.side_effect = requests.exceptions.RequestException("API Error")
         
@@ -67,8 +80,8 @@ class TestPharmacyAPIIntegration:
         
         assert result is None
         
-    @patch('src.integration.requests.get')
-    def test_get_pharmacy_by_phone_timeout(self, mock_get):
+    def test_get_pharmacy_by_phone_timeout(self):
+        mock_get = self.session.get
         # Mock timeout exception
         mock_get.side_effect = requests.exceptions.Timeout("Request timeout")
         
@@ -76,8 +89,8 @@ class TestPharmacyAPIIntegration:
         
         assert result is None
         
-    @patch('src.integration.requests.get')
-    def test_get_all_pharmacies_success(self, mock_get):
+    def test_get_all_pharmacies_success(self):
+        mock_get = self.session.get
         # Mock successful API response
         mock_response = Mock()
         mock_response.json.return_value = [
@@ -93,11 +106,211 @@ class TestPharmacyAPIIntegration:
         assert result[0]["name"] == "Pharmacy 1"
         assert result[1]["name"] == "Pharmacy 2"
         
-    @patch('src.integration.requests.get')
-    def test_get_all_pharmacies_error(self, mock_get):
+    def test_get_all_pharmacies_error(self):
+        mock_get = self.session.get
         # Mock API error
         mock_get.side_effect = requests.exceptions.RequestException("API Error")
         
         result = self.api.get_all_pharmacies()
         
-        assert result == []
\ No newline at end of file
+        assert result == []
+
+class TestPharmacyDirectoryCache:
+
+    def setup_method(self):
+        self.pharmacies = [
+            {"id": "1", "name": "Test Pharmacy", "phone": "555-123-4567"},
+            {"id": "2", "name": "Another Pharmacy", "phone": "555-987-6543"}
+        ]
+        self.loader = Mock(return_value=self.pharmacies)
+        self.cache = PharmacyDirectoryCache(self.loader, ttl=300)
+
+    def test_lookup_loads_once(self):
+        assert self.cache.lookup("555-123-4567")["name"] == "Test Pharmacy"
+        assert self.cache.lookup("555-987-6543")["name"] == "Another Pharmacy"
+        assert self.cache.lookup("555-000-0000") is None
+
+        self.loader.assert_called_once()
+
+    def test_lookup_normalizes_formatting(self):
+        result = self.cache.lookup("(555) 123 4567")
+
+        assert result["name"] == "Test Pharmacy"
+
+    def test_stale_index_served_while_refreshing(self):
+        self.cache.refresh()
+        self.cache.ttl = 0
+        self.loader.return_value = [
+            {"id": "1", "name": "Renamed Pharmacy", "phone": "555-123-4567"}
+        ]
+
+        with patch.object(self.cache, "refresh_async") as mock_refresh_async:
+            result = self.cache.lookup("555-123-4567")
+
+        assert result["name"] == "Test Pharmacy"
+        mock_refresh_async.assert_called_once()
+
+        self.cache.refresh_async().join()
+        assert self.cache.lookup("555-123-4567")["name"] == "Renamed Pharmacy"
+
+    def test_failed_refresh_keeps_previous_index(self):
+        self.cache.refresh()
+        self.loader.side_effect = requests.exceptions.RequestException("API Error")
+
+        assert self.cache.refresh() is False
+        assert self.cache.lookup("555-123-4567")["name"] == "Test Pharmacy"
+
+    def test_failed_cold_load_retries_on_next_lookup(self):
+        self.loader.side_effect = [requests.exceptions.Timeout("timeout"), self.pharmacies]
+
+        assert self.cache.lookup("555-123-4567") is None
+        assert self.cache.lookup("555-123-4567")["name"] == "Test Pharmacy"
+        assert self.loader.call_count == 2
+
+    def test_malformed_rx_volume_does_not_fail_the_load(self):
+        self.pharmacies[0]["rx_volume"] = 1500
+        self.pharmacies[1]["rx_volume"] = ["not", "text"]
+
+        assert self.cache.refresh() is True
+        assert self.cache.lookup("555-123-4567")["volume_tier"] == "very_high"
+        assert self.cache.lookup("555-987-6543")["volume_tier"] is None
+
+
+class TestAsyncPharmacyAPIIntegration:
+
+    def _make_api(self, handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return AsyncPharmacyAPIIntegration("http://test-api.com/pharmacies", client=client)
+
+    def test_get_pharmacy_by_phone_found(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json=[
+                {"id": "1", "name": "Test Pharmacy", "phone": "555-123-4567"}
+            ])
+
+        api = self._make_api(handler)
+
+        async def lookups():
+            first = await api.get_pharmacy_by_phone("555-123-4567")
+            await api._refresh_task
+            second = await api.get_pharmacy_by_phone("555-999-9999")
+            await api.aclose()
+            return first, second
+
+        found, missing = asyncio.run(lookups())
+
+        assert found["name"] == "Test Pharmacy"
+        assert missing is None
+        # One phone query, then the background page load; warm lookups are local
+        assert requests_seen[0].url.params["phone"] == "4567"
+        assert requests_seen[1].url.params["page"] == "1"
+        assert sum("phone" in request.url.params for request in requests_seen) == 1
+
+    def test_split_last_digits_wait_for_the_full_load(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json=[
+                {"id": "1", "name": "Split Pharmacy", "phone": "555-000-1"}
+            ])
+
+        api = self._make_api(handler)
+
+        result = asyncio.run(api.get_pharmacy_by_phone("555-000-1"))
+
+        assert result["name"] == "Split Pharmacy"
+        assert all("phone" not in request.url.params for request in requests_seen)
+
+    def test_get_pharmacy_by_phone_api_error(self):
+        api = self._make_api(lambda request: httpx.Response(500))
+
+        result = asyncio.run(api.get_pharmacy_by_phone("555-123-4567"))
+
+        assert result is None
+        assert not api.directory.is_loaded
+
+    def test_get_all_pharmacies_error(self):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        api = self._make_api(handler)
+
+        assert asyncio.run(api.get_all_pharmacies()) == []
+
+
+class TestPagedDirectoryLoad:
+
+    def setup_method(self):
+        self.pharmacies = [
+            {"id": str(i), "name": f"Pharmacy {i}", "phone": f"555-000-{i:04d}"} for i in range(25)
+        ]
+        self.pages_requested = []
+
+        def get(url, params=None, **kwargs):
+            response = Mock(status_code=200)
+            response.raise_for_status.return_value = None
+            if "phone" in params:
+                response.json.return_value = [
+                    p for p in self.pharmacies if params["phone"] in p["phone"]
+                ]
+            else:
+                self.pages_requested.append(params["page"])
+                start = (params["page"] - 1) * params["limit"]
+                response.json.return_value = self.pharmacies[start:start + params["limit"]]
+            return response
+
+        self.session = Mock()
+        self.session.get.side_effect = get
+        self.api = PharmacyAPIIntegration("http://test-api.com/pharmacies", session=self.session)
+
+    def test_pages_streamed_in_order_until_short_page(self):
+        pharmacies = list(self.api.iter_pharmacies(page_size=10, concurrency=2))
+
+        assert [p["id"] for p in pharmacies] == [str(i) for i in range(25)]
+        assert sorted(self.pages_requested)[:3] == [1, 2, 3]
+
+    def test_iterator_is_lazy(self):
+        stream = self.api.iter_pharmacies(page_size=5, concurrency=2)
+
+        assert next(stream)["id"] == "0"
+        assert max(self.pages_requested) <= 2
+        stream.close()
+
+    def test_server_without_pagination_read_once(self):
+        response = Mock(status_code=200)
+        response.json.return_value = self.pharmacies
+        self.session.get.side_effect = None
+        self.session.get.return_value = response
+
+        assert len(list(self.api.iter_pharmacies(page_size=10, concurrency=3))) == 25
+
+    def test_phone_query_rechecks_digits(self):
+        assert self.api.query_by_phone("555-000-0001")["id"] == "1"
+        # "555-000-001" is a substring of several numbers but equals none of them
+        assert self.api.query_by_phone("555-000-001") is None
+
+    def test_split_last_digits_use_the_full_load(self):
+        self.pharmacies.append({"id": "split", "name": "Split Pharmacy", "phone": "+1 (555) 000-1"})
+        self.pharmacies = self.pharmacies[-10:]
+
+        result = self.api.get_pharmacy_by_phone("+1 (555) 000-1")
+
+        assert result["id"] == "split"
+        assert not any("phone" in c.kwargs["params"] for c in self.session.get.call_args_list)
+
+    @pytest.mark.parametrize("caller_id", ["", "Unknown", None])
+    def test_blank_caller_id_makes_no_request(self, caller_id):
+        assert self.api.get_pharmacy_by_phone(caller_id) is None
+        assert _phone_filter(caller_id) is None
+        self.session.get.assert_not_called()
+
+    def test_query_not_found_status(self):
+        self.session.get.side_effect = None
+        self.session.get.return_value = Mock(status_code=404)
+
+        assert self.api.query_by_phone("555-000-0001") is None
+
@@ -0,0 +1,94 @@
+import pytest
+from src.intents import FastPath, IntentClassifier, extract_slots
+from src.llm import ChatbotLLM
+
+
+class TestIntentClassifier:
+
+    def setup_method(self):
+        self.classifier = IntentClassifier()
+
+    @pytest.mark.parametrize("text,intent", [
+        ("Thanks!", "thanks"),
+        ("Thank you so much.", "thanks"),
+        ("ok, thank you", "thanks"),
+        ("Bye", "goodbye"),
+        ("Thanks, that's all for now.", "goodbye"),
+        ("ok thanks, bye", "goodbye"),
+        ("Sorry, can you repeat that?", "repeat"),
+        ("Pardon?", "repeat"),
+    ])
+    def test_phrases(self, text, intent):
+        assert self.classifier.classify(text).name == intent
+
+    @pytest.mark.parametrize("text", [
+        "ok",
+        "sure",
+        "Thanks, and can you email me?",
+        "We fill 500 a day",
+        "Thanks for 2 things",
+        "",
+    ])
+    def test_needs_llm(self, text):
+        assert self.classifier.classify(text) is None
+
+    def test_bare_answers_extract_slots(self):
+        email = self.classifier.classify("My email is owner@pharmacy.com.")
+        phone = self.classifier.classify("It's (555) 123-4567")
+
+        assert email == ("provide_email", {"email": "owner@pharmacy.com"})
+        assert phone == ("provide_phone", {"phone": "(555) 123-4567"})
+
+    def test_custom_phrases(self):
+        classifier = IntentClassifier(phrases={"hold": ("hold on", "one second")}, patterns={})
+
+        assert classifier.classify("Um, one second please").name == "hold"
+        assert classifier.classify("Thanks") is None
+
+
+class TestExtractSlots:
+
+    def test_email_and_phone_anywhere(self):
+        slots = extract_slots("Call 555-123-4567 or write to a@b.com, thanks")
+
+        assert slots == {"phone": "555-123-4567", "email": "a@b.com"}
+
+    def test_nothing_found(self):
+        assert extract_slots("We fill 500 a day") == {}
+
+
+class TestFastPath:
+
+    def test_answers_enabled_intents_only(self):
+        fast_path = FastPath(intents=("thanks",))
+
+        assert fast_path.answer("Thanks")[0] == "thanks"
+        assert fast_path.answer("Bye") is None
+        assert FastPath(intents=()).answer("Thanks") is None
+
+    def test_repeat_needs_previous_reply(self):
+        fast_path = FastPath(intents=("repeat",))
+
+        assert fast_path.answer("Say that again", last_reply="We can email you.") == (
+            "repeat", "Of course. We can email you."
+        )
+        assert fast_path.answer("Say that again") is None
+
+    def test_slot_templates(self):
+        fast_path = FastPath(intents=("provide_email",))
+
+        intent, reply = fast_path.answer("a@b.com")
+
+        assert intent == "provide_email"
+        assert "a@b.com" in reply
+
+    def test_llm_records_local_exchange(self):
+        llm = ChatbotLLM(client=object())
+
+        llm.add_exchange("Thanks", "You're welcome!")
+
+        assert llm.conversation_history[-2:] == [
+            {"role": "user", "content": "Thanks"},
+            {"role": "assistant", "content": "You're welcome!"},
+        ]
+        assert llm.last_reply == "You're welcome!"
@@ -0,0 +1,322 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock
+from src.function_calls import AVAILABLE_FUNCTIONS, get_tools_for_state
+from src.llm import FALLBACK_RESPONSE, AsyncChatbotLLM, ChatbotLLM
+from src.llm_routing import ModelRouter
+
+
+def _chunk(content=None, tool_calls=None):
+    delta = Mock(content=content, tool_calls=tool_calls)
+    return Mock(choices=[Mock(delta=delta)])
+
+
+def _tool_fragment(index, id=None, name=None, arguments=None):
+    function = Mock(arguments=arguments)
+    function.name = name
+    return Mock(index=index, id=id, function=function)
+
+
+class TestChatbotLLMStreaming:
+
+    def setup_method(self):
+        self.client = Mock()
+        self.llm = ChatbotLLM(client=self.client)
+
+    def test_stream_yields_content_deltas(self):
+        self.client.chat.completions.create.return_value = iter([
+            _chunk("Hello"),
+            _chunk(" there"),
+            _chunk("!")
+        ])
+
+        events = list(self.llm.generate_response_stream("Hi", "System prompt"))
+
+        deltas = [e["content"] for e in events if e["type"] == "delta"]
+        assert deltas == ["Hello", " there", "!"]
+        assert events[-1] == {
+            "type": "result",
+            "result": {
+                "content": "Hello there!", "function_call": None, "function_calls": [], "usage": None
+            }
+        }
+        assert self.client.chat.completions.create.call_args.kwargs["stream"] is True
+        assert self.llm.conversation_history[-1] == {"role": "assistant", "content": "Hello there!"}
+
+    def test_stream_assembles_tool_call_fragments(self):
+        self.client.chat.completions.create.return_value = iter([
+            _chunk(tool_calls=[_tool_fragment(0, id="call_1", name="send_email", arguments="")]),
+            _chunk(tool_calls=[_tool_fragment(0, arguments='{"email": "a@b.com", ')]),
+            _chunk(tool_calls=[_tool_fragment(0, arguments='"subject": "Hi", "content": "Info"}')]),
+        ])
+
+        events = list(self.llm.generate_response_stream("Email me", "System prompt", [{"name": "send_email"}]))
+
+        assert len(events) == 1
+        assert events[0]["result"]["function_call"] == {
+            "name": "send_email",
+            "arguments": {"email": "a@b.com", "subject": "Hi", "content": "Info"}
+        }
+
+    def test_stream_records_time_to_first_token(self):
+        self.client.chat.completions.create.return_value = iter([_chunk("Hi")])
+
+        list(self.llm.generate_response_stream("Hi", "System prompt"))
+
+        timing = self.llm.last_timing
+        assert timing["time_to_first_token"] is not None
+        assert 0 <= timing["time_to_first_token"] <= timing["total"]
+
+    def test_stream_error_yields_fallback(self):
+        self.client.chat.completions.create.side_effect = RuntimeError("boom")
+
+        events = list(self.llm.generate_response_stream("Hi", "System prompt"))
+
+        assert events == [{
+            "type": "result",
+            "result": {
+                "content": "I apologize, but I'm experiencing technical difficulties. Please try again later.",
+                "function_call": None,
+                "function_calls": [],
+                "usage": None
+            }
+        }]
+
+
+    def test_failed_stream_keeps_heard_text_in_history(self):
+        def stream():
+            yield _chunk("Our delivery")
+            raise ConnectionError("connection reset")
+        self.client.chat.completions.create.return_value = stream()
+
+        events = list(self.llm.generate_response_stream("Do you deliver?", "System prompt"))
+
+        assert events[-1]["result"] == FALLBACK_RESPONSE
+        assert self.llm.conversation_history[-2:] == [
+            {"role": "user", "content": "Do you deliver?"},
+            {"role": "assistant", "content": "Our delivery"},
+        ]
+
+    def test_stream_bounded_by_total_budget(self):
+        def trickle():
+            for _ in range(20):
+                time.sleep(0.02)
+                yield _chunk("word ")
+        self.client.chat.completions.create.return_value = trickle()
+        llm = ChatbotLLM(client=self.client, router=ModelRouter(fallback_model=None, budget=0.1))
+
+        started = time.monotonic()
+        events = list(llm.generate_response_stream("Hi", "System prompt"))
+
+        assert time.monotonic() - started < 0.3
+        assert 0 < len(events) - 1 < 20
+        assert events[-1]["result"] == FALLBACK_RESPONSE
+
+    def test_async_stream_bounded_by_total_budget(self):
+        class Trickle:
+            closed = False
+            sent = 0
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                if self.sent == 20:
+                    raise StopAsyncIteration
+                self.sent += 1
+                await asyncio.sleep(0.02)
+                return _chunk("word ")
+
+            async def close(self):
+                self.closed = True
+
+        stream = Trickle()
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+        llm = AsyncChatbotLLM(client=client, router=ModelRouter(fallback_model=None, budget=0.1))
+
+        async def run():
+            return [event async for event in llm.generate_response_stream("Hi", "System prompt")]
+
+        events = asyncio.run(run())
+
+        assert stream.closed
+        assert events[-1]["result"] == FALLBACK_RESPONSE
+        assert llm.conversation_history[-1]["content"].startswith("word word")
+
+    def test_stalled_stream_fails_at_the_budget(self):
+        release, closed = threading.Event(), threading.Event()
+
+        def stalled():
+            try:
+                yield _chunk("Our delivery")
+                release.wait(5)
+                yield _chunk(" runs daily")
+            finally:
+                closed.set()
+        self.client.chat.completions.create.return_value = stalled()
+        llm = ChatbotLLM(client=self.client, router=ModelRouter(fallback_model=None, budget=0.2))
+
+        started = time.monotonic()
+        try:
+            events = list(llm.generate_response_stream("Do you deliver?", "System prompt"))
+        finally:
+            release.set()
+
+        assert time.monotonic() - started < 1
+        assert events[-1]["result"] == FALLBACK_RESPONSE
+        # The reader closes the stream once its blocked read returns
+        assert closed.wait(5)
+
+    def test_abandoned_stream_is_closed(self):
+        closed = threading.Event()
+
+        def words():
+            try:
+                for _ in range(5):
+                    yield _chunk("word ")
+            finally:
+                closed.set()
+        self.client.chat.completions.create.return_value = words()
+
+        events = self.llm.generate_response_stream("Hi", "System prompt")
+        assert next(events)["content"] == "word "
+        events.close()
+
+        assert closed.wait(5)
+
+    def test_async_stalled_stream_fails_at_the_budget_and_closes(self):
+        class Stalled:
+            closed = False
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                await asyncio.sleep(5)
+                return _chunk("late")
+
+            async def close(self):
+                self.closed = True
+
+        stream = Stalled()
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+        llm = AsyncChatbotLLM(client=client, router=ModelRouter(fallback_model=None, budget=0.1))
+
+        async def run():
+            return [event async for event in llm.generate_response_stream("Hi", "System prompt")]
+
+        started = time.monotonic()
+        events = asyncio.run(run())
+
+        assert time.monotonic() - started < 1
+        assert stream.closed
+        assert events[-1]["result"] == FALLBACK_RESPONSE
+
+    def test_async_abandoned_stream_is_closed(self):
+        class Words:
+            closed = False
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                return _chunk("word ")
+
+            async def close(self):
+                self.closed = True
+
+        stream = Words()
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+        llm = AsyncChatbotLLM(client=client)
+
+        async def run():
+            events = llm.generate_response_stream("Hi", "System prompt")
+            first = await events.__anext__()
+            await events.aclose()
+            return first
+
+        assert asyncio.run(run())["content"] == "word "
+        assert stream.closed
+
+
+class TestChatbotLLMRequest:
+
+    def setup_method(self):
+        self.llm = ChatbotLLM(client=Mock())
+
+    def test_prebuilt_tools_sent_as_is(self):
+        tools = get_tools_for_state("returning_customer")
+
+        kwargs = self.llm._build_request("Hi", "System prompt", tools)
+
+        assert all(sent is built for sent, built in zip(kwargs["tools"], tools))
+        assert kwargs["tool_choice"] == "auto"
+
+    def test_raw_function_definitions_wrapped(self):
+        kwargs = self.llm._build_request("Hi", "System prompt", AVAILABLE_FUNCTIONS)
+
+        assert kwargs["tools"][0] == {"type": "function", "function": AVAILABLE_FUNCTIONS[0]}
+
+    def test_context_prompt_follows_history(self):
+        self.llm.history.append({"role": "user", "content": "Earlier"})
+
+        kwargs = self.llm._build_request("Now", "System prompt", context_prompt="Context")
+
+        assert [m["content"] for m in kwargs["messages"]] == ["System prompt", "Earlier", "Context", "Now"]
+
+    def test_followup_request_has_no_user_message(self):
+        self.llm.history.append({"role": "user", "content": "Email me"})
+
+        kwargs = self.llm._build_request(None, "System prompt", get_tools_for_state("new_customer"))
+
+        assert kwargs["messages"][-1]["role"] == "user"
+        assert kwargs["messages"][-1]["content"] == "Email me"
+        assert len(kwargs["messages"]) == 2
+        assert kwargs["tool_choice"] == "none"
+
+
+class TestChatbotLLMToolCalls:
+
+    def setup_method(self):
+        self.client = Mock()
+        self.llm = ChatbotLLM(client=self.client)
+
+    def _tool_call(self, id, name, arguments):
+        function = Mock(arguments=arguments)
+        function.name = name
+        return Mock(id=id, type="function", function=function)
+
+    def test_every_tool_call_returned_with_id(self):
+        message = Mock(content=None, tool_calls=[
+            self._tool_call("call_1", "collect_pharmacy_info", '{"name": "A", "phone": "1"}'),
+            self._tool_call("call_2", "schedule_callback", '{"phone": "1", "preferred_time": "now"}'),
+        ])
+        self.client.chat.completions.create.return_value = Mock(choices=[Mock(message=message)], usage=None)
+
+        result = self.llm.generate_response("Hi", "System prompt")
+
+        assert [call["id"] for call in result["function_calls"]] == ["call_1", "call_2"]
+        assert result["function_call"]["name"] == "collect_pharmacy_info"
+        assistant = self.llm.conversation_history[-1]
+        assert [call["id"] for call in assistant["tool_calls"]] == ["call_1", "call_2"]
+
+    def test_tool_results_answer_calls_by_id(self):
+        self.llm.add_tool_result("call_1", "Sent")
+
+        assert self.llm.conversation_history[-1] == {
+            "role": "tool", "tool_call_id": "call_1", "content": "Sent"
+        }
+
+    def test_malformed_arguments_do_not_fail_the_turn(self):
+        message = Mock(content="Sure.", tool_calls=[self._tool_call("call_1", "send_email", '{"email": ')])
+        self.client.chat.completions.create.return_value = Mock(choices=[Mock(message=message)], usage=None)
+
+        result = self.llm.generate_response("Email me", "System prompt")
+
+        assert result["content"] == "Sure."
+        assert result["function_calls"][0]["arguments"] is None
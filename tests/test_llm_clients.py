@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from src.llm import AsyncChatbotLLM, ChatbotLLM
+from src.llm_clients import LLMClientRegistry, LLMPoolStats, create_openai_client
+from src.mock_servers import MockOpenAIServer
+
+
+class TestLLMPoolStats:
+
+    def test_counts_in_flight_and_peak(self):
+        stats = LLMPoolStats(max_connections=4)
+        stats.record_start()
+        stats.record_start()
+        stats.record_finish()
+
+        snapshot = stats.as_dict()
+        assert snapshot["requests"] == 2
+        assert snapshot["in_flight"] == 1
+        assert snapshot["peak_in_flight"] == 2
+        assert snapshot["peak_utilization"] == 0.5
+
+    def test_new_connections_counted_once(self):
+        class Connection:
+            def __init__(self, idle):
+                self.idle = idle
+
+            def is_idle(self):
+                return self.idle
+
+        stats = LLMPoolStats()
+        first, second = Connection(True), Connection(False)
+        stats.observe_pool([first])
+        stats.observe_pool([first, second])
+        for _ in range(3):
+            stats.record_start()
+
+        snapshot = stats.as_dict()
+        assert snapshot["pool_misses"] == 2
+        assert snapshot["pool_hits"] == 1
+        assert snapshot["open_connections"] == 2
+        assert snapshot["idle_connections"] == 1
+
+
+class TestLLMClientRegistry:
+
+    def setup_method(self):
+        self.server = MockOpenAIServer(latency="fixed:0.02").start()
+        self.registry = LLMClientRegistry(max_connections=4, max_keepalive_connections=4)
+
+    def teardown_method(self):
+        self.registry.close()
+        self.server.stop()
+
+    def test_one_client_per_endpoint(self):
+        client = self.registry.get("mock-key", self.server.api_base_url)
+
+        assert self.registry.get("mock-key", self.server.api_base_url) is client
+        assert self.registry.get("other-key", self.server.api_base_url) is not client
+
+    def test_connections_reused_across_llms(self):
+        client = self.registry.get("mock-key", self.server.api_base_url)
+
+        def call(_):
+            llm = ChatbotLLM(client=client)
+            return llm.generate_response("Hi", "System prompt")["content"]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            replies = list(pool.map(call, range(24)))
+
+        [stats] = self.registry.stats()
+        assert all(replies)
+        assert stats["requests"] == 24
+        assert stats["in_flight"] == 0
+        # The pool never opens more than its limit; extra requests queue for it
+        assert stats["pool_misses"] <= 4
+        assert stats["pool_hits"] >= 20
+        assert stats["open_connections"] <= 4
+        assert stats["peak_utilization"] > 1
+
+    def test_streamed_request_finishes_when_body_closes(self):
+        llm = ChatbotLLM(client=self.registry.get("mock-key", self.server.api_base_url))
+
+        events = list(llm.generate_response_stream("Hi", "System prompt"))
+
+        assert events[-1]["result"]["content"]
+        assert self.registry.stats()[0]["in_flight"] == 0
+
+    def test_abandoned_stream_returns_its_connection(self):
+        llm = ChatbotLLM(client=self.registry.get("mock-key", self.server.api_base_url))
+
+        events = llm.generate_response_stream("Hi", "System prompt")
+        assert next(events)["type"] == "delta"
+        events.close()
+        # The rest of the body is drained in the background before the response closes
+        waited = time.monotonic() + 5
+        while self.registry.stats()[0]["in_flight"] and time.monotonic() < waited:
+            time.sleep(0.01)
+
+        assert self.registry.stats()[0]["in_flight"] == 0
+        assert llm.generate_response("Hi", "System prompt")["content"]
+        stats = self.registry.stats()[0]
+        assert stats["pool_misses"] == 1
+        assert stats["pool_hits"] == 1
+
+    @patch("src.llm.CLIENT_REGISTRY")
+    def test_async_clients_shared_per_loop(self, mock_registry):
+        mock_registry.get_async = self.registry.get_async
+
+        async def use_registry():
+            first, second = AsyncChatbotLLM(api_key="mock-key"), AsyncChatbotLLM(api_key="mock-key")
+            result = await first.generate_response("Hi", "System prompt")
+            await first.aclose()
+            # The shared client survives an LLM closing
+            assert not second.client.is_closed()
+            assert first.client is second.client
+            client = first.client
+            await self.registry.aclose()
+            return client, result
+
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": self.server.api_base_url}):
+            client, result = asyncio.run(use_registry())
+            other_loop_client, _ = asyncio.run(use_registry())
+
+        assert other_loop_client is not client
+        assert result["content"]
+
+    def test_http2_falls_back_without_h2(self):
+        with patch("src.llm_clients.importlib.util.find_spec", return_value=None):
+            from src.llm_clients import _http2_available
+
+            _http2_available.cache_clear()
+            try:
+                client = create_openai_client("mock-key", self.server.api_base_url, http2=True)
+                llm = ChatbotLLM(client=client)
+                assert llm.generate_response("Hi", "System prompt")["content"]
+            finally:
+                _http2_available.cache_clear()
@@ -0,0 +1,278 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.llm import FALLBACK_RESPONSE, ChatbotLLM
+from src.llm_routing import (
+    MIN_LATENCY_SAMPLES,
+    CircuitBreaker,
+    LLMUnavailableError,
+    ModelRouter,
+    is_transient_error,
+)
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _completion(model):
+    message = SimpleNamespace(content=f"Reply from {model}", tool_calls=None)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None, model=model)
+
+
+class FakeClient:
+    """Chat-completions client whose latency and errors are set per model."""
+
+    def __init__(self, delays=None, errors=None):
+        self.delays = delays or {}
+        self.errors = errors or {}
+        self.models = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, timeout=None, **kwargs):
+        self.models.append(model)
+        delay = self.delays.get(model, 0)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Request timed out")
+        time.sleep(delay)
+        if model in self.errors:
+            raise self.errors[model]
+        return _completion(model)
+
+
+class AsyncFakeClient(FakeClient):
+
+    async def create(self, model, timeout=None, **kwargs):
+        self.models.append(model)
+        await asyncio.sleep(self.delays.get(model, 0))
+        if model in self.errors:
+            raise self.errors[model]
+        return _completion(model)
+
+
+class TestCircuitBreaker:
+
+    def setup_method(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=lambda: self.now)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        assert self.breaker.allow()
+        self.breaker.record_failure()
+
+        assert self.breaker.state == "open"
+        assert not self.breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        assert self.breaker.state == "closed"
+
+    def test_one_probe_after_cooldown(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+
+        assert self.breaker.state == "half_open"
+        assert self.breaker.allow()
+        assert not self.breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        self.breaker.allow()
+        self.breaker.record_failure()
+
+        assert self.breaker.state == "open"
+        self.now = 20
+        assert self.breaker.allow()
+        self.breaker.record_success()
+        assert self.breaker.state == "closed"
+
+    def test_released_probe_lets_the_next_one_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        assert self.breaker.allow()
+
+        self.breaker.release_probe()
+
+        assert self.breaker.state == "half_open"
+        assert self.breaker.allow()
+
+
+class TestIsTransientError:
+
+    def test_rate_limits_and_server_errors(self):
+        assert is_transient_error(_StatusError(429))
+        assert is_transient_error(_StatusError(503))
+        assert is_transient_error(TimeoutError())
+
+    def test_bad_requests_are_not(self):
+        assert not is_transient_error(_StatusError(400))
+        assert not is_transient_error(ValueError("bad arguments"))
+
+
+class TestModelRouter:
+
+    def setup_method(self):
+        self.request = {"model": "primary", "messages": []}
+
+    def test_fast_primary_is_not_hedged(self):
+        router = ModelRouter(fallback_model="fallback", budget=1, hedge_delay=0.2)
+        client = FakeClient()
+
+        response, model = router.complete(client, self.request)
+
+        assert model == "primary"
+        assert client.models == ["primary"]
+
+    def test_slow_primary_is_hedged_to_fallback(self):
+        router = ModelRouter(fallback_model="fallback", budget=2, hedge_delay=0.05)
+        client = FakeClient(delays={"primary": 0.5})
+
+        started = time.monotonic()
+        response, model = router.complete(client, self.request)
+
+        assert model == "fallback"
+        assert response.choices[0].message.content == "Reply from fallback"
+        assert time.monotonic() - started < 0.4
+
+    def test_primary_failure_hedges_immediately(self):
+        router = ModelRouter(fallback_model="fallback", budget=2, hedge_delay=1)
+        client = FakeClient(errors={"primary": _StatusError(500)})
+
+        started = time.monotonic()
+        _, model = router.complete(client, self.request)
+
+        assert model == "fallback"
+        assert time.monotonic() - started < 0.5
+
+    def test_budget_bounds_the_wait(self):
+        router = ModelRouter(fallback_model=None, budget=0.1)
+        client = FakeClient(delays={"primary": 1})
+
+        started = time.monotonic()
+        with pytest.raises(LLMUnavailableError):
+            router.complete(client, self.request)
+        assert time.monotonic() - started < 0.5
+
+    def test_error_raised_when_every_model_fails(self):
+        router = ModelRouter(fallback_model=None, budget=1)
+        client = FakeClient(errors={"primary": _StatusError(400)})
+
+        with pytest.raises(_StatusError):
+            router.complete(client, self.request)
+
+    def test_open_circuit_routes_to_fallback(self):
+        router = ModelRouter(fallback_model="fallback", budget=1, failure_threshold=2, cooldown=60)
+        router.breaker("primary").record_failure()
+        router.breaker("primary").record_failure()
+        client = FakeClient()
+
+        _, model = router.complete(client, self.request)
+
+        assert model == "fallback"
+        assert client.models == ["fallback"]
+
+    def test_open_circuit_without_fallback_fails_fast(self):
+        router = ModelRouter(fallback_model=None, failure_threshold=1, cooldown=60)
+        router.breaker("primary").record_failure()
+
+        with pytest.raises(LLMUnavailableError):
+            router.pick_models("primary")
+
+    def test_bad_requests_do_not_open_the_circuit(self):
+        router = ModelRouter(fallback_model=None, budget=1, failure_threshold=1)
+        client = FakeClient(errors={"primary": _StatusError(400)})
+
+        with pytest.raises(_StatusError):
+            router.complete(client, self.request)
+        assert router.breaker("primary").state == "closed"
+
+    def test_hedge_delay_follows_observed_latency(self):
+        router = ModelRouter(hedge_percentile=95, hedge_delay=2)
+        assert router.hedge_delay("primary") == 2
+
+        for i in range(MIN_LATENCY_SAMPLES):
+            router.record_success("primary", 0.1 + i * 0.01)
+
+        assert router.hedge_delay("primary") == pytest.approx(0.28)
+
+    def test_async_hedge_cancels_the_loser(self):
+        router = ModelRouter(fallback_model="fallback", budget=2, hedge_delay=0.05)
+        client = AsyncFakeClient(delays={"primary": 1})
+
+        async def run():
+            started = time.monotonic()
+            result = await router.acomplete(client, self.request)
+            return result, time.monotonic() - started
+
+        (_, model), elapsed = asyncio.run(run())
+
+        assert model == "fallback"
+        assert elapsed < 0.5
+        # The cancelled primary request neither succeeded nor failed
+        assert router.breaker("primary").state == "closed"
+        assert router.latency("primary").percentile(50) is None
+
+    def test_half_open_probe_that_loses_the_hedge_is_released(self):
+        router = ModelRouter(
+            fallback_model="fallback", budget=2, hedge_delay=0.05, failure_threshold=1, cooldown=0
+        )
+        router.breaker("primary").record_failure()
+        client = AsyncFakeClient(delays={"primary": 1})
+
+        (_, model) = asyncio.run(router.acomplete(client, self.request))
+
+        assert model == "fallback"
+        assert router.breaker("primary").state == "half_open"
+        # The cancelled probe did not keep the primary blocked
+        assert router.pick_models("primary")[0] == "primary"
+
+
+class TestChatbotLLMRouting:
+
+    def test_hedged_reply_reports_fallback_model(self):
+        router = ModelRouter(fallback_model="fallback", budget=2, hedge_delay=0.05)
+        llm = ChatbotLLM(model="primary", client=FakeClient(delays={"primary": 0.5}), router=router)
+
+        result = llm.generate_response("Hi", "System prompt")
+
+        assert result["content"] == "Reply from fallback"
+        assert llm.last_model == "fallback"
+
+    def test_exhausted_budget_returns_apology(self):
+        router = ModelRouter(fallback_model=None, budget=0.05)
+        llm = ChatbotLLM(model="primary", client=FakeClient(delays={"primary": 1}), router=router)
+
+        result = llm.generate_response("Hi", "System prompt")
+
+        assert result["content"] == FALLBACK_RESPONSE["content"]
+
+    def test_abandoned_stream_releases_half_open_probe(self):
+        def chunk(content):
+            delta = SimpleNamespace(content=content, tool_calls=None)
+            return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+
+        client = FakeClient()
+        client.chat.completions.create = lambda **kwargs: iter([chunk("Hel"), chunk("lo")])
+        router = ModelRouter(fallback_model=None, failure_threshold=1, cooldown=0)
+        router.breaker("primary").record_failure()
+        llm = ChatbotLLM(model="primary", client=client, router=router)
+
+        stream = llm.generate_response_stream("Hi", "System prompt")
+        assert next(stream)["content"] == "Hel"
+        stream.close()
+
+        assert router.breaker("primary").allow()
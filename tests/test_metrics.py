@@ -0,0 +1,99 @@
+import pytest
+import requests
+from src.function_calls import FunctionHandler
+from src.metrics import (
+    REGISTRY,
+    STAGE_DURATION,
+    MetricsRegistry,
+    conversation_state,
+    observe_stage,
+    span,
+    start_metrics_server
+)
+
+
+class TestHistogram:
+
+    def setup_method(self):
+        self.registry = MetricsRegistry()
+        self.histogram = self.registry.histogram(
+            "test_seconds", "Test histogram", ("stage",), buckets=(0.1, 1.0)
+        )
+
+    def test_cumulative_buckets(self):
+        self.histogram.observe(0.05, stage="a")
+        self.histogram.observe(0.5, stage="a")
+        self.histogram.observe(5.0, stage="a")
+
+        text = self.registry.render_prometheus()
+
+        assert "# TYPE test_seconds histogram" in text
+        assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in text
+        assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+        assert 'test_seconds_count{stage="a"} 3' in text
+        assert self.histogram.snapshot(stage="a") == {"count": 3, "sum": 5.55}
+
+    def test_same_name_different_type_rejected(self):
+        with pytest.raises(ValueError):
+            self.registry.counter("test_seconds", "Clash")
+
+    def test_reset_keeps_registration(self):
+        self.histogram.observe(0.5, stage="a")
+        self.registry.reset()
+
+        assert self.histogram.snapshot(stage="a")["count"] == 0
+        assert self.registry.histogram("test_seconds", "Test histogram") is self.histogram
+
+
+class TestSpans:
+
+    def setup_method(self):
+        REGISTRY.reset()
+
+    def test_span_uses_conversation_state(self):
+        with conversation_state("new_customer"):
+            with span("prompt_build"):
+                pass
+
+        assert STAGE_DURATION.snapshot(stage="prompt_build", state="new_customer")["count"] == 1
+
+    def test_explicit_state_wins(self):
+        with conversation_state("new_customer"):
+            observe_stage("llm_request", 0.2, state="identifying")
+
+        snapshot = STAGE_DURATION.snapshot(stage="llm_request", state="identifying")
+        assert snapshot == {"count": 1, "sum": 0.2}
+
+    def test_function_execution_labelled_by_function(self):
+        handler = FunctionHandler()
+
+        with conversation_state("returning_customer"):
+            handler.execute_function("send_email", {
+                "email": "a@b.com", "subject": "Hi", "content": "Info"
+            })
+
+        snapshot = STAGE_DURATION.snapshot(
+            stage="function_execution", state="returning_customer", function="send_email"
+        )
+        assert snapshot["count"] == 1
+
+
+class TestMetricsServer:
+
+    def test_serves_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.counter("test_total", "Test counter", ("kind",)).inc(kind="x")
+        server = start_metrics_server(0, registry=registry)
+        try:
+            port = server.server_address[1]
+            response = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=5)
+            missing = requests.get(f"http://127.0.0.1:{port}/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert 'test_total{kind="x"} 1' in response.text
+        assert missing.status_code == 404
@@ -0,0 +1,122 @@
+import pytest
+import requests
+from src.function_calls import get_tools_for_state
+from src.http_session import PooledSession
+from src.integration import PharmacyAPIIntegration
+from src.llm import ChatbotLLM, create_openai_client
+from src.mock_servers import (
+    LatencyModel,
+    MockOpenAIServer,
+    MockPharmacyServer,
+    generate_pharmacies
+)
+import loadtest
+
+
+class TestLatencyModel:
+
+    def test_fixed(self):
+        assert LatencyModel("fixed:0.25").sample() == 0.25
+
+    def test_uniform_within_bounds(self):
+        model = LatencyModel("uniform:0.1,0.2")
+        assert all(0.1 <= model.sample() <= 0.2 for _ in range(100))
+
+    def test_unknown_distribution(self):
+        with pytest.raises(ValueError):
+            LatencyModel("pareto:1")
+
+
+class TestMockOpenAIServer:
+
+    def setup_method(self):
+        self.server = MockOpenAIServer(tool_call_rate=1.0, seed=1).start()
+        self.llm = ChatbotLLM(client=create_openai_client("mock-key", self.server.api_base_url))
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def test_completion_with_tool_call(self):
+        result = self.llm.generate_response(
+            "Email me", "System prompt", get_tools_for_state("returning_customer")
+        )
+
+        assert result["content"]
+        assert result["function_call"]["name"] in ("send_email", "schedule_callback")
+        assert "phone" in result["function_call"]["arguments"] or "email" in result["function_call"]["arguments"]
+        assert len(self.server.requests) == 1
+
+    def test_streamed_completion(self):
+        events = list(self.llm.generate_response_stream(
+            "Email me", "System prompt", get_tools_for_state("returning_customer")
+        ))
+
+        deltas = "".join(e["content"] for e in events if e["type"] == "delta")
+        result = events[-1]["result"]
+        assert deltas == result["content"]
+        assert result["function_call"] is not None
+        assert self.llm.last_timing["time_to_first_token"] is not None
+        assert result["usage"].completion_tokens > 0
+
+
+class TestMockPharmacyServer:
+
+    def test_serves_synthetic_directory(self):
+        with MockPharmacyServer(count=500) as server:
+            pharmacies = requests.get(server.url, timeout=5).json()
+
+        assert len(pharmacies) == 500
+        assert len({p["phone"] for p in pharmacies}) == 500
+
+    def test_filters_and_pagination(self):
+        with MockPharmacyServer(count=500) as server:
+            page = requests.get(server.url, params={"page": 2, "limit": 100}, timeout=5).json()
+            match = requests.get(server.url, params={"phone": "555-000-0042"}, timeout=5).json()
+            missing = requests.get(server.url, params={"phone": "555-999-9999"}, timeout=5)
+
+        assert [p["id"] for p in page] == [str(i) for i in range(101, 201)]
+        assert [p["id"] for p in match] == ["43"]
+        assert missing.status_code == 404
+
+    def test_integration_lookup_payload_independent_of_size(self):
+        with MockPharmacyServer(count=5000) as server:
+            api = PharmacyAPIIntegration(server.url, session=PooledSession())
+            found = api.get_pharmacy_by_phone("555-000-0042")
+            api.directory._refresh_thread.join()
+
+            assert found["id"] == "43"
+            assert server.requests[0] == {"phone": "0042"}
+            assert api.directory.get("555-000-4999")["id"] == "5000"
+            assert api.directory.get("555-000-4999")["volume_tier"] is not None
+
+    def test_generate_pharmacies_deterministic(self):
+        assert generate_pharmacies(10, seed=3) == generate_pharmacies(10, seed=3)
+
+
+class TestLoadTest:
+
+    def test_small_run_reports_percentiles(self):
+        with MockOpenAIServer(tool_call_rate=0.5) as llm_server, \
+                MockPharmacyServer(count=100) as directory_server:
+            report = loadtest.run_load_test(
+                calls=6,
+                concurrency=3,
+                openai_base_url=llm_server.api_base_url,
+                pharmacy_api_url=directory_server.url,
+                script=["Hello", "Thanks"],
+                directory_size=100
+            )
+
+        assert report["errors"] == []
+        assert report["greeting_latency"]["count"] == 6
+        assert report["turn_latency"]["count"] == 12
+        assert report["turn_latency"]["p50"] <= report["turn_latency"]["p99"]
+        assert report["throughput_turns_per_s"] > 0
+        assert report["token_usage"]["completion_tokens"] > 0
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        assert loadtest.percentile(values, 50) == 50
+        assert loadtest.percentile(values, 99) == 99
+        assert loadtest.percentile([], 50) is None
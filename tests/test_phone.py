@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from src.mock_servers import generate_pharmacies
+from src.phone import PhoneIndex, normalize_phone
+
+
+class TestNormalizePhone:
+
+    @pytest.mark.parametrize("raw", [
+        "+1 (555) 123-4567",
+        "555.123.4567",
+        "555-123-4567",
+        "001 555 123 4567",
+        "1-555-123-4567",
+    ])
+    def test_formats_agree(self, raw):
+        assert normalize_phone(raw) == "15551234567"
+
+    def test_foreign_number_kept(self):
+        assert normalize_phone("+44 20 7946 0958") == "442079460958"
+
+    def test_other_default_country(self):
+        assert normalize_phone("020 7946 0958", country_code="44") == "02079460958"
+
+    def test_empty(self):
+        assert normalize_phone(None) == ""
+        assert normalize_phone("ext.") == ""
+
+
+class TestPhoneIndex:
+
+    def setup_method(self):
+        self.pharmacies = [
+            {"id": "1", "phone": "555-123-4567"},
+            {"id": "2", "phone": "+1 (555) 987-6543"},
+            {"id": "3", "phone": "555-222-1000"},
+            {"id": "4", "phone": "555-222-1002"},
+        ]
+        self.index = PhoneIndex(self.pharmacies)
+
+    def test_exact_match_across_formats(self):
+        match = self.index.match("(555) 987 6543")
+
+        assert match.pharmacy["id"] == "2"
+        assert match.kind == "exact"
+
+    def test_suffix_match_without_area_code(self):
+        match = self.index.match("123-4567")
+
+        assert match.pharmacy["id"] == "1"
+        assert match.kind == "suffix"
+
+    def test_fuzzy_match_on_transposition(self):
+        match = self.index.match("555-123-4576")
+
+        assert match.pharmacy["id"] == "1"
+        assert match.kind == "fuzzy"
+
+    def test_ambiguous_fuzzy_match_rejected(self):
+        # One digit away from both 555-222-1000 and 555-222-1002
+        assert self.index.match("555-222-1001") is None
+
+    def test_fuzzy_disabled(self):
+        index = PhoneIndex(self.pharmacies, fuzzy=False)
+
+        assert index.get("555-123-4576") is None
+        assert index.get("555-123-4567")["id"] == "1"
+
+    def test_first_duplicate_wins(self):
+        index = PhoneIndex(self.pharmacies + [{"id": "5", "phone": "5551234567"}])
+
+        assert len(index) == 4
+        assert index.get("555-123-4567")["id"] == "1"
+
+    def test_lookup_under_a_millisecond_on_large_directory(self):
+        index = PhoneIndex(generate_pharmacies(100_000))
+        numbers = [f"555-00{i % 10}-{i:04d}" for i in range(0, 10_000, 7)]
+        numbers += [f"555-999-{i:04d}" for i in range(0, 10_000, 7)]
+
+        start = time.perf_counter()
+        for number in numbers:
+            index.match(number)
+        average = (time.perf_counter() - start) / len(numbers)
+
+        assert average < 0.001
@@ -1,8 +1,10 @@
 import pytest
 from src.prompts import (
+    PromptBuilder,
     get_system_prompt,
     get_returning_customer_prompt, 
     get_new_customer_prompt,
+    get_identifying_caller_prompt,
     get_volume_discussion_prompt
 )
 
@@ -56,6 +58,13 @@ class TestPrompts:
         assert "name, location, rx volume" in prompt.lower()
         assert "challenges" in prompt.lower()
         
+    def test_get_identifying_caller_prompt(self):
+        prompt = get_identifying_caller_prompt()
+
+        assert "looking up" in prompt.lower()
+        assert "pharmesol" in prompt.lower()
+        assert "do not ask for their pharmacy details" in prompt.lower()
+
     def test_get_volume_discussion_prompt_with_volume(self):
         prompt = get_volume_discussion_prompt("2000/day")
         
@@ -71,4 +80,66 @@ class TestPrompts:
         assert "trending" in prompt.lower() 
         assert "pain points" in prompt.lower()
         # Should not contain volume-specific text when no volume provided
-        assert "with your current volume" not in prompt
\ No newline at end of file
+        assert "with your current volume" not in prompt
+
+    def test_get_volume_discussion_prompt_with_tier(self):
+        prompt = get_volume_discussion_prompt("1500/day", volume_tier="very_high")
+
+        assert "highest-volume pharmacies" in prompt
+        assert "smaller operation" not in get_volume_discussion_prompt("1500/day")
+
+
+class TestPromptBuilder:
+
+    def setup_method(self):
+        self.builder = PromptBuilder()
+        self.pharmacy = {
+            "id": "1",
+            "name": "Test Pharmacy",
+            "city": "Test City",
+            "rx_volume": "1500/day",
+            "phone": "555-123-4567"
+        }
+
+    def test_system_prompt_rendered_once(self):
+        assert self.builder.system_prompt == get_system_prompt()
+
+    def test_context_prompt_matches_templates(self):
+        assert self.builder.context_prompt("returning_customer", self.pharmacy) == \
+            get_returning_customer_prompt(self.pharmacy)
+        assert self.builder.context_prompt("new_customer") == get_new_customer_prompt()
+        assert self.builder.context_prompt("known_customer", self.pharmacy) == \
+            get_volume_discussion_prompt("1500/day")
+        assert self.builder.context_prompt("known_customer") == get_volume_discussion_prompt()
+
+    def test_context_prompt_memoized(self):
+        first = self.builder.context_prompt("returning_customer", self.pharmacy)
+        second = self.builder.context_prompt("returning_customer", dict(self.pharmacy))
+
+        assert first is second
+
+    def test_memo_cache_is_bounded(self):
+        builder = PromptBuilder(max_cached=2)
+        for volume in ["100/day", "200/day", "300/day"]:
+            builder.context_prompt("known_customer", {"rx_volume": volume})
+
+        assert len(builder._cache) == 2
+
+    def test_build_messages_keeps_stable_prefix(self):
+        history = [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello!"}
+        ]
+
+        returning = self.builder.build_messages(
+            "How are you?", history, self.builder.context_prompt("returning_customer", self.pharmacy)
+        )
+        new = self.builder.build_messages(
+            "How are you?", history, self.builder.context_prompt("new_customer")
+        )
+
+        assert returning[:3] == new[:3]
+        assert returning[0] == {"role": "system", "content": get_system_prompt()}
+        assert returning[3]["role"] == "system"
+        assert "Test Pharmacy" in returning[3]["content"]
+        assert returning[-1] == {"role": "user", "content": "How are you?"}
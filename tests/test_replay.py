@@ -0,0 +1,106 @@
+import io
+import json
+
+import pytest
+from src.function_calls import get_tools_for_state
+from src.mock_servers import generate_pharmacies
+from src.replay import ReplayClient, load_scripts, run_replay, stub_reply
+
+
+def _request(message, state="new_customer", **extra):
+    return dict(
+        {
+            "model": "gpt-4o",
+            "messages": [{"role": "user", "content": message}],
+            "tools": get_tools_for_state(state),
+        },
+        **extra,
+    )
+
+
+class TestStubLLM:
+
+    def test_reply_is_deterministic(self):
+        assert stub_reply(_request("Hello")) == stub_reply(_request("Hello"))
+
+    def test_email_request_calls_tool(self):
+        reply = stub_reply(_request("Please email me at owner@pharmacy.com"))
+
+        assert reply["tool_calls"][0]["name"] == "send_email"
+        assert reply["tool_calls"][0]["arguments"]["email"] == "owner@pharmacy.com"
+
+    def test_no_tool_when_not_offered(self):
+        assert stub_reply(_request("Email me", tools=[]))["tool_calls"] == []
+        assert stub_reply(_request("Email me", tool_choice="none"))["tool_calls"] == []
+
+    def test_recorded_responses_served_first(self):
+        client = ReplayClient([{"content": "Recorded hello", "tool_calls": []}])
+
+        first = client.chat.completions.create(**_request("Hi"))
+        second = client.chat.completions.create(**_request("Hi"))
+
+        assert first.choices[0].message.content == "Recorded hello"
+        assert second.choices[0].message.content == stub_reply(_request("Hi"))["content"]
+        assert [r["content"] for r in client.responses] == [
+            "Recorded hello", second.choices[0].message.content
+        ]
+
+
+class TestLoadScripts:
+
+    def test_ids_default_to_line_numbers(self):
+        lines = ['{"phone": "555-000-0001", "turns": ["Hi"]}', "", '{"id": "x", "phone": "1", "turns": []}']
+
+        assert [s["id"] for s in load_scripts(lines)] == ["1", "x"]
+
+    def test_missing_turns_rejected(self):
+        with pytest.raises(ValueError):
+            list(load_scripts(['{"phone": "555-000-0001"}']))
+
+
+class TestRunReplay:
+
+    def setup_method(self):
+        self.pharmacies = generate_pharmacies(50)
+        self.scripts = [
+            {"id": "returning", "phone": "555-000-0042", "turns": ["Hi", "Email me at a@b.com"]},
+            {"id": "new", "phone": "555-999-0001", "turns": ["Hello", "Please call me back"]},
+        ]
+
+    def _replay(self, scripts, workers=0):
+        output = io.StringIO()
+        report = run_replay(scripts, output, pharmacies=self.pharmacies, workers=workers)
+        return report, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_results_per_call(self):
+        report, results = self._replay(self.scripts)
+
+        assert report["calls"] == 2 and report["errors"] == 0
+        assert report["tool_calls"] == {"schedule_callback:ok": 1, "send_email:ok": 1}
+        returning, new = results
+        assert returning["conversation_state"] == "returning_customer"
+        assert returning["pharmacy"]["id"] == "43"
+        assert returning["turns"][1]["tool_calls"] == ["send_email"]
+        assert returning["function_summary"]["emails_sent"] == 1
+        assert new["conversation_state"] == "new_customer"
+        assert new["tool_calls"][0]["name"] == "schedule_callback"
+        assert all(turn["seconds"] >= 0 for turn in new["turns"])
+
+    def test_results_replay_identically(self):
+        _, first = self._replay(self.scripts)
+        _, second = self._replay(first)
+
+        assert [r["llm_responses"] for r in second] == [r["llm_responses"] for r in first]
+        assert [t["reply"] for t in second[0]["turns"]] == [t["reply"] for t in first[0]["turns"]]
+
+    def test_process_pool_keeps_input_order(self):
+        scripts = [dict(script, id=f"{script['id']}-{i}") for i in range(5) for script in self.scripts]
+
+        report, results = self._replay(scripts, workers=2)
+
+        assert report["errors"] == 0
+        assert [r["id"] for r in results] == [s["id"] for s in scripts]
+
+    def test_unknown_llm_mode(self):
+        with pytest.raises(ValueError):
+            run_replay([], io.StringIO(), llm="other")
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from src.function_calls import FunctionHandler
+from src.mock_servers import generate_pharmacies
+from src.scoring import (
+    annotate_volumes,
+    daily_volumes,
+    parse_rx_volume,
+    rank_records,
+    score_records,
+    volume_tier
+)
+
+
+class TestParseRxVolume:
+
+    @pytest.mark.parametrize("text,expected", [
+        ("500 per day", 500.0),
+        ("700/week", 100.0),
+        ("1,400 a week", 200.0),
+        ("1.4k weekly", 200.0),
+        ("3650 per year", 10.0),
+        ("800", 800.0),
+        ("About 250 scripts daily", 250.0),
+    ])
+    def test_daily_rate(self, text, expected):
+        assert parse_rx_volume(text) == pytest.approx(expected)
+
+    def test_monthly_uses_average_month(self):
+        assert parse_rx_volume("3000 per month") == pytest.approx(3000 * 12 / 365)
+        assert parse_rx_volume("1000/month") == pytest.approx(1000 * 12 / 365)
+
+    @pytest.mark.parametrize("text", [None, "", "not sure", "your current volume"])
+    def test_no_volume(self, text):
+        assert parse_rx_volume(text) is None
+
+    @pytest.mark.parametrize("value,expected", [
+        (800, 800.0),
+        (12.5, 12.5),
+        (True, None),
+        (-5, None),
+        (["500 per day"], None),
+        ({"per_day": 500}, None),
+    ])
+    def test_non_string_values(self, value, expected):
+        assert parse_rx_volume(value) == expected
+
+    def test_tiers(self):
+        assert volume_tier("50 per day") == "low"
+        assert volume_tier("3000 per month") == "low"
+        assert volume_tier("150/day") == "medium"
+        assert volume_tier("500 per day") == "high"
+        assert volume_tier("1500/day") == "very_high"
+        assert volume_tier("unknown") is None
+
+
+class TestBatchScoring:
+
+    def setup_method(self):
+        self.records = [
+            {"id": "a", "rx_volume": "100 per month"},
+            {"id": "b", "rx_volume": "1500/day"},
+            {"id": "c", "rx_volume": ""},
+            {"id": "d", "rx_volume": "500 per day"},
+            {"id": "e"},
+        ]
+
+    def test_unknown_volumes_are_nan_and_score_zero(self):
+        daily = daily_volumes(self.records)
+        scores = score_records(self.records)
+
+        assert np.isnan(daily[[2, 4]]).all()
+        assert scores[2] == 0.0 and scores[4] == 0.0
+        assert ((scores >= 0) & (scores <= 1)).all()
+
+    def test_rank_by_volume(self):
+        ranked = rank_records(self.records)
+
+        assert [r["id"] for r in ranked] == ["b", "d", "a", "c", "e"]
+        assert [r["id"] for r in rank_records(self.records, limit=2)] == ["b", "d"]
+
+    def test_annotate_in_place(self):
+        annotate_volumes(self.records)
+
+        assert self.records[1]["rx_daily"] == 1500.0
+        assert self.records[1]["volume_tier"] == "very_high"
+        assert self.records[2]["rx_daily"] is None
+        assert self.records[2]["volume_tier"] is None
+
+    def test_mixed_types_do_not_fail_the_batch(self):
+        records = [
+            {"id": "a", "rx_volume": 1500},
+            {"id": "b", "rx_volume": ["500 per day"]},
+            {"id": "c", "rx_volume": "500 per day"},
+            {"id": "d", "rx_volume": {"daily": 50}},
+        ]
+
+        annotate_volumes(records)
+
+        assert [r["volume_tier"] for r in records] == ["very_high", None, "high", None]
+        assert records[0]["rx_daily"] == 1500.0
+
+    def test_scores_large_directory(self):
+        pharmacies = generate_pharmacies(20_000)
+
+        scores = score_records(pharmacies)
+        best = rank_records(pharmacies, limit=10)
+
+        assert scores.shape == (20_000,)
+        assert not np.isnan(scores).any()
+        assert parse_rx_volume(best[0]["rx_volume"]) == daily_volumes(pharmacies).max()
+
+    def test_collected_leads_are_tiered(self):
+        handler = FunctionHandler()
+
+        handler.execute_function("collect_pharmacy_info", {
+            "name": "Lead Pharmacy", "phone": "555-000-1111", "rx_volume": "6000 per month"
+        })
+
+        assert handler.collected_leads[0]["volume_tier"] == "medium"
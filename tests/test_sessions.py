@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import Mock
+from src.sessions import CallSessionManager
+
+
+def _completion(content):
+    message = Mock(content=content, tool_calls=None)
+    return Mock(choices=[Mock(message=message)])
+
+
+class TestCallSessionManager:
+
+    def setup_method(self):
+        self.api = Mock()
+        self.api.get_pharmacy_by_phone.return_value = None
+        self.client = Mock()
+        self.client.chat.completions.create.return_value = _completion("Hello there!")
+        self.evicted = []
+        self.manager = CallSessionManager(
+            max_sessions=3,
+            idle_timeout=60,
+            api_integration=self.api,
+            llm_client=self.client,
+            on_evict=lambda call_id, summary: self.evicted.append(call_id)
+        )
+
+    def test_sessions_are_isolated(self):
+        self.manager.start_call("call-1", "555-000-0001")
+        self.manager.start_call("call-2", "555-000-0002")
+
+        self.manager.continue_conversation("call-1", "Tell me more")
+
+        history_1 = self.manager.get_session("call-1").chatbot.llm.conversation_history
+        history_2 = self.manager.get_session("call-2").chatbot.llm.conversation_history
+        assert len(history_1) == 4
+        assert len(history_2) == 2
+
+    def test_clients_are_shared(self):
+        self.manager.start_call("call-1", "555-000-0001")
+        self.manager.start_call("call-2", "555-000-0002")
+
+        bot_1 = self.manager.get_session("call-1").chatbot
+        bot_2 = self.manager.get_session("call-2").chatbot
+        assert bot_1.api_integration is bot_2.api_integration is self.api
+        assert bot_1.llm.client is bot_2.llm.client is self.client
+        assert bot_1.function_handler is not bot_2.function_handler
+
+    def test_lru_eviction_over_max_sessions(self):
+        for i in range(3):
+            self.manager.start_call(f"call-{i}", f"555-000-000{i}")
+        # Touch call-0 so call-1 becomes least recently used
+        self.manager.continue_conversation("call-0", "Still here")
+
+        self.manager.start_call("call-3", "555-000-0003")
+
+        assert len(self.manager) == 3
+        assert "call-1" not in self.manager
+        assert self.evicted == ["call-1"]
+
+    def test_idle_eviction(self):
+        self.manager.start_call("call-1", "555-000-0001")
+        session = self.manager.get_session("call-1")
+
+        assert self.manager.evict_idle(now=session.last_active + 30) == 0
+        assert self.manager.evict_idle(now=session.last_active + 61) == 1
+        assert "call-1" not in self.manager
+        with pytest.raises(KeyError):
+            self.manager.continue_conversation("call-1", "Hello?")
+
+    def test_memory_cap_evicts_oldest(self):
+        self.manager.max_memory_bytes = 100
+        self.client.chat.completions.create.return_value = _completion("x" * 60)
+
+        self.manager.start_call("call-1", "555-000-0001")
+        self.manager.start_call("call-2", "555-000-0002")
+
+        assert "call-1" not in self.manager
+        assert "call-2" in self.manager
+        assert len(self.manager) == 1
+
+    def test_end_call_returns_summary(self):
+        self.manager.start_call("call-1", "555-000-0001")
+
+        summary = self.manager.end_call("call-1")
+
+        assert summary["caller_phone"] == "555-000-0001"
+        assert summary["conversation_state"] == "new_customer"
+        assert len(self.manager) == 0
+        assert self.manager.total_bytes == 0
+
+    def test_duplicate_call_id_rejected(self):
+        self.manager.start_call("call-1", "555-000-0001")
+
+        with pytest.raises(ValueError):
+            self.manager.start_call("call-1", "555-000-0001")
@@ -0,0 +1,138 @@
+import queue
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+from src.function_calls import FunctionHandler
+from src.storage import RecordStore, SQLiteRecordStore
+
+
+class TestSQLiteRecordStore:
+
+    def setup_method(self):
+        self.store = None
+
+    def teardown_method(self):
+        if self.store is not None:
+            self.store.close()
+
+    def _open(self, tmp_path, **kwargs):
+        self.store = SQLiteRecordStore(str(tmp_path / "records.db"), **kwargs)
+        return self.store
+
+    def test_uses_wal_and_indexes(self, tmp_path):
+        self._open(tmp_path)
+
+        connection = sqlite3.connect(str(tmp_path / "records.db"))
+        mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        indexes = {row[1] for row in connection.execute("PRAGMA index_list(records)")}
+        connection.close()
+
+        assert mode == "wal"
+        assert {"idx_records_phone_time", "idx_records_kind_time"} <= indexes
+
+    def test_flush_makes_appends_visible(self, tmp_path):
+        store = self._open(tmp_path, batch_size=10)
+        for i in range(25):
+            store.append("lead", {"name": f"Pharmacy {i}"}, phone="555-000-0001")
+
+        assert store.flush(timeout=5)
+        leads = store.query(kind="lead", phone="555-000-0001", limit=100)
+        assert len(leads) == 25
+        assert leads[0]["name"] == "Pharmacy 24"
+
+    def test_query_filters(self, tmp_path):
+        store = self._open(tmp_path)
+        store.append("callback", {"phone": "555-000-0001"}, phone="555-000-0001")
+        store.append("callback", {"phone": "555-000-0002"}, phone="555-000-0002")
+        store.append("email", {"to": "a@b.com"})
+        store.flush(timeout=5)
+
+        assert len(store.query(kind="callback")) == 2
+        assert store.query(phone="555-000-0002") == [{"phone": "555-000-0002"}]
+        assert store.query(since="9999-01-01") == []
+
+    def test_close_commits_pending_records(self, tmp_path):
+        store = self._open(tmp_path, flush_interval=10)
+        store.append("email", {"to": "a@b.com"})
+        store.close()
+
+        reopened = self._open(tmp_path)
+        assert reopened.query(kind="email") == [{"to": "a@b.com"}]
+
+    def test_append_after_close_rejected(self, tmp_path):
+        store = self._open(tmp_path)
+        store.close()
+
+        with pytest.raises(RuntimeError):
+            store.append("email", {"to": "a@b.com"})
+
+    def test_append_drops_when_writer_behind(self, tmp_path):
+        store = self._open(tmp_path)
+
+        with patch.object(store._queue, "put_nowait", side_effect=queue.Full):
+            store.append("email", {"to": "a@b.com"})
+        store.append("email", {"to": "c@d.com"})
+        store.flush(timeout=5)
+
+        assert store.dropped == 1
+        assert store.query(kind="email") == [{"to": "c@d.com"}]
+
+    def test_flush_times_out_on_a_full_queue(self, tmp_path):
+        store = self._open(tmp_path)
+
+        with patch.object(store._queue, "put", side_effect=queue.Full) as put:
+            assert store.flush(timeout=0.05) is False
+
+        assert put.call_args.kwargs["timeout"] == 0.05
+
+    def test_interface_requires_append_and_query(self):
+        class PartialStore(RecordStore):
+            def append(self, kind, record, phone=None):
+                pass
+
+        with pytest.raises(TypeError):
+            PartialStore()
+
+
+class TestFunctionHandlerPersistence:
+
+    def test_records_reach_store(self, tmp_path):
+        store = SQLiteRecordStore(str(tmp_path / "records.db"))
+        handler = FunctionHandler(store=store)
+        try:
+            handler.execute_function("schedule_callback", {
+                "phone": "555-123-4567", "preferred_time": "tomorrow at 2pm"
+            })
+            store.flush(timeout=5)
+
+            callbacks = store.query(kind="callback", phone="555-123-4567")
+        finally:
+            store.close()
+
+        assert callbacks[0]["preferred_time"] == "tomorrow at 2pm"
+
+    def test_in_memory_retention_is_bounded(self):
+        handler = FunctionHandler(max_records=3)
+
+        for i in range(10):
+            handler.execute_function("send_email", {
+                "email": f"owner{i}@pharmacy.com", "subject": "Hi", "content": "Info"
+            })
+
+        summary = handler.get_summary()
+        assert summary["emails_sent"] == 10
+        assert [email["to"] for email in summary["details"]["emails"]] == [
+            "owner7@pharmacy.com", "owner8@pharmacy.com", "owner9@pharmacy.com"
+        ]
+
+    def test_reset_clears_memory(self):
+        handler = FunctionHandler()
+        handler.execute_function("send_email", {
+            "email": "a@b.com", "subject": "Hi", "content": "Info"
+        })
+
+        handler.reset()
+
+        assert handler.get_summary()["emails_sent"] == 0
+        assert len(handler.sent_emails) == 0
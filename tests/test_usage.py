@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import Mock
+from src.llm import ChatbotLLM
+from src.metrics import REGISTRY, conversation_state
+from src.usage import (
+    LLM_COST,
+    LLM_TOKENS,
+    TokenUsage,
+    UsageTotals,
+    estimate_cost,
+    record_usage
+)
+
+
+class TestEstimateCost:
+
+    def test_cached_tokens_billed_at_cached_rate(self):
+        full = estimate_cost("gpt-4o", 1_000_000, 0)
+        cached = estimate_cost("gpt-4o", 1_000_000, 0, cached_tokens=1_000_000)
+
+        assert full == pytest.approx(2.50)
+        assert cached == pytest.approx(1.25)
+
+    def test_dated_snapshot_uses_longest_prefix(self):
+        assert estimate_cost("gpt-4o-mini-2024-07-18", 0, 1_000_000) == pytest.approx(0.60)
+
+    def test_unknown_model(self):
+        assert estimate_cost("mystery-model", 100, 100) is None
+
+
+class TestTokenUsage:
+
+    def test_from_openai_reads_cached_tokens(self):
+        usage = TokenUsage.from_openai("gpt-4o", {
+            "prompt_tokens": 1200,
+            "completion_tokens": 50,
+            "prompt_tokens_details": {"cached_tokens": 1024}
+        })
+
+        assert usage.cached_tokens == 1024
+        assert usage.total_tokens == 1250
+        assert usage.cost_usd == pytest.approx(estimate_cost("gpt-4o", 1200, 50, 1024))
+
+    def test_missing_usage(self):
+        assert TokenUsage.from_openai("gpt-4o", None) is None
+
+    def test_totals(self):
+        totals = UsageTotals()
+        totals.add(TokenUsage("gpt-4o", 100, 10, cost_usd=0.001))
+        totals.add(TokenUsage("mystery-model", 50, 5))
+
+        summary = totals.as_dict()
+        assert summary["requests"] == 2
+        assert summary["total_tokens"] == 165
+        assert summary["cost_usd"] == pytest.approx(0.001)
+        assert summary["unpriced_requests"] == 1
+
+
+class TestUsageRecording:
+
+    def setup_method(self):
+        REGISTRY.reset()
+
+    def test_counters_labelled_by_model_and_state(self):
+        with conversation_state("returning_customer"):
+            record_usage(TokenUsage("gpt-4o", 100, 20, cached_tokens=64, cost_usd=0.0004))
+
+        labels = {"model": "gpt-4o", "state": "returning_customer"}
+        assert LLM_TOKENS.value(kind="prompt", **labels) == 100
+        assert LLM_TOKENS.value(kind="cached_prompt", **labels) == 64
+        assert LLM_TOKENS.value(kind="completion", **labels) == 20
+        assert LLM_COST.value(**labels) == pytest.approx(0.0004)
+
+    def test_llm_exposes_response_usage(self):
+        client = Mock()
+        message = Mock(content="Hello", tool_calls=None)
+        client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=message)],
+            usage={"prompt_tokens": 200, "completion_tokens": 10}
+        )
+        llm = ChatbotLLM(model="gpt-4o-mini", client=client)
+
+        result = llm.generate_response("Hi", "System prompt")
+
+        assert result["usage"].prompt_tokens == 200
+        assert llm.last_usage is result["usage"]